@@ -0,0 +1,76 @@
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from app.core.profiler import profiler, token_matches
+from app.core.timing import TimedRoute
+from app.schemas.common import ApiResponse
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def require_profiler_token(x_profiler_token: Optional[str] = Header(None)) -> None:
+    """Only callers holding PROFILER_TOKEN may drive the profiler"""
+    if not token_matches(x_profiler_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid profiler token"
+        )
+
+
+class ProfilerArmRequest(BaseModel):
+    """Request model for arming the profiler"""
+    requests: int = Field(default=1, ge=1, le=1000)
+    route: Optional[str] = None  # Glob on the request path, e.g. /api/recommendations*
+
+
+class ProfilerStatus(BaseModel):
+    """Response model for the profiler state"""
+    remaining: int
+    route_pattern: Optional[str] = None
+    active: int
+    interval_ms: float
+    profiles: List[str]
+
+
+@router.get("/profiler", response_model=ApiResponse[ProfilerStatus], dependencies=[Depends(require_profiler_token)])
+async def get_profiler_status():
+    """
+    Get the profiler state and the saved profiles, newest first.
+    """
+    return ApiResponse(data=ProfilerStatus(**profiler.status()), success=True)
+
+
+@router.post("/profiler", response_model=ApiResponse[ProfilerStatus], dependencies=[Depends(require_profiler_token)])
+async def arm_profiler(request: ProfilerArmRequest):
+    """
+    Profile the next `requests` requests, optionally only those whose path
+    matches `route`. Each profiled response carries an X-Profile-Id header.
+    """
+    profiler.arm(request.requests, request.route)
+    return ApiResponse(data=ProfilerStatus(**profiler.status()), success=True)
+
+
+@router.delete("/profiler", response_model=ApiResponse[ProfilerStatus], dependencies=[Depends(require_profiler_token)])
+async def disarm_profiler():
+    """
+    Stop profiling requests that haven't started yet.
+    """
+    profiler.disarm()
+    return ApiResponse(data=ProfilerStatus(**profiler.status()), success=True)
+
+
+@router.get("/profiler/profiles/{name}", dependencies=[Depends(require_profiler_token)])
+async def download_profile(name: str):
+    """
+    Download a saved profile as collapsed stacks (flamegraph.pl, speedscope).
+    """
+    if name not in profiler.list_profiles():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return FileResponse(os.path.join(profiler.directory, name), media_type="text/plain", filename=name)
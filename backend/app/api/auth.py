@@ -1,11 +1,12 @@
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from typing import Optional
-from supabase_auth.errors import AuthApiError
 
-from app.core.supabase import supabase
+from app.core.supabase import get_supabase_client
+from app.core.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 class SignUpRequest(BaseModel):
@@ -54,8 +55,10 @@ async def sign_up(request: SignUpRequest):
     Note: If email confirmation is enabled in Supabase, the response will not
     include tokens. The user must confirm their email first.
     """
+    from supabase_auth.errors import AuthApiError  # Deferred like the client (app/core/supabase.py)
+
     try:
-        response = supabase.auth.sign_up({
+        response = get_supabase_client().auth.sign_up({
             "email": request.email,
             "password": request.password,
             "options": {
@@ -106,8 +109,10 @@ async def sign_in(request: SignInRequest):
     Sign in with email and password.
     Returns access and refresh tokens.
     """
+    from supabase_auth.errors import AuthApiError
+
     try:
-        response = supabase.auth.sign_in_with_password({
+        response = get_supabase_client().auth.sign_in_with_password({
             "email": request.email,
             "password": request.password,
         })
@@ -142,8 +147,10 @@ async def refresh_token(request: TokenRefreshRequest):
     """
     Refresh access token using refresh token.
     """
+    from supabase_auth.errors import AuthApiError
+
     try:
-        response = supabase.auth.refresh_session(request.refresh_token)
+        response = get_supabase_client().auth.refresh_session(request.refresh_token)
         
         if response.session is None:
             raise HTTPException(
@@ -170,8 +177,10 @@ async def sign_out():
     Sign out the current user.
     Note: This invalidates the current session on the server side.
     """
+    from supabase_auth.errors import AuthApiError
+
     try:
-        supabase.auth.sign_out()
+        get_supabase_client().auth.sign_out()
     except AuthApiError as e:
         # Sign out failures are generally safe to ignore
         pass
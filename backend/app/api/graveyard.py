@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import Optional, List, Tuple
 from datetime import datetime
-from supabase_auth.types import User
-from supabase import Client
 
 from app.core.auth import get_current_user_with_client
-from app.core.supabase import supabase_admin
-from app.schemas.shoe import RetiredShoeCreate, RetiredShoeResponse
-from app.schemas.common import ApiResponse
+from app.core.supabase import Client, User
+from app.core.timing import TimedRoute
+from app.schemas.shoe import RetiredShoeCreate, RetiredShoeResponse, ShoeResponse
+from app.schemas.common import ApiResponse, parse_fields, project, sparse_response
 from app.models.shoe import ShoeCategory
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("", response_model=ApiResponse[List[RetiredShoeResponse]])
@@ -19,17 +18,30 @@ async def get_graveyard(
     min_rating: Optional[int] = Query(None, ge=1, le=5),
     sort_by: Optional[str] = Query("retired_at", regex="^(retired_at|rating|name|brand)$"),
     sort_order: Optional[str] = Query("desc", regex="^(asc|desc)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     auth: Tuple[User, Client] = Depends(get_current_user_with_client)
 ):
     """
     Get all shoes in the current user's graveyard (retired shoes).
+    `fields` limits each shoe to the listed fields, and only those columns
+    are selected from the database.
     """
     current_user, db = auth
+    selected = parse_fields(RetiredShoeResponse, fields, required=("id", "graveyard_id"))
     
     try:
         # Join graveyard with shoes table to get full shoe details
+        columns = "*, shoes(*)"
+        if selected:
+            shoe_columns = [name for name in selected if name in ShoeResponse.model_fields]
+            graveyard_columns = [
+                "graveyard_id:id" if name == "graveyard_id" else name
+                for name in selected if name not in ShoeResponse.model_fields
+            ]
+            columns = ", ".join([*graveyard_columns, f"shoes({', '.join(shoe_columns)})"])
+        
         query = db.table("graveyard").select(
-            "*, shoes(*)"
+            columns
         ).eq("user_id", current_user.id)
         
         if category:
@@ -47,6 +59,12 @@ async def get_graveyard(
         
         response = query.execute()
         
+        if selected:
+            return sparse_response([
+                project(RetiredShoeResponse, selected, {**(item.get("shoes") or {}), **item})
+                for item in (response.data or [])
+            ])
+        
         # Transform the joined data
         retired_shoes = []
         for item in (response.data or []):
@@ -63,6 +81,7 @@ async def get_graveyard(
                 stack_height_heel=shoe_data.get("stack_height_heel"),
                 stack_height_forefoot=shoe_data.get("stack_height_forefoot"),
                 image_url=shoe_data.get("image_url"),
+                image_variants=shoe_data.get("image_variants"),
                 retired_at=item.get("retired_at"),
                 rating=item.get("rating"),
                 review=item.get("review"),
@@ -145,6 +164,7 @@ async def retire_shoe(
                 stack_height_heel=shoe_data.get("stack_height_heel"),
                 stack_height_forefoot=shoe_data.get("stack_height_forefoot"),
                 image_url=shoe_data.get("image_url"),
+                image_variants=shoe_data.get("image_variants"),
                 retired_at=graveyard_response.data[0].get("retired_at"),
                 rating=retired_shoe.rating,
                 review=retired_shoe.review,
@@ -224,6 +244,7 @@ async def update_retired_shoe(
                 stack_height_heel=shoe_data.get("stack_height_heel"),
                 stack_height_forefoot=shoe_data.get("stack_height_forefoot"),
                 image_url=shoe_data.get("image_url"),
+                image_variants=shoe_data.get("image_variants"),
                 retired_at=item.get("retired_at"),
                 rating=item.get("rating"),
                 review=item.get("review"),
@@ -1,96 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import Optional, List, Tuple
-from supabase_auth.types import User
-from supabase import Client
 
 from app.core.auth import get_current_user_with_client, get_current_user
-from app.core.supabase import supabase_admin
-from app.schemas.common import ApiResponse
+from app.core.supabase import Client, User, get_supabase_server
+from app.core.catalog import catalog
+from app.core.scoring import rank_recommendations
+from app.core.similarity import similarity_index
+from app.core.timing import TimedRoute
+from app.schemas.common import ApiResponse, parse_fields, project, sparse_response
 from app.models.shoe import ShoeCategory
 from app.models.recommendation import Recommendation, RecommendationResponse, RecommendedShoe
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
+# Shoe columns the scoring functions read, always selected even under `fields`
+SCORING_COLUMNS = ("id", "brand", "category", "tags", "weight")
 
-def calculate_recommendation_score(
-    shoe: dict,
-    user_preferences: dict,
-    top_rated_shoes: List[dict]
-) -> tuple[float, str]:
-    """
-    Calculate a recommendation score for a shoe based on user preferences.
-    Returns a tuple of (score, explanation).
-    
-    This is a simplified scoring algorithm. In production, you might use:
-    - Machine learning models
-    - Collaborative filtering
-    - More sophisticated tag matching
-    """
-    score = 0.0
-    explanations = []
-    
-    shoe_tags = set(shoe.get("tags", []))
-    
-    # Category preference matching
-    preferred_categories = user_preferences.get("preferred_categories", [])
-    if shoe.get("category") in preferred_categories:
-        score += 0.2
-        explanations.append(f"matches your preferred {shoe.get('category')} category")
-    
-    # Tag similarity with top-rated shoes
-    if top_rated_shoes:
-        all_loved_tags = set()
-        loved_brands = set()
-        
-        for rated_shoe in top_rated_shoes:
-            all_loved_tags.update(rated_shoe.get("tags", []))
-            loved_brands.add(rated_shoe.get("brand"))
-        
-        # Tag overlap score
-        if all_loved_tags:
-            tag_overlap = len(shoe_tags & all_loved_tags) / len(all_loved_tags)
-            score += tag_overlap * 0.5
-            
-            matching_tags = shoe_tags & all_loved_tags
-            if matching_tags:
-                explanations.append(f"shares {', '.join(list(matching_tags)[:3])} with your top-rated shoes")
-        
-        # Brand affinity
-        if shoe.get("brand") in loved_brands:
-            score += 0.15
-            explanations.append(f"you've loved {shoe.get('brand')} shoes before")
-    
-    # Weight preference (assuming lighter is generally preferred for performance)
-    weight = shoe.get("weight", 300)
-    if weight < 220:
-        score += 0.1
-        explanations.append("lightweight design")
-    elif weight < 250:
-        score += 0.05
-    
-    # Normalize score to 0-1 range
-    score = min(score, 1.0)
-    
-    # Generate explanation
-    if not explanations:
-        explanation = "A versatile option that could complement your rotation."
-    else:
-        explanation = "Recommended because " + ", and ".join(explanations[:2]) + "."
-    
-    return round(score, 2), explanation
+
+def shoe_columns(selected: Optional[Tuple[str, ...]]) -> str:
+    """PostgREST column list for candidate shoes under an optional projection"""
+    if not selected:
+        return "*"
+    return ", ".join(dict.fromkeys([*SCORING_COLUMNS, *selected]))
+
+
+def recommendations_payload(
+    scored: List[Tuple[float, str, dict]],
+    selected: Optional[Tuple[str, ...]],
+) -> List[dict]:
+    """Project scored shoes as JSON-ready recommendations"""
+    return [
+        {"shoe": project(RecommendedShoe, selected, shoe), "score": score, "explanation": explanation}
+        for score, explanation, shoe in scored
+    ]
 
 
 @router.get("", response_model=ApiResponse[RecommendationResponse])
 async def get_recommendations(
     category: Optional[ShoeCategory] = None,
     limit: int = Query(default=5, ge=1, le=20),
+    fields: Optional[str] = Query(None, description="Comma-separated shoe fields to return"),
     auth: Tuple[User, Client] = Depends(get_current_user_with_client)
 ):
     """
     Get personalized shoe recommendations based on user's graveyard ratings
-    and preferences.
+    and preferences. `fields` limits each recommended shoe to the listed fields.
     """
     current_user, db = auth
+    selected = parse_fields(RecommendedShoe, fields)
     
     try:
         # Fetch user profile for preferences
@@ -127,7 +84,7 @@ async def get_recommendations(
             excluded_ids.add(item.get("shoe_id"))
         
         # Fetch all shoes (excluding ones user already has)
-        shoes_query = supabase_admin.table("shoes").select("*")
+        shoes_query = get_supabase_server().table("shoes").select(shoe_columns(selected))
         
         if category:
             shoes_query = shoes_query.eq("category", category.value)
@@ -140,25 +97,21 @@ async def get_recommendations(
         ]
         
         # Calculate scores and generate recommendations
-        recommendations = []
-        for shoe in available_shoes:
-            score, explanation = calculate_recommendation_score(
-                shoe, user_preferences, top_rated_shoes
-            )
-            
-            if score > 0.1:  # Only include shoes with meaningful scores
-                recommendations.append(Recommendation(
-                    shoe=RecommendedShoe(**shoe),
-                    score=score,
-                    explanation=explanation
-                ))
-        
-        # Sort by score and limit
-        recommendations.sort(key=lambda r: r.score, reverse=True)
-        recommendations = recommendations[:limit]
+        scored = rank_recommendations(available_shoes, user_preferences, top_rated_shoes, limit)
         
         based_on = [shoe.get("id") for shoe in top_rated_shoes]
         
+        if selected:
+            return sparse_response({
+                "recommendations": recommendations_payload(scored, selected),
+                "based_on_shoes": based_on,
+            })
+        
+        recommendations = [
+            Recommendation(shoe=RecommendedShoe(**shoe), score=score, explanation=explanation)
+            for score, explanation, shoe in scored
+        ]
+        
         return ApiResponse(
             data=RecommendationResponse(
                 recommendations=recommendations,
@@ -178,64 +131,33 @@ async def get_recommendations(
 async def get_similar_shoes(
     shoe_id: str,
     limit: int = Query(default=3, ge=1, le=10),
+    fields: Optional[str] = Query(None, description="Comma-separated shoe fields to return"),
     current_user: Optional[User] = Depends(get_current_user)
 ):
     """
     Get shoes similar to a specific shoe based on tags and category.
+    `fields` limits each similar shoe to the listed fields.
     """
+    selected = parse_fields(RecommendedShoe, fields)
+    
     try:
-        # Fetch the reference shoe
-        shoe_response = supabase_admin.table("shoes").select("*").eq(
-            "id", shoe_id
-        ).single().execute()
+        # Neighbour lists come from the catalog snapshot, precomputed or cached per shoe
+        await catalog.fresh()
+        scored = similarity_index.similar(shoe_id, limit)
         
-        if shoe_response.data is None:
+        if scored is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Shoe not found"
             )
         
-        reference_shoe = shoe_response.data
-        reference_tags = set(reference_shoe.get("tags", []))
-        reference_category = reference_shoe.get("category")
-        
-        # Fetch all other shoes
-        all_shoes_response = supabase_admin.table("shoes").select("*").neq(
-            "id", shoe_id
-        ).execute()
-        
-        # Calculate similarity scores
-        similar_shoes = []
-        for shoe in (all_shoes_response.data or []):
-            shoe_tags = set(shoe.get("tags", []))
-            
-            # Calculate tag similarity
-            if reference_tags:
-                tag_similarity = len(reference_tags & shoe_tags) / len(reference_tags | shoe_tags)
-            else:
-                tag_similarity = 0
-            
-            # Category bonus
-            category_bonus = 0.3 if shoe.get("category") == reference_category else 0
-            
-            score = min((tag_similarity * 0.7) + category_bonus, 1.0)
-            
-            if score > 0.2:
-                matching_tags = list(reference_tags & shoe_tags)
-                if matching_tags:
-                    explanation = f"Similar {', '.join(matching_tags[:3])} characteristics"
-                else:
-                    explanation = f"Similar {reference_category} shoe"
-                
-                similar_shoes.append(Recommendation(
-                    shoe=RecommendedShoe(**shoe),
-                    score=round(score, 2),
-                    explanation=explanation
-                ))
-        
-        # Sort and limit
-        similar_shoes.sort(key=lambda r: r.score, reverse=True)
-        similar_shoes = similar_shoes[:limit]
+        if selected:
+            return sparse_response(recommendations_payload(scored, selected))
+        
+        similar_shoes = [
+            Recommendation(shoe=RecommendedShoe(**shoe), score=score, explanation=explanation)
+            for score, explanation, shoe in scored
+        ]
         
         return ApiResponse(
             data=similar_shoes,
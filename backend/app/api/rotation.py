@@ -1,32 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from typing import Optional, List, Tuple
 from datetime import datetime
-from supabase_auth.types import User
-from supabase import Client
 
 from app.core.auth import get_current_user_with_client
-from app.core.supabase import supabase_admin
-from app.schemas.shoe import RotationShoeCreate, RotationShoeResponse
-from app.schemas.common import ApiResponse
+from app.core.supabase import Client, User, get_supabase_server
+from app.core.timing import TimedRoute
+from app.schemas.shoe import RotationShoeCreate, RotationShoeResponse, ShoeResponse
+from app.schemas.common import ApiResponse, parse_fields, project, sparse_response
 from app.models.shoe import ShoeCategory
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("", response_model=ApiResponse[List[RotationShoeResponse]])
 async def get_rotation(
     category: Optional[ShoeCategory] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     auth: Tuple[User, Client] = Depends(get_current_user_with_client)
 ):
     """
     Get all shoes in the current user's rotation.
+    `fields` limits each shoe to the listed fields, and only those columns
+    are selected from the database.
     """
     current_user, db = auth
+    selected = parse_fields(RotationShoeResponse, fields)
     
     try:
         # Join rotation with shoes table to get full shoe details
+        columns = "*, shoes(*)"
+        if selected:
+            shoe_columns = [name for name in selected if name in ShoeResponse.model_fields]
+            rotation_columns = [name for name in selected if name not in ShoeResponse.model_fields]
+            columns = ", ".join([*rotation_columns, f"shoes({', '.join(shoe_columns)})"])
+        
         query = db.table("rotation").select(
-            "*, shoes(*)"
+            columns
         ).eq("user_id", current_user.id)
         
         if category:
@@ -34,6 +43,12 @@ async def get_rotation(
         
         response = query.order("start_date", desc=True).execute()
         
+        if selected:
+            return sparse_response([
+                project(RotationShoeResponse, selected, {**(item.get("shoes") or {}), **item})
+                for item in (response.data or [])
+            ])
+        
         # Transform the joined data
         rotation_shoes = []
         for item in (response.data or []):
@@ -49,6 +64,7 @@ async def get_rotation(
                 stack_height_heel=shoe_data.get("stack_height_heel"),
                 stack_height_forefoot=shoe_data.get("stack_height_forefoot"),
                 image_url=shoe_data.get("image_url"),
+                image_variants=shoe_data.get("image_variants"),
                 start_date=item.get("start_date"),
                 user_id=item.get("user_id"),
             ))
@@ -77,7 +93,7 @@ async def add_to_rotation(
     
     try:
         # Check if shoe exists (use admin client for public shoe data)
-        shoe_response = supabase_admin.table("shoes").select("*").eq(
+        shoe_response = get_supabase_server().table("shoes").select("*").eq(
             "id", rotation_shoe.shoe_id
         ).single().execute()
         
@@ -126,6 +142,7 @@ async def add_to_rotation(
                 stack_height_heel=shoe.get("stack_height_heel"),
                 stack_height_forefoot=shoe.get("stack_height_forefoot"),
                 image_url=shoe.get("image_url"),
+                image_variants=shoe.get("image_variants"),
                 start_date=response.data[0].get("start_date"),
                 user_id=current_user.id,
             ),
@@ -1,14 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import Optional, List
-from supabase_auth.types import User
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import Any, Dict, Iterator, Optional, List
+from urllib.parse import urlencode
+import asyncio
+import hashlib
+import os
 
 from app.core.auth import get_current_user, get_optional_user
-from app.core.supabase import supabase_admin
-from app.schemas.shoe import ShoeCreate, ShoeUpdate, ShoeResponse
-from app.schemas.common import ApiResponse, PaginatedResponse
-from app.models.shoe import ShoeCategory
+from app.core.catalog import Range, catalog, catalog_version
+from app.core.config import settings
+from app.core.export import (
+    ARROW_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+    arrow_available,
+    arrow_stream,
+    ndjson_stream,
+)
+from app.core.image_cache import ImageFetchError, cache_key, get_image_proxy
+from app.core.supabase import User, get_supabase_server
+from app.core.timing import TimedRoute
+from app.schemas.shoe import ShoeCreate, ShoeUpdate, ShoeResponse, ShoeFacetsResponse
+from app.schemas.common import ApiResponse, PaginatedResponse, parse_fields, project, sparse_response
+from app.models.shoe import ShoeCategory, ShoeTag
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+
+def spec_ranges(
+    min_weight: Optional[float] = Query(None, ge=0, description="Minimum weight in grams"),
+    max_weight: Optional[float] = Query(None, ge=0, description="Maximum weight in grams"),
+    min_drop: Optional[float] = Query(None, ge=0, description="Minimum drop in mm"),
+    max_drop: Optional[float] = Query(None, ge=0, description="Maximum drop in mm"),
+    min_stack_height_heel: Optional[float] = Query(None, ge=0),
+    max_stack_height_heel: Optional[float] = Query(None, ge=0),
+    min_stack_height_forefoot: Optional[float] = Query(None, ge=0),
+    max_stack_height_forefoot: Optional[float] = Query(None, ge=0),
+) -> Dict[str, Range]:
+    """Collect the inclusive spec range filters that were actually given"""
+    return {
+        field: (low, high)
+        for field, low, high in (
+            ("weight", min_weight, max_weight),
+            ("drop", min_drop, max_drop),
+            ("stack_height_heel", min_stack_height_heel, max_stack_height_heel),
+            ("stack_height_forefoot", min_stack_height_forefoot, max_stack_height_forefoot),
+        )
+        if low is not None or high is not None
+    }
 
 
 @router.get("", response_model=ApiResponse[List[ShoeResponse]])
@@ -16,33 +54,46 @@ async def get_shoes(
     category: Optional[ShoeCategory] = None,
     brand: Optional[str] = None,
     search: Optional[str] = None,
+    tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have all of these tags"),
+    any_tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have at least one of these tags"),
+    ranges: Dict[str, Range] = Depends(spec_ranges),
+    sort_by: Optional[str] = Query(
+        None, pattern="^(weight|drop|stack_height_heel|stack_height_forefoot)$"
+    ),
+    sort_order: Optional[str] = Query("asc", pattern="^(asc|desc)$"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
     current_user: Optional[User] = Depends(get_optional_user)
 ):
     """
     Get all shoes from the shoe catalog.
-    Supports filtering by category, brand, and search term.
+    Supports filtering by category, brand, search term, tags and spec ranges
+    (inclusive), and sorting by any spec. Served from the in-process
+    catalog snapshot. `fields` limits each shoe to the listed fields.
     """
+    selected = parse_fields(ShoeResponse, fields)
+    
     try:
-        query = supabase_admin.table("shoes").select("*", count="exact")
-        
-        if category:
-            query = query.eq("category", category.value)
-        
-        if brand:
-            query = query.ilike("brand", f"%{brand}%")
-        
-        if search:
-            query = query.or_(f"name.ilike.%{search}%,brand.ilike.%{search}%")
-        
         # Pagination
         offset = (page - 1) * page_size
-        query = query.range(offset, offset + page_size - 1)
+        rows = (await catalog.fresh()).query(
+            category=category.value if category else None,
+            brand=brand,
+            search=search,
+            ranges=ranges,
+            tags=[tag.value for tag in tags or []],
+            any_tags=[tag.value for tag in any_tags or []],
+            sort_by=sort_by,
+            descending=(sort_order == "desc"),
+            offset=offset,
+            limit=page_size,
+        )
         
-        response = query.execute()
+        if selected:
+            return sparse_response([project(ShoeResponse, selected, shoe) for shoe in rows])
         
-        shoes = [ShoeResponse(**shoe) for shoe in (response.data or [])]
+        shoes = [ShoeResponse(**shoe) for shoe in rows]
         
         return ApiResponse(
             data=shoes,
@@ -56,13 +107,149 @@ async def get_shoes(
         )
 
 
+@router.get("/facets", response_model=ApiResponse[ShoeFacetsResponse])
+async def get_shoe_facets(
+    category: Optional[ShoeCategory] = None,
+    brand: Optional[str] = None,
+    search: Optional[str] = None,
+    tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have all of these tags"),
+    any_tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have at least one of these tags"),
+):
+    """
+    Get shoe counts per category, brand and tag for the catalog filters.
+    Counts are conditional on the current filter and served from the
+    in-process catalog snapshot.
+    """
+    try:
+        facets = (await catalog.fresh()).facets(
+            category=category.value if category else None,
+            brand=brand,
+            search=search,
+            tags=[tag.value for tag in tags or []],
+            any_tags=[tag.value for tag in any_tags or []],
+        )
+        
+        return ApiResponse(
+            data=ShoeFacetsResponse(**facets),
+            success=True
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch shoe facets: {str(e)}"
+        )
+
+
+def iter_shoe_pages(
+    category: Optional[str] = None,
+    brand: Optional[str] = None,
+    search: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    any_tags: Optional[List[str]] = None,
+    ranges: Optional[Dict[str, Range]] = None,
+    chunk_size: int = 1000,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Read matching shoes from the database in id order, one chunk at a time.
+    Uses keyset pagination (id > last id) so each read is an index range scan.
+    """
+    last_id = None
+    while True:
+        query = get_supabase_server().table("shoes").select("*")
+        
+        if category:
+            query = query.eq("category", category)
+        if brand:
+            query = query.ilike("brand", f"%{brand}%")
+        if search:
+            query = query.or_(f"name.ilike.%{search}%,brand.ilike.%{search}%")
+        if tags:
+            query = query.contains("tags", tags)
+        if any_tags:
+            query = query.overlaps("tags", any_tags)
+        for field, (low, high) in (ranges or {}).items():
+            if low is not None:
+                query = query.gte(field, low)
+            if high is not None:
+                query = query.lte(field, high)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        
+        page = query.order("id").limit(chunk_size).execute().data or []
+        yield page
+        if len(page) < chunk_size:
+            return
+        last_id = page[-1]["id"]
+
+
+@router.get("/export")
+async def export_shoes(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|arrow)$"),
+    category: Optional[ShoeCategory] = None,
+    brand: Optional[str] = None,
+    search: Optional[str] = None,
+    tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have all of these tags"),
+    any_tags: Optional[List[ShoeTag]] = Query(None, description="Shoes must have at least one of these tags"),
+    ranges: Dict[str, Range] = Depends(spec_ranges),
+    chunk_size: int = Query(default=1000, ge=100, le=1000),
+):
+    """
+    Stream the shoe catalog as NDJSON or an Arrow IPC stream.
+    Accepts the same filters as the catalog list. The `ETag` identifies the
+    catalog version (also sent as `X-Catalog-Version`), the format and the
+    filters; send it back in `If-None-Match` to get a 304 when nothing has changed.
+    """
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow export requires pyarrow (pip install 'turnover-backend[export]')"
+        )
+    
+    try:
+        # A database round trip: keep it off the event loop
+        version = await asyncio.to_thread(catalog_version)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to export shoes: {str(e)}"
+        )
+    
+    filters = {
+        "category": category.value if category else None,
+        "brand": brand,
+        "search": search,
+        "tags": [tag.value for tag in tags or []],
+        "any_tags": [tag.value for tag in any_tags or []],
+    }
+    # Same export, same tag: parameter order, repeats and defaults don't matter
+    query = urlencode(sorted(
+        [("format", format), ("chunk_size", chunk_size)]
+        + [(key, value) for key, value in filters.items() if isinstance(value, str)]
+        + [(key, value) for key in ("tags", "any_tags") for value in sorted(set(filters[key]))]
+        + [(f"{field}.{bound}", value) for field, values in ranges.items()
+           for bound, value in zip(("min", "max"), values, strict=True) if value is not None]
+    ))
+    etag = f'"{version}-{hashlib.md5(query.encode()).hexdigest()[:16]}"'
+    headers = {"ETag": etag, "X-Catalog-Version": version}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    pages = iter_shoe_pages(ranges=ranges, chunk_size=chunk_size, **filters)
+    
+    if format == "arrow":
+        return StreamingResponse(arrow_stream(pages), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(ndjson_stream(pages), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
 @router.get("/{shoe_id}", response_model=ApiResponse[ShoeResponse])
 async def get_shoe(shoe_id: str):
     """
     Get a single shoe by ID.
     """
     try:
-        response = supabase_admin.table("shoes").select("*").eq(
+        response = get_supabase_server().table("shoes").select("*").eq(
             "id", shoe_id
         ).single().execute()
         
@@ -86,6 +273,95 @@ async def get_shoe(shoe_id: str):
         )
 
 
+def mirrored_path(url: str) -> Optional[str]:
+    """Local file behind a URL served from the image mirror, if it exists"""
+    prefix = settings.IMAGE_MIRROR_BASE_URL.rstrip("/") + "/"
+    if not prefix.startswith("/") or not url.startswith(prefix):
+        return None
+    parts = url[len(prefix):].split("/")
+    if any(part in ("", ".", "..") for part in parts):
+        return None
+    path = os.path.join(settings.IMAGE_MIRROR_DIR, *parts)
+    return path if os.path.isfile(path) else None
+
+
+class CachedImageResponse(FileResponse):
+    """FileResponse for an image-cache entry, which stays pinned until it has been sent"""
+
+    def __init__(self, path: str, url: str, **kwargs: Any) -> None:
+        super().__init__(path, **kwargs)
+        self.url = url
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            get_image_proxy().release(self.url)
+
+
+@router.get("/{shoe_id}/image", response_class=FileResponse)
+async def get_shoe_image(
+    shoe_id: str,
+    request: Request,
+    size: str = Query("original", pattern="^(original|160|320|640)$",
+                      description="Thumbnail width in pixels, or the original image"),
+):
+    """
+    Serve a shoe's image from our own cache instead of the third-party host.
+    Thumbnail sizes come from the image mirror; without one, the original is served.
+    """
+    try:
+        if catalog.is_loaded:
+            shoe = catalog.get(shoe_id)
+        else:
+            response = get_supabase_server().table("shoes").select("image_url, image_variants").eq(
+                "id", shoe_id
+            ).limit(1).execute()
+            shoe = response.data[0] if response.data else None
+        
+        if shoe is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Shoe not found"
+            )
+        
+        source = (shoe.get("image_variants") or {}).get(size) or shoe.get("image_url")
+        if not source:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Shoe has no image"
+            )
+        
+        # Image URLs are immutable (a new image gets a new URL), so the URL is the validator
+        etag = f'"{cache_key(source)[:32]}"'
+        headers = {
+            "Cache-Control": f"public, max-age={settings.IMAGE_CACHE_MAX_AGE_SECONDS}, immutable",
+            "ETag": etag,
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        path = mirrored_path(source)
+        if path is not None:
+            return FileResponse(path, headers=headers)
+        try:
+            path = await get_image_proxy().fetch(source)
+        except ImageFetchError as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to fetch shoe image: {str(e)}"
+            )
+        return CachedImageResponse(path, source, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch shoe image: {str(e)}"
+        )
+
+
 @router.post("", response_model=ApiResponse[ShoeResponse], status_code=status.HTTP_201_CREATED)
 async def create_shoe(
     shoe: ShoeCreate,
@@ -100,7 +376,7 @@ async def create_shoe(
         shoe_data["tags"] = [tag.value for tag in shoe.tags]
         shoe_data["category"] = shoe.category.value
         
-        response = supabase_admin.table("shoes").insert(shoe_data).execute()
+        response = get_supabase_server().table("shoes").insert(shoe_data).execute()
         
         if not response.data:
             raise HTTPException(
@@ -108,6 +384,8 @@ async def create_shoe(
                 detail="Failed to create shoe"
             )
         
+        catalog.upsert(response.data[0])
+        
         return ApiResponse(
             data=ShoeResponse(**response.data[0]),
             success=True,
@@ -148,7 +426,7 @@ async def update_shoe(
         if "category" in update_data:
             update_data["category"] = update_data["category"].value
         
-        response = supabase_admin.table("shoes").update(update_data).eq(
+        response = get_supabase_server().table("shoes").update(update_data).eq(
             "id", shoe_id
         ).execute()
         
@@ -158,6 +436,8 @@ async def update_shoe(
                 detail="Shoe not found"
             )
         
+        catalog.upsert(response.data[0])
+        
         return ApiResponse(
             data=ShoeResponse(**response.data[0]),
             success=True,
@@ -183,7 +463,7 @@ async def delete_shoe(
     Note: In production, this might be admin-only.
     """
     try:
-        response = supabase_admin.table("shoes").delete().eq(
+        response = get_supabase_server().table("shoes").delete().eq(
             "id", shoe_id
         ).execute()
         
@@ -193,6 +473,8 @@ async def delete_shoe(
                 detail="Shoe not found"
             )
         
+        catalog.remove(shoe_id)
+        
     except HTTPException:
         raise
     except Exception as e:
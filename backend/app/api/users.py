@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Tuple
-from supabase_auth.types import User
-from supabase import Client
 
 from app.core.auth import get_current_user_with_client
-from app.core.supabase import supabase_admin
+from app.core.supabase import Client, User
+from app.core.timing import TimedRoute
 from app.schemas.user import UserProfileResponse, UserProfileUpdate
 from app.schemas.common import ApiResponse
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/me", response_model=ApiResponse[UserProfileResponse])
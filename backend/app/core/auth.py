@@ -1,11 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, Tuple
-from supabase_auth.types import User
-from supabase import create_client, Client
 
-from app.core.supabase import supabase, supabase_admin
+from app.core.supabase import Client, User, create_client, get_supabase_client
 from app.core.config import settings
+from app.core.timing import span
 
 # Security scheme for Swagger UI
 security = HTTPBearer()
@@ -37,7 +36,8 @@ async def get_current_user(
     
     try:
         # Verify the token with Supabase
-        response = supabase.auth.get_user(token)
+        with span("auth"):
+            response = get_supabase_client().auth.get_user(token)
         
         if response.user is None:
             raise HTTPException(
@@ -67,7 +67,8 @@ async def get_current_user_with_client(
     
     try:
         # Verify the token with Supabase
-        response = supabase.auth.get_user(token)
+        with span("auth"):
+            response = get_supabase_client().auth.get_user(token)
         
         if response.user is None:
             raise HTTPException(
@@ -77,7 +78,8 @@ async def get_current_user_with_client(
             )
         
         # Create an authenticated client for this user
-        auth_client = get_authenticated_client(token)
+        with span("auth-client"):
+            auth_client = get_authenticated_client(token)
         
         return response.user, auth_client
         
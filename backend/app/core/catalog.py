@@ -0,0 +1,782 @@
+"""
+In-process snapshot of the shoe catalog.
+
+The catalog is read far more often than it is written, so list filters and facet
+counts are served from a snapshot loaded from Supabase and kept current by the
+write endpoints. Every shoe occupies a slot; categories, brands and tags are
+indexed as bitmaps (Python ints, bit N = slot N) so filters combine by set
+algebra and facet counts are popcounts rather than row scans. Numeric specs are
+kept as sorted arrays so range filters and spec ordering are answered with bisect.
+
+Loads are also published as a snapshot file (app/core/snapshot.py) that every
+worker maps read-only: rows, IDs, names and spec arrays are then read from the
+shared page cache instead of being copied into each process (facet bitmaps are
+decoded per query), and a worker only
+materializes a private copy once it applies a write. Refreshes compare
+`catalog_version()` and reload only when the table has changed;
+app/core/catalog_sync.py decides which worker does that.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import CallbackMetric, register_cache
+from app.core.snapshot import (
+    CatalogSnapshot,
+    MappedRows,
+    MappedSlots,
+    Neighbour,
+    SnapshotError,
+    write_snapshot,
+)
+from app.core.supabase import get_supabase_server
+
+# PostgREST caps responses at 1000 rows by default
+PAGE_SIZE = 1000
+SEARCH_CACHE_SIZE = 128
+
+# Numeric columns indexed as sorted arrays for range filters and ordering
+SPEC_FIELDS = ("weight", "drop", "stack_height_heel", "stack_height_forefoot")
+
+Range = Tuple[Optional[float], Optional[float]]
+
+
+def _bitmap(slots: Iterable[int], size: int) -> int:
+    """Build a bitmap with the given slots set"""
+    buf = bytearray((size + 7) // 8)
+    for slot in slots:
+        buf[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _slot_bytes(mask: int, size: int) -> bytes:
+    """Expand a bitmap into bytes so membership checks are O(1) per slot"""
+    return mask.to_bytes((size + 7) // 8 or 1, "little")
+
+
+def _has_slot(buf: bytes, slot: int) -> bool:
+    return bool(buf[slot >> 3] >> (slot & 7) & 1)
+
+
+def _iter_slots(mask: int, size: int) -> Iterator[int]:
+    """Yield the set slots of a bitmap in ascending order"""
+    buf = _slot_bytes(mask, size)
+    for index, byte in enumerate(buf):
+        while byte:
+            low = byte & -byte
+            yield (index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class SpecIndex:
+    """One numeric column as parallel arrays of values and slots, sorted by value"""
+
+    def __init__(self, values: Iterable[float] = (), slots: Iterable[int] = ()) -> None:
+        self.values = array("d", values)
+        self.slots = array("i", slots)
+
+    @classmethod
+    def build(cls, field: str, rows: List[Dict[str, Any]]) -> "SpecIndex":
+        order = sorted(range(len(rows)), key=lambda slot: float(rows[slot][field]))
+        return cls((float(rows[slot][field]) for slot in order), order)
+
+    @classmethod
+    def mapped(cls, values: memoryview, slots: memoryview) -> "SpecIndex":
+        """Read-only index over a snapshot's arrays, without copying them"""
+        index = cls()
+        index.values, index.slots = values, slots
+        return index
+
+    def own(self) -> "SpecIndex":
+        """A private, writable copy"""
+        return SpecIndex(self.values, self.slots)
+
+    def add(self, value: float, slot: int) -> None:
+        position = bisect_right(self.values, value)
+        self.values.insert(position, value)
+        self.slots.insert(position, slot)
+
+    def discard(self, value: float, slot: int) -> None:
+        position = bisect_left(self.values, value)
+        while position < len(self.values) and self.values[position] == value:
+            if self.slots[position] == slot:
+                del self.values[position]
+                del self.slots[position]
+                return
+            position += 1
+
+    def bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        """Array positions [start, stop) holding values within low..high (inclusive)"""
+        start = bisect_left(self.values, low) if low is not None else 0
+        stop = bisect_right(self.values, high) if high is not None else len(self.values)
+        return start, max(start, stop)
+
+
+def _catalog_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    return (row.get("brand") or "", row.get("name") or "")
+
+
+class OrderIndex:
+    """
+    Live slots in catalog order (brand, name). Loads and snapshots store rows
+    in that order already, so this is only built once a write breaks it.
+    """
+
+    def __init__(self, rows: List[Optional[Dict[str, Any]]]) -> None:
+        live = sorted(
+            (slot for slot, row in enumerate(rows) if row is not None),
+            key=lambda slot: _catalog_key(rows[slot]),
+        )
+        self.keys = [_catalog_key(rows[slot]) for slot in live]
+        self.slots = array("i", live)
+
+    def add(self, row: Dict[str, Any], slot: int) -> None:
+        key = _catalog_key(row)
+        position = bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.slots.insert(position, slot)
+
+    def discard(self, row: Dict[str, Any], slot: int) -> None:
+        key = _catalog_key(row)
+        position = bisect_left(self.keys, key)
+        while position < len(self.keys) and self.keys[position] == key:
+            if self.slots[position] == slot:
+                del self.keys[position]
+                del self.slots[position]
+                return
+            position += 1
+
+
+def _sorted_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """Order facet counts by count (desc), then value"""
+    return dict(sorted(
+        ((key, count) for key, count in counts.items() if count > 0),
+        key=lambda item: (-item[1], item[0]),
+    ))
+
+
+def fetch_catalog_rows() -> List[Dict[str, Any]]:
+    """Download the full shoe catalog from Supabase, page by page"""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        response = get_supabase_server().table("shoes").select("*").order("brand").order(
+            "name"
+        ).range(offset, offset + PAGE_SIZE - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def catalog_version() -> str:
+    """
+    Cheap fingerprint of the catalog table: row count plus the latest
+    `updated_at`. Changes whenever a shoe is inserted, updated or deleted.
+    """
+    response = get_supabase_server().table("shoes").select("updated_at", count="exact").order(
+        "updated_at", desc=True, nullsfirst=False
+    ).limit(1).execute()
+    latest = response.data[0].get("updated_at") if response.data else ""
+    return hashlib.md5(f"{response.count or 0}:{latest}".encode()).hexdigest()[:16]
+
+
+class ShoeCatalog:
+    """Slot-indexed shoe catalog with bitmap indexes and incremental facet counts"""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.version: Optional[str] = None  # catalog_version() of the loaded rows
+        self.generation = 0
+        self.reloads = 0
+        self.snapshot_loads = 0
+        self._snapshot_generation = 0
+        self.managed = False  # refreshed by app/core/catalog_sync.py rather than on read
+        self._background: Optional[asyncio.Task] = None
+        self.search_hits = 0
+        self.search_misses = 0
+        self.search_evictions = 0
+        self._load_rows([])
+
+    # ============ Loading ============
+
+    def _load_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Rebuild every index from scratch in a single pass"""
+        category_slots: Dict[str, List[int]] = defaultdict(list)
+        brand_slots: Dict[str, List[int]] = defaultdict(list)
+        tag_slots: Dict[str, List[int]] = defaultdict(list)
+
+        for slot, row in enumerate(rows):
+            category_slots[row.get("category")].append(slot)
+            brand_slots[row.get("brand")].append(slot)
+            for tag in row.get("tags") or []:
+                tag_slots[tag].append(slot)
+
+        size = len(rows)
+        with self._lock:
+            self._rows: List[Optional[Dict[str, Any]]] = list(rows)
+            self._slots: Dict[str, int] = {row["id"]: slot for slot, row in enumerate(rows)}
+            self._live = (1 << size) - 1
+            self._category_bits = {k: _bitmap(v, size) for k, v in category_slots.items()}
+            self._brand_bits = {k: _bitmap(v, size) for k, v in brand_slots.items()}
+            self._tag_bits = {k: _bitmap(v, size) for k, v in tag_slots.items()}
+            self._category_counts = Counter({k: len(v) for k, v in category_slots.items()})
+            self._brand_counts = Counter({k: len(v) for k, v in brand_slots.items()})
+            self._tag_counts = Counter({k: len(v) for k, v in tag_slots.items()})
+            self._specs = {field: SpecIndex.build(field, rows) for field in SPEC_FIELDS}
+            self._order: Optional[OrderIndex] = None  # None while slot order is catalog order
+            self._search_cache: "OrderedDict[str, int]" = OrderedDict()
+            self._search_names: Optional[List[str]] = None
+            self._snapshot: Optional[CatalogSnapshot] = None
+            self.generation += 1
+
+    def load(self, rows: Iterable[Dict[str, Any]], version: Optional[str] = None) -> None:
+        """Replace the snapshot with the given rows"""
+        self._load_rows(list(rows))
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.reloads += 1
+
+    def load_snapshot(self, snapshot: CatalogSnapshot) -> None:
+        """
+        Serve from a mapped snapshot file. Rows, slots, spec arrays, name
+        search and facet bitmaps read the mapping in place; only the live
+        bitmap is copied.
+        """
+        category_bits = snapshot.bitmaps("category")
+        brand_bits = snapshot.bitmaps("brand")
+        tag_bits = snapshot.bitmaps("tags")
+        with self._lock:
+            self._rows = MappedRows(snapshot, settings.CATALOG_ROW_CACHE_SIZE)
+            self._slots = MappedSlots(snapshot)
+            self._live = snapshot.live()
+            self._category_bits = category_bits
+            self._brand_bits = brand_bits
+            self._tag_bits = tag_bits
+            self._category_counts = Counter(category_bits.counts())
+            self._brand_counts = Counter(brand_bits.counts())
+            self._tag_counts = Counter(tag_bits.counts())
+            self._specs = {field: SpecIndex.mapped(*snapshot.spec(field)) for field in SPEC_FIELDS}
+            self._order = None
+            self._search_cache = OrderedDict()
+            self._search_names = None
+            self._snapshot = snapshot
+            self.generation += 1
+            self._snapshot_generation = self.generation
+        self.version = snapshot.version
+        self.loaded_at = time.monotonic()
+        self.snapshot_loads += 1
+
+    def open_snapshot(self, path: str) -> bool:
+        """Serve from the snapshot file at `path` if there is a usable one"""
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            self.load_snapshot(CatalogSnapshot(path))
+        except (SnapshotError, KeyError, ValueError) as e:
+            print(f"⚠️  Warning: ignoring catalog snapshot: {e}")
+            return False
+        return True
+
+    def save_snapshot(
+        self,
+        path: str,
+        neighbours: Optional[Dict[str, List[Neighbour]]] = None,
+        generation: int = 0,
+    ) -> int:
+        """Write the current state (and any similar-shoe lists) to `path`; returns its size"""
+        with self._lock:
+            version = self.version
+            source = self
+            if self._order is not None:
+                # Writes moved shoes out of catalog order: store them re-slotted in order
+                source = ShoeCatalog()
+                source._load_rows([self._rows[slot] for slot in self._order.slots])
+            rows = list(source._rows)
+            slots = dict(source._slots)
+            live = source._live
+            bitmaps = {
+                "category": dict(source._category_bits),
+                "brand": dict(source._brand_bits),
+                "tags": dict(source._tag_bits),
+            }
+            specs = {field: (array("d", spec.values), array("i", spec.slots)) for field, spec in source._specs.items()}
+        if version is None:
+            raise ValueError("Only catalogs loaded at a known version can be saved")
+
+        neighbour_slots = {}
+        for shoe_id, similar in (neighbours or {}).items():
+            if shoe_id in slots:
+                neighbour_slots[slots[shoe_id]] = [
+                    (score, explanation, slots[other]) for score, explanation, other in similar if other in slots
+                ]
+        return write_snapshot(path, version, rows, live, bitmaps, specs, neighbour_slots, generation)
+
+    @property
+    def serves_snapshot(self) -> bool:
+        """True while the catalog is exactly as loaded from a snapshot file"""
+        return self._snapshot is not None and self._snapshot_generation == self.generation
+
+    def has_snapshot_neighbours(self) -> bool:
+        return self.serves_snapshot and self._snapshot.has_neighbours
+
+    @property
+    def snapshot_generation(self) -> Optional[int]:
+        """Publish generation of the mapped snapshot, None when not serving one"""
+        return self._snapshot.generation if self.serves_snapshot else None
+
+    def _detach(self) -> None:
+        """Copy a mapped snapshot into private, writable structures before a write"""
+        if self._snapshot is None:
+            return
+        rows = list(self._rows)
+        self._rows = rows
+        self._slots = {row["id"]: slot for slot, row in enumerate(rows) if row is not None}
+        self._specs = {field: spec.own() for field, spec in self._specs.items()}
+        self._category_bits = dict(self._category_bits)
+        self._brand_bits = dict(self._brand_bits)
+        self._tag_bits = dict(self._tag_bits)
+        self._search_names = None
+        self._snapshot = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def is_stale(self) -> bool:
+        """Check whether the snapshot is missing or older than the refresh interval"""
+        return (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at > settings.CATALOG_REFRESH_SECONDS
+        )
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale so the next read reloads it"""
+        self.loaded_at = None
+        self.version = None
+
+    def _refresh(self) -> bool:
+        """Reload from Supabase unless the table is still at the loaded version"""
+        version = catalog_version()
+        if version == self.version:
+            self.loaded_at = time.monotonic()
+            return False
+        self.load(fetch_catalog_rows(), version)
+        return True
+
+    def ensure_fresh(self) -> "ShoeCatalog":
+        """
+        Load the snapshot from Supabase if it is missing or stale. A managed
+        catalog is kept fresh by app/core/catalog_sync.py once loaded.
+        """
+        if self.is_stale() and not (self.managed and self.is_loaded):
+            with self._refresh_lock:
+                if self.is_stale():
+                    self._refresh()
+        return self
+
+    async def fresh(self) -> "ShoeCatalog":
+        """
+        ensure_fresh() for async routes, with the reload in a worker thread.
+        Only the first load is waited for: a stale catalog keeps serving its
+        current generation while a single background refresh catches up.
+        """
+        if not self.is_stale() or (self.managed and self.is_loaded):
+            return self
+        if not self.is_loaded:
+            return await asyncio.to_thread(self.ensure_fresh)
+        loop = asyncio.get_running_loop()
+        task = self._background
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._background = loop.create_task(self._refresh_in_background(), name="catalog-refresh")
+        return self
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await asyncio.to_thread(self.ensure_fresh)
+        except Exception as e:
+            print(f"⚠️  Warning: catalog refresh failed, serving the loaded catalog: {e}")
+
+    def validate(self) -> bool:
+        """Check the loaded version against Supabase now; True if it was reloaded"""
+        with self._refresh_lock:
+            return self._refresh()
+
+    # ============ Incremental maintenance ============
+
+    def _index(self, slot: int, row: Dict[str, Any]) -> None:
+        bit = 1 << slot
+        category, brand, tags = row.get("category"), row.get("brand"), row.get("tags") or []
+        self._live |= bit
+        self._category_bits[category] = self._category_bits.get(category, 0) | bit
+        self._brand_bits[brand] = self._brand_bits.get(brand, 0) | bit
+        self._category_counts[category] += 1
+        self._brand_counts[brand] += 1
+        for tag in tags:
+            self._tag_bits[tag] = self._tag_bits.get(tag, 0) | bit
+            self._tag_counts[tag] += 1
+        for field, spec in self._specs.items():
+            spec.add(float(row[field]), slot)
+
+    def _unindex(self, slot: int, row: Dict[str, Any]) -> None:
+        mask = ~(1 << slot)
+        category, brand, tags = row.get("category"), row.get("brand"), row.get("tags") or []
+        self._live &= mask
+        self._category_bits[category] &= mask
+        self._brand_bits[brand] &= mask
+        self._category_counts[category] -= 1
+        self._brand_counts[brand] -= 1
+        for tag in tags:
+            self._tag_bits[tag] &= mask
+            self._tag_counts[tag] -= 1
+        for field, spec in self._specs.items():
+            spec.discard(float(row[field]), slot)
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """Apply a created or updated shoe row to the snapshot"""
+        if not self.is_loaded:
+            return
+        with self._lock:
+            self._detach()
+            slot = self._slots.get(row["id"])
+            if slot is None:
+                slot = len(self._rows)
+                if self._order is None and not self._sorts_last(row):
+                    self._order = OrderIndex(self._rows)
+                self._rows.append(row)
+                self._slots[row["id"]] = slot
+            else:
+                previous = self._rows[slot]
+                self._unindex(slot, previous)
+                if self._order is None and _catalog_key(previous) != _catalog_key(row):
+                    self._order = OrderIndex(self._rows)
+                if self._order is not None:
+                    self._order.discard(previous, slot)
+                self._rows[slot] = row
+            if self._order is not None:
+                self._order.add(row, slot)
+            self._index(slot, row)
+            if self._search_names is not None:
+                self._set_search_name(slot, row)
+            self._search_cache.clear()
+            self.generation += 1
+
+    def _sorts_last(self, row: Dict[str, Any]) -> bool:
+        """True if `row` belongs after every live shoe in catalog order"""
+        for other in reversed(self._rows):
+            if other is not None:
+                return _catalog_key(other) <= _catalog_key(row)
+        return True
+
+    def remove(self, shoe_id: str) -> None:
+        """Drop a deleted shoe from the snapshot"""
+        if not self.is_loaded:
+            return
+        with self._lock:
+            self._detach()
+            slot = self._slots.pop(shoe_id, None)
+            if slot is None:
+                return
+            self._unindex(slot, self._rows[slot])
+            if self._order is not None:
+                self._order.discard(self._rows[slot], slot)
+            self._rows[slot] = None
+            if self._search_names is not None:
+                self._search_names[slot] = ""
+            self._search_cache.clear()
+            self.generation += 1
+
+    def _set_search_name(self, slot: int, row: Dict[str, Any]) -> None:
+        name = (row.get("name") or "").lower()
+        if slot < len(self._search_names):
+            self._search_names[slot] = name
+        else:
+            self._search_names.append(name)
+
+    def prepare_search(self) -> None:
+        """
+        Build the lowercased name list that search scans (otherwise built on
+        first search). A mapped snapshot is searched in place instead.
+        """
+        with self._lock:
+            if self._search_names is None and self._snapshot is None:
+                self._search_names = [
+                    (row.get("name") or "").lower() if row is not None else ""
+                    for row in self._rows
+                ]
+
+    # ============ Queries ============
+
+    def get(self, shoe_id: str) -> Optional[Dict[str, Any]]:
+        """Look up one shoe row by ID"""
+        with self._lock:
+            slot = self._slots.get(shoe_id)
+            return self._rows[slot] if slot is not None else None
+
+    def snapshot_neighbours(self, shoe_id: str, generation: int) -> Optional[List[Neighbour]]:
+        """Similar-shoe list stored in the snapshot, if `generation` is still the snapshot's"""
+        with self._lock:
+            if not self.serves_snapshot or generation != self.generation:
+                return None
+            slot = self._slots.get(shoe_id)
+            if slot is None:
+                return None
+            return self._snapshot.neighbours(slot)
+
+    def _brand_mask(self, brand: str) -> int:
+        """Case-insensitive substring match on brand, like `ilike %brand%`"""
+        needle = brand.lower()
+        mask = 0
+        for value, bits in self._brand_bits.items():
+            if value and needle in value.lower():
+                mask |= bits
+        return mask
+
+    def _search_mask(self, search: str) -> int:
+        """Case-insensitive substring match on name or brand"""
+        needle = search.lower()
+        cached = self._search_cache.get(needle)
+        if cached is not None:
+            self._search_cache.move_to_end(needle)
+            self.search_hits += 1
+            return cached
+        self.search_misses += 1
+
+        mask = self._brand_mask(needle)
+        if self._snapshot is not None:
+            matches: Iterable[int] = self._snapshot.search(needle)
+        else:
+            self.prepare_search()
+            matches = (slot for slot, name in enumerate(self._search_names) if needle in name)
+        mask |= _bitmap(matches, len(self._rows))
+        self._search_cache[needle] = mask
+        if len(self._search_cache) > SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+            self.search_evictions += 1
+        return mask
+
+    def _range_mask(self, ranges: Dict[str, Range]) -> int:
+        """
+        Match every spec range at once. Only the narrowest range is expanded
+        from its sorted array; the others are checked on those candidates.
+        """
+        bounded = []
+        for field, (low, high) in ranges.items():
+            start, stop = self._specs[field].bounds(low, high)
+            bounded.append((stop - start, field, start, stop))
+        bounded.sort()
+
+        _, field, start, stop = bounded[0]
+        candidates: Iterable[int] = self._specs[field].slots[start:stop]
+        for _, other, _, _ in bounded[1:]:
+            low, high = ranges[other]
+            candidates = [
+                slot for slot in candidates
+                if (low is None or float(self._rows[slot][other]) >= low)
+                and (high is None or float(self._rows[slot][other]) <= high)
+            ]
+        return _bitmap(candidates, len(self._rows))
+
+    def _tags_mask(
+        self,
+        tags: Optional[Iterable[str]] = None,
+        any_tags: Optional[Iterable[str]] = None,
+    ) -> int:
+        """Intersect the bitmaps of `tags` (all-of) with the union of `any_tags` (any-of)"""
+        mask = -1
+        for tag in tags or []:
+            mask &= self._tag_bits.get(tag, 0)
+        if any_tags:
+            union = 0
+            for tag in any_tags:
+                union |= self._tag_bits.get(tag, 0)
+            mask &= union
+        return mask
+
+    def _filter_mask(
+        self,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        search: Optional[str] = None,
+        ranges: Optional[Dict[str, Range]] = None,
+        tags: Optional[Iterable[str]] = None,
+        any_tags: Optional[Iterable[str]] = None,
+    ) -> int:
+        mask = self._live
+        if category:
+            mask &= self._category_bits.get(category, 0)
+        if brand:
+            mask &= self._brand_mask(brand)
+        if tags or any_tags:
+            mask &= self._tags_mask(tags, any_tags)
+        if search:
+            mask &= self._search_mask(search)
+        if ranges:
+            mask &= self._range_mask(ranges)
+        return mask
+
+    def _ordered_slots(
+        self,
+        mask: int,
+        size: int,
+        order: Sequence[int],
+        key: Callable[[int], Any],
+        descending: bool,
+        stop: Optional[int],
+    ) -> Iterator[int]:
+        """
+        The slots of `mask` in the order of `order` (every live slot, sorted).
+        Walks `order` until `stop` matches are found, unless sorting just the
+        matches by `key` visits fewer slots.
+        """
+        matched = mask.bit_count()
+        if not matched:
+            return iter(())
+        walk = len(order) if stop is None else min(len(order), stop * len(order) // matched + 1)
+        if matched < walk:
+            slots = sorted(_iter_slots(mask, size), key=key)
+            return reversed(slots) if descending else iter(slots)
+        buf = _slot_bytes(mask, size)
+        ordered = reversed(order) if descending else iter(order)
+        return (slot for slot in ordered if _has_slot(buf, slot))
+
+    def query(
+        self,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        search: Optional[str] = None,
+        ranges: Optional[Dict[str, Range]] = None,
+        tags: Optional[Iterable[str]] = None,
+        any_tags: Optional[Iterable[str]] = None,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return one page of shoe rows matching the filter.
+        Rows come in catalog order (brand, name) unless sorted by a spec field.
+        """
+        with self._lock:
+            size = len(self._rows)
+            mask = self._filter_mask(category, brand, search, ranges, tags, any_tags)
+
+            stop = offset + limit if limit is not None else None
+            if sort_by:
+                slots = self._ordered_slots(
+                    mask, size, self._specs[sort_by].slots,
+                    lambda slot: float(self._rows[slot][sort_by]), descending, stop,
+                )
+            elif self._order is not None:
+                slots = self._ordered_slots(
+                    mask, size, self._order.slots,
+                    lambda slot: _catalog_key(self._rows[slot]), False, stop,
+                )
+            else:
+                slots = _iter_slots(mask, size)
+
+            page = []
+            for position, slot in enumerate(slots):
+                if position < offset:
+                    continue
+                if limit is not None and len(page) >= limit:
+                    break
+                page.append(self._rows[slot])
+            return page
+
+    def facets(
+        self,
+        category: Optional[str] = None,
+        brand: Optional[str] = None,
+        search: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        any_tags: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Count shoes per category, brand and tag under the given filter.
+        Category and brand counts ignore their own filter so the UI can show
+        the alternatives; tag counts apply every filter.
+        """
+        with self._lock:
+            if not (category or brand or search or tags or any_tags):
+                return {
+                    "total": self._live.bit_count(),
+                    "categories": _sorted_counts(self._category_counts),
+                    "brands": _sorted_counts(self._brand_counts),
+                    "tags": _sorted_counts(self._tag_counts),
+                }
+
+            base = self._live
+            if tags or any_tags:
+                base &= self._tags_mask(tags, any_tags)
+            if search:
+                base &= self._search_mask(search)
+            category_mask = self._category_bits.get(category, 0) if category else -1
+            brand_mask = self._brand_mask(brand) if brand else -1
+            matched = base & category_mask & brand_mask
+
+            return {
+                "total": matched.bit_count(),
+                "categories": _sorted_counts({
+                    key: (bits & base & brand_mask).bit_count()
+                    for key, bits in self._category_bits.items()
+                }),
+                "brands": _sorted_counts({
+                    key: (bits & base & category_mask).bit_count()
+                    for key, bits in self._brand_bits.items()
+                }),
+                "tags": _sorted_counts({
+                    key: (bits & matched).bit_count()
+                    for key, bits in self._tag_bits.items()
+                }),
+            }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "shoes": len(self._slots),
+            "generation": self.generation,
+            "reloads": self.reloads,
+            "snapshot_loads": self.snapshot_loads,
+            "mapped": int(self._snapshot is not None),
+            "row_cache_entries": self._rows.cached if isinstance(self._rows, MappedRows) else 0,
+            "search_cache_entries": len(self._search_cache),
+            "search_hits": self.search_hits,
+            "search_misses": self.search_misses,
+            "search_evictions": self.search_evictions,
+        }
+
+
+# Process-wide catalog snapshot, loaded on first use
+catalog = ShoeCatalog()
+
+
+def _search_cache_stats() -> Dict[str, int]:
+    stats = catalog.stats()
+    return {
+        "hits": stats["search_hits"],
+        "misses": stats["search_misses"],
+        "evictions": stats["search_evictions"],
+        "entries": stats["search_cache_entries"],
+    }
+
+
+register_cache("catalog_search", _search_cache_stats)
+CallbackMetric(
+    "catalog_shoes", "Shoes in the in-process catalog snapshot", "gauge", (),
+    lambda: {(): catalog.stats()["shoes"]},
+)
+CallbackMetric(
+    "catalog_reloads_total", "Full catalog reloads from Supabase", "counter", (),
+    lambda: {(): catalog.reloads},
+)
@@ -0,0 +1,252 @@
+"""
+One catalog, shared by every uvicorn worker on the host.
+
+Each worker process used to download the catalog and hold its own copy of
+the rows and indexes, so memory grew with the worker count. Instead a single
+builder publishes the catalog as a snapshot file (app/core/snapshot.py) and
+every worker, the builder included, serves from a read-only mapping of it:
+the page cache holds one copy, and each worker keeps only its bitmaps and a
+bounded cache of decoded rows.
+
+    builder     the worker holding an exclusive lock on `<path>.lock`. It
+                checks the catalog version every CATALOG_REFRESH_SECONDS and,
+                when the table changed, reloads it, rebuilds the similar-shoe
+                lists, writes the snapshot and bumps the generation counter
+                in `<path>.generation`. If it exits, the lock is released and
+                another worker takes over on its next poll.
+    followers   every other worker. They read the counter every
+                CATALOG_SYNC_SECONDS and remap the snapshot when it changes.
+
+Both files are replaced atomically, and the snapshot before the counter, so a
+follower that sees a new generation always finds the matching file. A worker
+that applies a write keeps a private copy of the catalog until the next publish.
+Without `fcntl` (e.g. on Windows) every worker acts as its own builder.
+"""
+
+import asyncio
+import os
+import struct
+import time
+from typing import Any, Dict, Optional
+
+from app.core.catalog import ShoeCatalog, catalog
+from app.core.config import settings
+from app.core.metrics import CallbackMetric
+from app.core.similarity import SimilarityIndex, similarity_index
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+COUNTER = struct.Struct("<Q")
+# How long a follower waits at start-up for the builder's first publish
+FOLLOWER_WAIT_SECONDS = 30.0
+
+
+def flock_available() -> bool:
+    """Builder election needs `fcntl.flock`"""
+    return fcntl is not None
+
+
+class CatalogSync:
+    """Elects the builder worker and keeps this worker's catalog on the latest published snapshot"""
+
+    def __init__(self, source: ShoeCatalog, similarity: SimilarityIndex, path: str) -> None:
+        self.catalog = source
+        self.similarity = similarity
+        self.path = path
+        self.is_builder = False
+        self.seen_generation: Optional[int] = None
+        self.publishes = 0
+        self.remaps = 0
+        self.last_publish_ms: Optional[float] = None
+        self._validated_at = 0.0  # monotonic
+        self._lock_fd: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    # ============ Builder election and the generation counter ============
+
+    def try_lead(self) -> bool:
+        """Become the builder if no other worker holds the lock"""
+        if self.is_builder:
+            return True
+        if not flock_available():
+            self.is_builder = True
+            return True
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        self.is_builder = True
+        return True
+
+    def _release(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # closing the descriptor drops the flock
+            self._lock_fd = None
+        self.is_builder = False
+
+    def published_generation(self) -> int:
+        """The counter the builder bumps after each publish (0 before the first)"""
+        try:
+            with open(f"{self.path}.generation", "rb") as f:
+                data = f.read(COUNTER.size)
+        except FileNotFoundError:
+            return 0
+        return COUNTER.unpack(data)[0] if len(data) == COUNTER.size else 0
+
+    def _write_generation(self, generation: int) -> None:
+        path = f"{self.path}.generation"
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(COUNTER.pack(generation))
+        os.replace(tmp_path, path)
+
+    # ============ Following ============
+
+    def remap(self) -> bool:
+        """Serve from the snapshot file as currently published"""
+        if not self.catalog.open_snapshot(self.path):
+            return False
+        self.seen_generation = self.catalog.snapshot_generation
+        self.remaps += 1
+        return True
+
+    def follow(self) -> bool:
+        """Remap if the builder published since we last looked; True if we did"""
+        generation = self.published_generation()
+        if generation == 0 or generation == self.seen_generation:
+            return False
+        return self.remap()
+
+    # ============ Building ============
+
+    def publish(self) -> int:
+        """Write the catalog and similar-shoe lists under a new generation, then serve from the file"""
+        started = time.perf_counter()
+        generation = max(self.published_generation(), self.seen_generation or 0) + 1
+        size = self.catalog.save_snapshot(self.path, self.similarity.export(), generation)
+        self._write_generation(generation)
+        # Swap this worker's private copy for the mapping the followers share
+        self.remap()
+        self.publishes += 1
+        self.last_publish_ms = round((time.perf_counter() - started) * 1000, 2)
+        return size
+
+    def needs_publish(self) -> bool:
+        """True if this worker holds a catalog that isn't the published snapshot"""
+        return self.catalog.is_loaded and not self.catalog.serves_snapshot
+
+    def validate(self) -> bool:
+        """Check the catalog version now; True if it was reloaded"""
+        reloaded = self.catalog.validate()
+        self._validated_at = time.monotonic()
+        return reloaded
+
+    def refresh(self) -> None:
+        """Builder tick: revalidate, and republish if anything changed"""
+        self.validate()
+        if self.needs_publish():
+            self.similarity.build()
+            self.publish()
+
+    # ============ Lifecycle ============
+
+    async def load(self) -> None:
+        """
+        Start-up load for the warm-up: the builder (or a worker without sync)
+        validates against the database, a follower waits for the builder's
+        publish and only loads a private copy if none arrives in time.
+        """
+        if not self.enabled or self.is_builder:
+            await asyncio.to_thread(self.validate)
+            return
+        deadline = time.monotonic() + FOLLOWER_WAIT_SECONDS
+        while not self.catalog.is_loaded and time.monotonic() < deadline:
+            await asyncio.sleep(settings.CATALOG_SYNC_SECONDS)
+            await self.poll()
+        if not self.catalog.is_loaded:
+            await asyncio.to_thread(self.catalog.ensure_fresh)
+
+    async def publish_if_needed(self) -> None:
+        """Warm-up's last phase: the builder publishes what it loaded and built"""
+        if self.enabled and self.is_builder and self.needs_publish():
+            await asyncio.to_thread(self.publish)
+
+    async def poll(self) -> None:
+        """One sync tick: take over as builder if the lock is free, then refresh or follow"""
+        try:
+            if not self.is_builder:
+                self.try_lead()
+            if not self.is_builder:
+                await asyncio.to_thread(self.follow)
+            elif (
+                self.catalog.is_loaded
+                and time.monotonic() - self._validated_at > settings.CATALOG_REFRESH_SECONDS
+            ):
+                await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            print(f"⚠️  Warning: catalog sync failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CATALOG_SYNC_SECONDS)
+            await self.poll()
+
+    def start(self) -> None:
+        """Elect the builder, map the current snapshot and start polling"""
+        if not self.enabled or self._task is not None:
+            return
+        self.catalog.managed = True
+        self.try_lead()
+        if self.catalog.open_snapshot(self.path):
+            self.seen_generation = self.catalog.snapshot_generation
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="catalog-sync")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._release()
+        self.catalog.managed = False
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "role": "builder" if self.is_builder else "follower",
+            "generation": self.seen_generation,
+            "mapped": self.catalog.serves_snapshot,
+            "publishes": self.publishes,
+            "remaps": self.remaps,
+            "last_publish_ms": self.last_publish_ms,
+        }
+
+
+catalog_sync = CatalogSync(catalog, similarity_index, settings.CATALOG_SNAPSHOT_PATH)
+
+CallbackMetric(
+    "catalog_snapshot_generation", "Generation of the published catalog snapshot this worker serves", "gauge", (),
+    lambda: {(): catalog_sync.seen_generation or 0},
+)
+CallbackMetric(
+    "catalog_sync_builder", "1 if this worker builds and publishes the shared catalog", "gauge", (),
+    lambda: {(): int(catalog_sync.is_builder)},
+)
+CallbackMetric(
+    "catalog_snapshot_publishes_total", "Catalog snapshots published by this worker", "counter", (),
+    lambda: {(): catalog_sync.publishes},
+)
@@ -29,6 +29,32 @@ class Settings(BaseSettings):
     # External APIs
     RAPIDAPI_KEY: str = ""  # RapidAPI key for shoe image fetching
     
+    # Image mirror
+    IMAGE_MIRROR_DIR: str = "media"  # Where mirrored images and thumbnails are stored
+    IMAGE_MIRROR_BASE_URL: str = "/media"  # Public URL prefix for mirrored images
+    
+    # Image proxy cache
+    IMAGE_CACHE_DIR: str = ".cache/images"
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    IMAGE_CACHE_MAX_AGE_SECONDS: int = 30 * 24 * 3600  # Cache-Control max-age for proxied images
+    
+    # Catalog snapshot
+    CATALOG_REFRESH_SECONDS: int = 300  # Check the catalog version after this many seconds
+    CATALOG_SNAPSHOT_PATH: str = ".cache/catalog.snapshot"  # Shared by every worker; empty disables
+    CATALOG_SYNC_SECONDS: float = 1.0  # How often workers check for a newly published snapshot
+    CATALOG_ROW_CACHE_SIZE: int = 8192  # Decoded rows each worker keeps from the mapped snapshot
+    
+    # Health probe
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 15.0  # How often the background probe queries Supabase
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5.0
+    HEALTH_STALE_SECONDS: float = 60.0  # Not ready once the last probe is older than this
+    
+    # Request profiler (disabled unless a token is set, see app/core/profiler.py)
+    PROFILER_TOKEN: str = ""  # Required in X-Profile / X-Profiler-Token headers
+    PROFILER_DIR: str = ".cache/profiles"
+    PROFILER_INTERVAL_MS: float = 5.0  # Sampling interval
+    PROFILER_MAX_FILES: int = 50  # Oldest profiles are deleted beyond this
+    
     @field_validator('CORS_ORIGINS', mode='before')
     @classmethod
     def parse_cors_origins(cls, v: Union[str, List[str]]) -> List[str]:
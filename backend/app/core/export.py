@@ -0,0 +1,84 @@
+"""
+Streaming encoders for catalog exports.
+
+Both encoders consume an iterator of row pages and yield bytes per page, so an
+export holds at most one page in memory no matter how large the catalog is.
+"""
+
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def ndjson_stream(pages: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Encode each page as newline-delimited JSON"""
+    for page in pages:
+        if page:
+            yield "".join(
+                json.dumps(row, separators=(",", ":")) + "\n" for row in page
+            ).encode("utf-8")
+
+
+def arrow_available() -> bool:
+    """Arrow export needs the optional `pyarrow` dependency"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _arrow_value(field: str, value: Any) -> Any:
+    """Adapt JSON values to what pyarrow expects for the column type"""
+    if field.endswith("_at") and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, dict):
+        return list(value.items())
+    return value
+
+
+def arrow_stream(pages: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """Encode each page as one record batch of an Arrow IPC stream"""
+    import pyarrow as pa
+
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("brand", pa.string()),
+        ("name", pa.string()),
+        ("category", pa.string()),
+        ("tags", pa.list_(pa.string())),
+        ("weight", pa.float64()),
+        ("drop", pa.float64()),
+        ("stack_height_heel", pa.float64()),
+        ("stack_height_forefoot", pa.float64()),
+        ("image_url", pa.string()),
+        ("image_variants", pa.map_(pa.string(), pa.string())),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("updated_at", pa.timestamp("us", tz="UTC")),
+    ])
+
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    yield drain()  # schema message
+    for page in pages:
+        if not page:
+            continue
+        columns = {
+            field.name: [_arrow_value(field.name, row.get(field.name)) for row in page]
+            for field in schema
+        }
+        writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+        yield drain()
+    writer.close()
+    yield drain()
@@ -0,0 +1,156 @@
+"""
+Background database health probe.
+
+Health endpoints are polled constantly by orchestrators and uptime monitors,
+so they must not touch the database themselves. `HealthMonitor` probes
+Supabase on an interval with a cheap query (one id plus the planner's row
+estimate) on its own thread, and the endpoints serve the cached result with
+its age and the last error. A probe that hangs is abandoned after a timeout;
+later probes report it until it returns instead of piling up behind it.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import CallbackMetric
+from app.core.supabase import get_supabase_server
+
+
+def probe_database() -> Optional[int]:
+    """One cheap round trip; returns the estimated shoe count"""
+    supabase_admin = get_supabase_server()
+    if supabase_admin is None:
+        raise RuntimeError("Supabase credentials not configured")
+    response = supabase_admin.table("shoes").select("id", count="estimated").limit(1).execute()
+    return response.count
+
+
+class HealthMonitor:
+    """Keeps the latest database probe result for the health endpoints"""
+
+    def __init__(self, interval: float, timeout: float, stale_after: float) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.started_at = time.monotonic()
+        self.database = "unknown"
+        self.shoe_count: Optional[int] = None
+        self.latency_ms: Optional[float] = None
+        self.last_checked: Optional[float] = None  # monotonic
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+        self.consecutive_failures = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future] = None
+        self._pending_started = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    # ============ Probing ============
+
+    async def check(self) -> None:
+        """Run one probe (or join the one in flight) and record the outcome"""
+        try:
+            if self._pending is None or self._pending.done():
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-probe")
+                self._pending = self._executor.submit(probe_database)
+                self._pending_started = time.perf_counter()
+            remaining = self.timeout - (time.perf_counter() - self._pending_started)
+            if remaining <= 0:
+                self._record_failure(f"previous probe still running after {self.timeout:g}s")
+                return
+            count = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self._pending)), remaining)
+        except asyncio.TimeoutError:
+            self._record_failure(f"probe timed out after {self.timeout:g}s")
+        except Exception as e:
+            self._record_failure(str(e))
+        else:
+            self.database = "connected"
+            self.shoe_count = count
+            self.latency_ms = round((time.perf_counter() - self._pending_started) * 1000, 2)
+            self.last_success = datetime.now(timezone.utc)
+            self.consecutive_failures = 0
+        finally:
+            self.last_checked = time.monotonic()
+
+    def _record_failure(self, error: str) -> None:
+        self.database = "error"
+        self.last_error = error
+        self.last_error_at = datetime.now(timezone.utc)
+        self.consecutive_failures += 1
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="health-probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._pending = None
+
+    # ============ Reporting ============
+
+    @property
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last probe attempt"""
+        return None if self.last_checked is None else time.monotonic() - self.last_checked
+
+    @property
+    def is_stale(self) -> bool:
+        return self.age is None or self.age > self.stale_after
+
+    @property
+    def is_ready(self) -> bool:
+        return self.database == "connected" and not self.is_stale
+
+    def report(self) -> Dict[str, Any]:
+        age = self.age
+        return {
+            "database": self.database,
+            "shoe_count": self.shoe_count,
+            "latency_ms": self.latency_ms,
+            "checked_seconds_ago": None if age is None else round(age, 1),
+            "stale": self.is_stale,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+health_monitor = HealthMonitor(
+    settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    settings.HEALTH_STALE_SECONDS,
+)
+
+CallbackMetric(
+    "database_up", "1 if the last database probe succeeded and is fresh", "gauge", (),
+    lambda: {(): 1 if health_monitor.is_ready else 0},
+)
+CallbackMetric(
+    "database_probe_age_seconds", "Seconds since the last database probe attempt", "gauge", (),
+    lambda: {} if health_monitor.age is None else {(): health_monitor.age},
+)
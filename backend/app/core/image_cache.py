@@ -0,0 +1,361 @@
+"""
+Size-bounded on-disk LRU cache for proxied shoe images.
+
+Entries are plain files named by the hash of their source URL, so they can be
+served with `FileResponse` (sendfile) straight from disk. Recency is tracked in
+an in-memory OrderedDict and mirrored onto file mtimes, so the LRU order
+survives restarts. Concurrent misses for the same URL share one upstream fetch.
+
+Image URLs come from catalog rows that signed-in users can write, so a fetch
+only goes to http(s) hosts that resolve to public addresses, and connects to
+the address that was checked (a second lookup could be rebound to an internal
+one). Redirects are followed by hand with the same check on every hop, bodies
+are streamed and cut off past MAX_IMAGE_BYTES, and only `image/*` responses
+are cached.
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import mimetypes
+import os
+import socket
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.core.config import settings
+from app.core.metrics import register_cache
+
+if TYPE_CHECKING:
+    import httpx
+
+FETCH_TIMEOUT_SECONDS = 10.0
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+MAX_REDIRECTS = 3
+DEFAULT_EXTENSION = ".jpg"
+ALLOWED_SCHEMES = ("http", "https")
+
+
+class ImageFetchError(Exception):
+    """The upstream image could not be fetched"""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%")[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def _resolve(host: str, port: int) -> List[str]:
+    addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [address[4][0] for address in addresses]
+
+
+async def check_public_url(url: str) -> str:
+    """
+    Refuse URLs the proxy must not fetch: anything but http(s), and hosts
+    that resolve to loopback, private, link-local or otherwise non-public
+    addresses (internal services, cloud metadata endpoints). Returns the
+    checked address to connect to (see `pinned_request`).
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ALLOWED_SCHEMES or not parts.hostname:
+        raise ImageFetchError("Image URL must be an http(s) URL")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = await _resolve(parts.hostname, port)
+    except (OSError, ValueError) as e:
+        raise ImageFetchError(f"Image host does not resolve: {str(e)}") from e
+    if not addresses or not all(_is_public(address) for address in addresses):
+        raise ImageFetchError("Image host is not a public address")
+    return addresses[0]
+
+
+def pinned_request(url: str, address: str) -> Dict[str, Any]:
+    """
+    Keyword arguments for an httpx request to `url` that connects to
+    `address` rather than resolving the host again. The Host header keeps
+    virtual hosting working, and for https the TLS server name (SNI and
+    certificate check) stays the original host.
+    """
+    parts = urlsplit(url)
+    host = f"[{address.split('%')[0]}]" if ":" in address else address
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    request: Dict[str, Any] = {
+        "url": parts._replace(netloc=netloc).geturl(),
+        "headers": {"Host": parts.netloc.rpartition("@")[2]},
+    }
+    if parts.scheme == "https":
+        request["extensions"] = {"sni_hostname": parts.hostname}
+    return request
+
+
+def cache_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def _extension(content_type: Optional[str]) -> str:
+    if content_type:
+        extension = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if extension:
+            return ".jpg" if extension == ".jpe" else extension
+    return DEFAULT_EXTENSION
+
+
+class DiskLRUCache:
+    """Files under `directory`, evicted least-recently-used first past `max_bytes`"""
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._pins: Counter = Counter()  # Entries being served, never evicted
+        self._scan()
+
+    def _scan(self) -> None:
+        """Rebuild the index from disk, oldest mtime first"""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".tmp"):
+                os.unlink(entry.path)
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.name, entry.path, stat.st_size))
+        for _, name, path, size in sorted(files):
+            self._entries[os.path.splitext(name)[0]] = (path, size)
+            self.total_bytes += size
+        self._evict()
+
+    def get(self, key: str, pin: bool = False) -> Optional[str]:
+        """
+        Path of a cached entry (marking it recently used), or None. With
+        `pin`, the entry is kept from eviction until `unpin(key)`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        path = entry[0]
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._drop(key)
+            return None
+        return self.pin(key) if pin else path
+
+    def pin(self, key: str) -> Optional[str]:
+        """Keep an entry from eviction until `unpin(key)`; returns its path, or None if it's gone"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._pins[key] += 1
+            return entry[0]
+
+    def unpin(self, key: str) -> None:
+        """Release a `get(key, pin=True)` and evict whatever it held back"""
+        with self._lock:
+            self._pins[key] -= 1
+            if self._pins[key] <= 0:
+                del self._pins[key]
+            self._evict()
+
+    def put(self, key: str, data: bytes, extension: str = DEFAULT_EXTENSION) -> str:
+        """Store an entry atomically and evict as needed; returns its path"""
+        path = os.path.join(self.directory, f"{key}{extension}")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+                if previous[0] != path:
+                    _unlink(previous[0])
+            self._entries[key] = (path, len(data))
+            self.total_bytes += len(data)
+            self._evict(keep=key)
+        return path
+
+    def _drop(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry[1]
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, (path, size) in list(self._entries.items()):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key == keep or key in self._pins:
+                continue
+            del self._entries[key]
+            self.total_bytes -= size
+            self.evictions += 1
+            _unlink(path)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class ImageProxy:
+    """Fetches upstream images into a DiskLRUCache, one fetch per URL at a time"""
+
+    def __init__(self, cache: DiskLRUCache, transport: Optional["httpx.AsyncBaseTransport"] = None) -> None:
+        self.cache = cache
+        self._transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._inflight: Dict[str, "asyncio.Task[str]"] = {}
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx  # Deferred: only the image proxy needs it
+
+            # Redirects are followed in _download so every hop is checked. No
+            # keep-alive: connections are pooled by address, and one opened
+            # for a host must not carry a request for another host on that IP.
+            self._client = httpx.AsyncClient(
+                timeout=FETCH_TIMEOUT_SECONDS,
+                follow_redirects=False,
+                limits=httpx.Limits(max_keepalive_connections=0),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch(self, url: str) -> str:
+        """
+        Return the cached file for `url`, downloading it on a miss. The entry
+        stays pinned against eviction until `release(url)`.
+        """
+        key = cache_key(url)
+        path = self.cache.get(key, pin=True)
+        if path is not None:
+            return path
+
+        for _ in range(2):
+            # Concurrent misses share one download. It runs as its own task so a
+            # client disconnecting doesn't cancel it for everyone else waiting.
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._download(key, url))
+                self._inflight[key] = task
+                task.add_done_callback(lambda done: self._finished(key, done))
+            await asyncio.shield(task)
+            path = self.cache.pin(key)
+            if path is not None:
+                return path
+        raise ImageFetchError("Image was evicted from the cache before it could be served")
+
+    def release(self, url: str) -> None:
+        """Unpin the entry a `fetch(url)` returned, once it has been served"""
+        self.cache.unpin(cache_key(url))
+
+    def _finished(self, key: str, task: "asyncio.Task[str]") -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark retrieved so a failure nobody awaited isn't logged as a warning
+            task.exception()
+
+    async def _download(self, key: str, url: str) -> str:
+        import httpx
+
+        location = url
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await check_public_url(location)
+            try:
+                async with self._get_client().stream("GET", **pinned_request(location, address)) as response:
+                    if response.is_redirect:
+                        if "Location" not in response.headers:
+                            raise ImageFetchError("Image host redirected without a Location")
+                        location = urljoin(location, response.headers["Location"])
+                        continue
+                    content_type = _check_response(response)
+                    body = await read_capped(response)
+            except httpx.HTTPError as e:
+                raise ImageFetchError(f"Image host unreachable: {str(e)}") from e
+            return await asyncio.to_thread(self.cache.put, key, body, _extension(content_type))
+        raise ImageFetchError("Image host redirected too many times")
+
+
+def _check_response(response: "httpx.Response") -> str:
+    """Refuse a final response on its status and type; returns its Content-Type"""
+    if response.status_code != 200:
+        raise ImageFetchError(f"Image host returned {response.status_code}")
+    content_type = response.headers.get("Content-Type", "")
+    if not content_type.startswith("image/"):
+        raise ImageFetchError(f"Upstream is not an image ({content_type or 'no Content-Type'})")
+    return content_type
+
+
+async def read_capped(response: "httpx.Response", limit: int = MAX_IMAGE_BYTES) -> bytes:
+    """
+    A streamed body, refused unread if its Content-Length is over `limit`,
+    and otherwise as soon as it passes `limit` (the header can lie or be missing).
+    """
+    try:
+        length = int(response.headers.get("Content-Length", 0))
+    except ValueError:
+        length = 0
+    if length > limit:
+        raise ImageFetchError("Image is too large")
+    body = bytearray()
+    async for chunk in response.aiter_bytes():
+        body += chunk
+        if len(body) > limit:
+            raise ImageFetchError("Image is too large")
+    return bytes(body)
+
+
+@lru_cache()
+def get_image_proxy() -> ImageProxy:
+    """Shared proxy, built on first use so importing doesn't touch the disk"""
+    return ImageProxy(DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES))
+
+
+def _image_cache_stats() -> Dict[str, int]:
+    # Don't build the proxy (and scan the cache directory) just for a scrape
+    if get_image_proxy.cache_info().currsize == 0:
+        return {}
+    return get_image_proxy().cache.stats()
+
+
+register_cache("images", _image_cache_stats)
+
@@ -0,0 +1,328 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms write to per-thread shards, so recording on
+the hot path never takes a lock; the only lock guards registering a new
+thread's shard and merging them on scrape. Shards of threads that have exited
+(thread-pool workers are replaced after idling) are folded into one retired
+shard, so their count stays bounded by the live threads. Values that already live
+elsewhere (cache counters, thread-pool state) are read at scrape time by
+callback metrics instead of being mirrored on every change.
+"""
+
+import bisect
+import math
+import threading
+from typing import Any, Callable, Dict, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+Labels = Tuple[str, ...]
+S = TypeVar("S")
+Sample = Tuple[str, Dict[str, str], float]  # (name suffix, labels, value)
+
+# Seconds, Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """Metrics rendered together at /metrics"""
+
+    def __init__(self) -> None:
+        self._metrics: List["Metric"] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Prometheus text exposition format, version 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class: a named family of samples, split by label values"""
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        if registry is not None:
+            registry.register(self)
+
+    def _labels(self, values: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values, strict=True))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+
+class _Shards(Generic[S]):
+    """
+    One shard per recording thread. `fold(target, shard)` adds a shard into
+    another; it is used to retire the shards of exited threads.
+    """
+
+    def __init__(self, new: Callable[[], S], fold: Callable[[S, S], None]) -> None:
+        self._new = new
+        self._fold = fold
+        self._local = threading.local()
+        self._live: List[Tuple[threading.Thread, S]] = []
+        self._retired = new()
+        self._lock = threading.Lock()  # Only taken when a thread first records, and on scrape
+
+    def get(self) -> S:
+        """This thread's shard"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new()
+            with self._lock:
+                self._retire_exited()
+                self._live.append((threading.current_thread(), shard))
+            self._local.shard = shard
+        return shard
+
+    def _retire_exited(self) -> None:
+        live = []
+        for thread, shard in self._live:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                # The thread is gone, so nothing writes to its shard any more
+                self._fold(self._retired, shard)
+        self._live = live
+
+    def merge(self, fold: Callable[[Any], None]) -> None:
+        """Call `fold` on every shard; under the lock, so none is retired (and counted twice) meanwhile"""
+        with self._lock:
+            self._retire_exited()
+            fold(self._retired)
+            for _, shard in self._live:
+                fold(shard)
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+
+def _fold_values(target: Dict[Labels, float], shard: Dict[Labels, float]) -> None:
+    for labels, value in dict(shard).items():
+        target[labels] = target.get(labels, 0.0) + value
+
+
+class _Sharded(Metric):
+    """Per-thread label -> value shards, merged on collect"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._shards: _Shards[Dict[Labels, float]] = _Shards(dict, _fold_values)
+
+    def _add(self, amount: float, labels: Labels) -> None:
+        shard = self._shards.get()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def collect(self) -> Dict[Labels, float]:
+        merged: Dict[Labels, float] = {}
+        self._shards.merge(lambda shard: _fold_values(merged, shard))
+        return merged
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in sorted(self.collect().items()):
+            yield "", self._labels(labels), value
+
+
+class Counter(_Sharded):
+    """Monotonically increasing count; by convention the name ends in _total"""
+
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(amount, labels)
+
+
+class Gauge(_Sharded):
+    """Value that goes up and down (kept as per-thread deltas)"""
+
+    type = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(amount, labels)
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(-amount, labels)
+
+
+class CallbackMetric(Metric):
+    """Samples read from `callback` at scrape time: {label values: value}"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_type: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], Dict[Labels, float]],
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        self.type = metric_type
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self) -> Iterator[Sample]:
+        try:
+            values = self.callback()
+        except Exception:
+            # A broken source must not take the whole scrape down
+            return
+        for labels, value in sorted(values.items()):
+            yield "", self._labels(labels), value
+
+
+class _Series:
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values, optionally split by labels"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._shards: _Shards[Dict[Labels, _Series]] = _Shards(dict, self._fold)
+
+    def _fold(self, target: Dict[Labels, _Series], shard: Dict[Labels, _Series]) -> None:
+        for labels, series in dict(shard).items():
+            merged = target.get(labels)
+            if merged is None:
+                merged = target[labels] = _Series(len(self.buckets) + 1)
+            for i, count in enumerate(series.counts):
+                merged.counts[i] += count
+            merged.total += series.total
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shards.get()
+        series = shard.get(labels)
+        if series is None:
+            # One slot per bucket plus +Inf
+            series = shard[labels] = _Series(len(self.buckets) + 1)
+        series.counts[bisect.bisect_left(self.buckets, value)] += 1
+        series.total += value
+
+    def collect(self) -> Dict[Labels, Tuple[List[int], float, int]]:
+        """Labels -> (cumulative bucket counts ending with +Inf, sum, count)"""
+        merged: Dict[Labels, _Series] = {}
+        self._shards.merge(lambda shard: self._fold(merged, shard))
+
+        result = {}
+        for labels, series in merged.items():
+            cumulative, running = [], 0
+            for count in series.counts:
+                running += count
+                cumulative.append(running)
+            result[labels] = (cumulative, series.total, running)
+        return result
+
+    def samples(self) -> Iterator[Sample]:
+        bounds: Iterable[float] = (*self.buckets, math.inf)
+        for labels, (cumulative, total, count) in sorted(self.collect().items()):
+            base = self._labels(labels)
+            for bound, running in zip(bounds, cumulative, strict=True):
+                yield "_bucket", {**base, "le": "+Inf" if math.isinf(bound) else repr(bound)}, running
+            yield "_sum", base, total
+            yield "_count", base, count
+
+
+# ============ Caches ============
+
+CacheStats = Callable[[], Dict[str, float]]
+_caches: Dict[str, CacheStats] = {}
+
+
+def register_cache(name: str, stats: CacheStats) -> None:
+    """
+    Export a cache's counters. `stats` returns any of hits, misses,
+    evictions, entries and bytes (an empty dict if the cache isn't built yet).
+    """
+    _caches[name] = stats
+
+
+def _cache_values(key: str) -> Callable[[], Dict[Labels, float]]:
+    def collect() -> Dict[Labels, float]:
+        values = {}
+        for name, stats in list(_caches.items()):
+            try:
+                value = stats().get(key)
+            except Exception:
+                continue
+            if value is not None:
+                values[(name,)] = value
+        return values
+    return collect
+
+
+for _key, _type, _doc in (
+    ("hits", "counter", "Cache lookups answered from the cache"),
+    ("misses", "counter", "Cache lookups that missed"),
+    ("evictions", "counter", "Entries evicted to stay within the size limit"),
+    ("entries", "gauge", "Entries currently cached"),
+    ("bytes", "gauge", "Bytes currently cached"),
+):
+    _suffix = "_total" if _type == "counter" else ""
+    CallbackMetric(f"cache_{_key}{_suffix}", _doc, _type, ("cache",), _cache_values(_key))
+
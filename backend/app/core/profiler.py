@@ -0,0 +1,231 @@
+"""
+On-demand sampling profiler for live requests.
+
+Profiling is off unless PROFILER_TOKEN is set; without it the middleware is
+never installed. With it, a request is profiled when it carries
+`X-Profile: <token>`, or while the profiler is armed through the admin
+endpoint for the next N requests (optionally only paths matching a glob).
+
+While at least one profiled request is in flight, a daemon thread samples
+the stack of the thread serving it every PROFILER_INTERVAL_MS via
+`sys._current_frames()`. Each profile is written to PROFILER_DIR in the
+collapsed-stack format read by flamegraph.pl and speedscope, keeping only the
+newest PROFILER_MAX_FILES files. Async endpoints all share the event-loop
+thread, so samples of a profiled request include whatever else the loop was
+running at the time.
+"""
+
+import fnmatch
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_EXTENSION = ".collapsed"
+MAX_STACK_DEPTH = 200
+
+
+class ProfileSession:
+    """Samples collected for one request"""
+
+    def __init__(self, thread_id: int, label: str) -> None:
+        self.thread_id = thread_id
+        self.label = label
+        self.started = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving profiled requests"""
+
+    def __init__(self, directory: str, interval: float, max_files: int) -> None:
+        self.directory = directory
+        self.interval = interval
+        self.max_files = max_files
+        self.remaining = 0
+        self.route_pattern: Optional[str] = None
+        self._sessions: Dict[int, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[CodeType, str] = {}
+
+    # ============ Arming ============
+
+    def arm(self, requests: int, route_pattern: Optional[str] = None) -> None:
+        """Profile the next `requests` requests whose path matches `route_pattern`"""
+        with self._lock:
+            self.remaining = requests
+            self.route_pattern = route_pattern
+
+    def disarm(self) -> None:
+        self.arm(0)
+
+    def claim(self, path: str) -> bool:
+        """Take one armed slot for a request to `path`"""
+        if self.remaining <= 0:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            if self.route_pattern and not fnmatch.fnmatchcase(path, self.route_pattern):
+                return False
+            self.remaining -= 1
+            return True
+
+    # ============ Sampling ============
+
+    def start(self, label: str) -> ProfileSession:
+        session = ProfileSession(threading.get_ident(), label)
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return session
+
+    def stop(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._sessions.pop(id(session), None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions.values())
+            frames = sys._current_frames()
+            for session in sessions:
+                frame = frames.get(session.thread_id)
+                if frame is not None:
+                    session.stacks[self._collapse(frame)] += 1
+                    session.samples += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _collapse(self, frame: Optional[FrameType]) -> str:
+        names: List[str] = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                filename = code.co_filename
+                label = f"{code.co_name} ({os.path.basename(filename)}:{code.co_firstlineno})"
+                self._labels[code] = label
+            names.append(label)
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    # ============ Output ============
+
+    def save(self, session: ProfileSession, status: int) -> Optional[str]:
+        """Write the session as collapsed stacks; returns the file name"""
+        if not session.stacks:
+            return None
+        elapsed_ms = (time.perf_counter() - session.started) * 1000
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", session.label).strip("-")[:80] or "root"
+        name = f"{timestamp}-{slug}-{status}-{elapsed_ms:.0f}ms{PROFILE_EXTENSION}"
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            for stack, count in session.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        self._rotate()
+        return name
+
+    def _rotate(self) -> None:
+        """Keep only the newest `max_files` profiles"""
+        profiles = self.list_profiles()
+        for name in profiles[self.max_files:]:
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def list_profiles(self) -> List[str]:
+        """Saved profile file names, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (name for name in os.listdir(self.directory) if name.endswith(PROFILE_EXTENSION)),
+            reverse=True,
+        )
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "remaining": self.remaining,
+            "route_pattern": self.route_pattern,
+            "active": len(self._sessions),
+            "interval_ms": self.interval * 1000,
+            "profiles": self.list_profiles(),
+        }
+
+
+profiler = SamplingProfiler(
+    settings.PROFILER_DIR,
+    settings.PROFILER_INTERVAL_MS / 1000,
+    settings.PROFILER_MAX_FILES,
+)
+
+
+def token_matches(token: Optional[str]) -> bool:
+    """Constant-time check of a caller-supplied profiler token"""
+    return bool(settings.PROFILER_TOKEN and token) and hmac.compare_digest(token.encode(), settings.PROFILER_TOKEN.encode())
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware: profiles requests that ask for it, or while armed"""
+
+    def __init__(self, app: ASGIApp, sampler: SamplingProfiler = profiler) -> None:
+        self.app = app
+        self.profiler = sampler
+
+    def _requested(self, scope: Scope) -> bool:
+        for key, value in scope["headers"]:
+            if key == PROFILE_HEADER:
+                return token_matches(value.decode("latin-1"))
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not (self._requested(scope) or self.profiler.claim(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        session = self.profiler.start(f"{scope['method']} {scope['path']}")
+        saved = False
+
+        def finish(status: int) -> Optional[str]:
+            nonlocal saved
+            saved = True
+            self.profiler.stop(session)
+            return self.profiler.save(session, status)
+
+        async def send_with_profile(message: Message) -> None:
+            if message["type"] == "http.response.start" and not saved:
+                # The profile covers the work up to the response headers
+                name = finish(message["status"])
+                if name:
+                    MutableHeaders(scope=message).append("X-Profile-Id", name)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not saved:
+                finish(500)
@@ -0,0 +1,141 @@
+"""
+Recommendation and similarity scoring kernels.
+
+These run once per candidate shoe for every recommendations request, so they
+live here, free of any request or database handling, where they can be timed
+in isolation (see benchmarks/bench_scoring.py).
+"""
+
+import heapq
+from typing import Iterable, List, Optional, Set, Tuple
+
+# (score, explanation, shoe) as returned by the rank_* functions
+Scored = Tuple[float, str, dict]
+
+MIN_RECOMMENDATION_SCORE = 0.1  # Only include shoes with meaningful scores
+MIN_SIMILARITY_SCORE = 0.2
+
+
+class TasteProfile:
+    """
+    A user's preferences and top-rated shoes, digested once so scoring each
+    candidate only does set lookups.
+
+    This is a simplified scoring algorithm. In production, you might use:
+    - Machine learning models
+    - Collaborative filtering
+    - More sophisticated tag matching
+    """
+
+    def __init__(self, user_preferences: dict, top_rated_shoes: List[dict]) -> None:
+        self.preferred_categories = set(user_preferences.get("preferred_categories") or [])
+        self.loved_tags: Set[str] = set()
+        self.loved_brands: Set[str] = set()
+        for rated_shoe in top_rated_shoes:
+            self.loved_tags.update(rated_shoe.get("tags", []))
+            self.loved_brands.add(rated_shoe.get("brand"))
+
+    def score(self, shoe: dict) -> Tuple[float, str]:
+        """Returns a tuple of (score, explanation)"""
+        score = 0.0
+        explanations = []
+
+        shoe_tags = set(shoe.get("tags", []))
+
+        # Category preference matching
+        if shoe.get("category") in self.preferred_categories:
+            score += 0.2
+            explanations.append(f"matches your preferred {shoe.get('category')} category")
+
+        # Tag overlap with top-rated shoes
+        if self.loved_tags:
+            matching_tags = shoe_tags & self.loved_tags
+            score += len(matching_tags) / len(self.loved_tags) * 0.5
+            if matching_tags:
+                explanations.append(f"shares {', '.join(list(matching_tags)[:3])} with your top-rated shoes")
+
+        # Brand affinity
+        if shoe.get("brand") in self.loved_brands:
+            score += 0.15
+            explanations.append(f"you've loved {shoe.get('brand')} shoes before")
+
+        # Weight preference (assuming lighter is generally preferred for performance)
+        weight = shoe.get("weight", 300)
+        if weight < 220:
+            score += 0.1
+            explanations.append("lightweight design")
+        elif weight < 250:
+            score += 0.05
+
+        # Normalize score to 0-1 range
+        score = min(score, 1.0)
+
+        if not explanations:
+            explanation = "A versatile option that could complement your rotation."
+        else:
+            explanation = "Recommended because " + ", and ".join(explanations[:2]) + "."
+
+        return round(score, 2), explanation
+
+
+def calculate_recommendation_score(
+    shoe: dict,
+    user_preferences: dict,
+    top_rated_shoes: List[dict]
+) -> Tuple[float, str]:
+    """
+    Calculate a recommendation score for a shoe based on user preferences.
+    Returns a tuple of (score, explanation).
+
+    Scoring many shoes for the same user? Build one TasteProfile instead.
+    """
+    return TasteProfile(user_preferences, top_rated_shoes).score(shoe)
+
+
+def rank_recommendations(
+    candidates: Iterable[dict],
+    user_preferences: dict,
+    top_rated_shoes: List[dict],
+    limit: int,
+) -> List[Scored]:
+    """The `limit` best-scoring candidates, highest first (ties keep candidate order)"""
+    profile = TasteProfile(user_preferences, top_rated_shoes)
+    scored = []
+    for shoe in candidates:
+        score, explanation = profile.score(shoe)
+        if score > MIN_RECOMMENDATION_SCORE:
+            scored.append((score, explanation, shoe))
+    return heapq.nlargest(limit, scored, key=lambda item: item[0])
+
+
+def similarity_score(reference_tags: Set[str], reference_category: Optional[str], shoe: dict) -> float:
+    """Jaccard similarity of the tag sets (weighted 0.7) plus 0.3 for a shared category"""
+    shoe_tags = set(shoe.get("tags", []))
+    if reference_tags:
+        tag_similarity = len(reference_tags & shoe_tags) / len(reference_tags | shoe_tags)
+    else:
+        tag_similarity = 0
+    category_bonus = 0.3 if shoe.get("category") == reference_category else 0
+    return min((tag_similarity * 0.7) + category_bonus, 1.0)
+
+
+def similarity_explanation(reference_tags: Set[str], reference_category: Optional[str], shoe: dict) -> str:
+    matching_tags = list(reference_tags & set(shoe.get("tags", [])))
+    if matching_tags:
+        return f"Similar {', '.join(matching_tags[:3])} characteristics"
+    return f"Similar {reference_category} shoe"
+
+
+def rank_similar(reference_shoe: dict, candidates: Iterable[dict], limit: int) -> List[Scored]:
+    """The `limit` candidates most similar to `reference_shoe`, most similar first"""
+    reference_tags = set(reference_shoe.get("tags", []))
+    reference_category = reference_shoe.get("category")
+    scored = []
+    for shoe in candidates:
+        score = similarity_score(reference_tags, reference_category, shoe)
+        if score > MIN_SIMILARITY_SCORE:
+            scored.append((round(score, 2), shoe))
+    return [
+        (score, similarity_explanation(reference_tags, reference_category, shoe), shoe)
+        for score, shoe in heapq.nlargest(limit, scored, key=lambda item: item[0])
+    ]
@@ -0,0 +1,105 @@
+"""
+"Similar shoes" neighbour lists over the catalog snapshot.
+
+Each shoe's best matches (by `rank_similar`) are kept per catalog generation,
+so /api/recommendations/similar doesn't rescore the whole catalog per request.
+Small catalogs are fully precomputed during start-up warm-up; larger ones
+fill a bounded LRU on demand. Any catalog change bumps its generation and
+drops the lists. Lists saved in the catalog's snapshot file are used as long
+as the catalog still serves that snapshot unchanged.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.catalog import ShoeCatalog, catalog
+from app.core.scoring import Scored, rank_similar
+
+SIMILAR_MAX = 10  # Largest `limit` the similar endpoint accepts
+PRECOMPUTE_MAX_SHOES = 1000  # Precomputing is quadratic in catalog size
+NEIGHBOUR_CACHE_SIZE = 4096
+
+# (score, explanation, shoe id)
+Neighbour = Tuple[float, str, str]
+
+
+class SimilarityIndex:
+    """Per-shoe neighbour lists, valid for one catalog generation"""
+
+    def __init__(self, source: ShoeCatalog, capacity: int = NEIGHBOUR_CACHE_SIZE) -> None:
+        self.catalog = source
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self._neighbours: "OrderedDict[str, List[Neighbour]]" = OrderedDict()
+
+    def _cached(self, shoe_id: str, generation: int) -> Optional[List[Neighbour]]:
+        with self._lock:
+            if self._generation != generation:
+                self._generation = generation
+                self._neighbours.clear()
+                return None
+            neighbours = self._neighbours.get(shoe_id)
+            if neighbours is not None:
+                self._neighbours.move_to_end(shoe_id)
+            return neighbours
+
+    def _store(self, shoe_id: str, generation: int, neighbours: List[Neighbour]) -> None:
+        with self._lock:
+            if self._generation != generation:
+                return  # The catalog changed while we were scoring
+            self._neighbours[shoe_id] = neighbours
+            if len(self._neighbours) > self.capacity:
+                self._neighbours.popitem(last=False)
+
+    def _compute(self, reference: dict, rows: List[dict]) -> List[Neighbour]:
+        shoe_id = reference["id"]
+        candidates = (row for row in rows if row["id"] != shoe_id)
+        return [
+            (score, explanation, shoe["id"])
+            for score, explanation, shoe in rank_similar(reference, candidates, SIMILAR_MAX)
+        ]
+
+    def similar(self, shoe_id: str, limit: int) -> Optional[List[Scored]]:
+        """The `limit` shoes most similar to `shoe_id`, or None if it isn't in the catalog"""
+        generation = self.catalog.generation
+        reference = self.catalog.get(shoe_id)
+        if reference is None:
+            return None
+        neighbours = self._cached(shoe_id, generation)
+        if neighbours is None:
+            neighbours = self.catalog.snapshot_neighbours(shoe_id, generation)
+            if neighbours is None:
+                neighbours = self._compute(reference, self.catalog.query())
+            self._store(shoe_id, generation, neighbours)
+
+        similar = []
+        for score, explanation, neighbour_id in neighbours[:limit]:
+            shoe = self.catalog.get(neighbour_id)
+            if shoe is not None:
+                similar.append((score, explanation, shoe))
+        return similar
+
+    def build(self, max_shoes: int = PRECOMPUTE_MAX_SHOES) -> int:
+        """Precompute every shoe's neighbours if the catalog is small enough; returns how many"""
+        generation = self.catalog.generation
+        if self.catalog.has_snapshot_neighbours():
+            return 0  # Read from the snapshot on demand instead
+        rows = self.catalog.query()
+        if len(rows) > max_shoes:
+            return 0
+        self._cached("", generation)  # Adopt the current generation
+        for row in rows:
+            self._store(row["id"], generation, self._compute(row, rows))
+        return len(rows)
+
+    def export(self) -> Dict[str, List[Neighbour]]:
+        """The neighbour lists held for the current catalog generation, for the snapshot file"""
+        with self._lock:
+            if self._generation != self.catalog.generation:
+                return {}
+            return dict(self._neighbours)
+
+
+similarity_index = SimilarityIndex(catalog)
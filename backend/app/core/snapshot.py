@@ -0,0 +1,438 @@
+"""
+Versioned on-disk snapshot of the catalog and its derived indexes.
+
+A fresh worker would otherwise download the whole catalog and rebuild every
+index before it could answer list, facet or similarity requests. Instead the
+catalog is published to CATALOG_SNAPSHOT_PATH and workers memory-map it: they
+serve from it straight away, and since the mapping is read-only the page
+cache holds one copy for every worker on the host (see app/core/catalog_sync.py
+for how one worker builds and the others follow).
+
+Layout (little-endian, every section 8-byte aligned):
+
+    header      magic, FORMAT_VERSION, manifest offset and length
+    sections    raw arrays and blobs, located through the manifest
+    manifest    JSON: catalog version, publish generation, slot count,
+                section offsets, facet bitmap offsets and explanation strings
+
+Sections:
+
+    ids             shoe ID by slot, fixed width, NUL-padded (all NUL for removed slots)
+    id_index        the live IDs sorted, fixed width, then their int32 slots
+    row_offsets     uint64 [slots + 1], row N is rows[row_offsets[N]:row_offsets[N + 1]]
+    rows            compact JSON per row, decoded only when a row is read
+    names           lowercased names, each followed by a newline, searched in place
+    name_offsets    uint64 [slots + 1] into names
+    bitmaps         live/category/brand/tag bitmaps as little-endian bytes
+    spec:<field>    float64 values then int32 slots, sorted by value
+    neighbours      per slot, the similar-shoe lists: uint32 offsets [slots + 1],
+                    then int32 neighbour slots, float64 scores and uint32
+                    explanation indexes
+
+Files are written to a temporary name and moved into place with os.replace,
+so readers only ever see a complete snapshot. A file with another magic or
+FORMAT_VERSION is rejected with SnapshotError and rebuilt from the database.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+MAGIC = b"TOCATLOG"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIIQQ")  # magic, format version, reserved, manifest offset, manifest length
+ALIGNMENT = 8
+
+# (score, explanation, shoe id), as kept by app.core.similarity
+Neighbour = Tuple[float, str, str]
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, truncated or in another format"""
+
+
+def _encode_row(row: Optional[Dict[str, Any]]) -> bytes:
+    if row is None:
+        return b""
+    return json.dumps(row, separators=(",", ":"), default=str).encode()
+
+
+def _search_name(row: Optional[Dict[str, Any]]) -> bytes:
+    if row is None:
+        return b""
+    return (row.get("name") or "").lower().replace("\n", " ").encode()
+
+
+class _SectionWriter:
+    """Appends aligned sections to a file and records where each one went"""
+
+    def __init__(self, f) -> None:
+        self.f = f
+        self.sections: Dict[str, Tuple[int, int]] = {}
+        f.write(b"\0" * HEADER.size)
+
+    def _align(self) -> int:
+        position = self.f.tell()
+        padding = -position % ALIGNMENT
+        if padding:
+            self.f.write(b"\0" * padding)
+        return position + padding
+
+    def add(self, name: str, *chunks: bytes) -> None:
+        offset = self._align()
+        length = 0
+        for chunk in chunks:
+            self.f.write(chunk)
+            length += len(chunk)
+        self.sections[name] = (offset, length)
+
+    def finish(self, manifest: Dict[str, Any]) -> None:
+        manifest["sections"] = self.sections
+        encoded = json.dumps(manifest, separators=(",", ":")).encode()
+        offset = self._align()
+        self.f.write(encoded)
+        self.f.seek(0)
+        self.f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, offset, len(encoded)))
+
+
+def write_snapshot(
+    path: str,
+    version: str,
+    rows: Sequence[Optional[Dict[str, Any]]],
+    live: int,
+    bitmaps: Dict[str, Dict[Any, int]],
+    specs: Dict[str, Tuple[array, array]],
+    neighbours: Optional[Dict[int, List[Tuple[float, str, int]]]] = None,
+    generation: int = 0,
+) -> int:
+    """
+    Write a snapshot atomically; returns its size in bytes.
+    `bitmaps` maps each facet ("category", "brand", "tags") to its value
+    bitmaps, `specs` each spec field to its sorted (values, slots) arrays and
+    `neighbours` a slot to its (score, explanation, neighbour slot) list.
+    """
+    size = len(rows)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, "wb") as f:
+            writer = _SectionWriter(f)
+            ids = [row["id"].encode() if row is not None else b"" for row in rows]
+            id_width = max(map(len, ids), default=0) or 1
+            writer.add("ids", *(shoe_id.ljust(id_width, b"\0") for shoe_id in ids))
+            ordered = sorted((shoe_id, slot) for slot, shoe_id in enumerate(ids) if shoe_id)
+            writer.add(
+                "id_index",
+                *(shoe_id.ljust(id_width, b"\0") for shoe_id, _ in ordered),
+                array("i", (slot for _, slot in ordered)).tobytes(),
+            )
+
+            offsets = array("Q", [0])
+            blobs = []
+            for row in rows:
+                blob = _encode_row(row)
+                blobs.append(blob)
+                offsets.append(offsets[-1] + len(blob))
+            writer.add("row_offsets", offsets.tobytes())
+            writer.add("rows", b"".join(blobs))
+            del blobs
+
+            names = [_search_name(row) + b"\n" for row in rows]
+            name_offsets = array("Q", [0])
+            for name in names:
+                name_offsets.append(name_offsets[-1] + len(name))
+            writer.add("names", *names)
+            writer.add("name_offsets", name_offsets.tobytes())
+
+            width = (size + 7) // 8
+            chunks = [live.to_bytes(width, "little")]
+            facets: Dict[str, List[Tuple[Any, int]]] = {}
+            for facet, values in bitmaps.items():
+                facets[facet] = []
+                for value, bits in values.items():
+                    facets[facet].append((value, len(chunks)))
+                    chunks.append(bits.to_bytes(width, "little"))
+            writer.add("bitmaps", *chunks)
+
+            for field, (values, slots) in specs.items():
+                writer.add(f"spec:{field}", values.tobytes(), slots.tobytes())
+
+            explanations: Dict[str, int] = {}
+            if neighbours:
+                starts = array("I", [0])
+                neighbour_slots, scores, explanation_ids = array("i"), array("d"), array("I")
+                for slot in range(size):
+                    for score, explanation, neighbour_slot in neighbours.get(slot, ()):
+                        neighbour_slots.append(neighbour_slot)
+                        scores.append(score)
+                        explanation_ids.append(explanations.setdefault(explanation, len(explanations)))
+                    starts.append(len(neighbour_slots))
+                writer.add(
+                    "neighbours",
+                    starts.tobytes(),
+                    neighbour_slots.tobytes(),
+                    scores.tobytes(),
+                    explanation_ids.tobytes(),
+                )
+
+            writer.finish({
+                "version": version,
+                "generation": generation,
+                "slots": size,
+                "shoes": len(ordered),
+                "id_width": id_width,
+                "bitmap_width": width,
+                "facets": facets,
+                "specs": list(specs),
+                "neighbour_count": len(neighbours or {}),
+                "explanations": list(explanations),
+            })
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return os.path.getsize(path)
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped view of a snapshot file"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot map {path}: {e}") from e
+
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{path} is truncated")
+        magic, format_version, _, offset, length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} is not a catalog snapshot")
+        if format_version != FORMAT_VERSION:
+            raise SnapshotError(f"{path} has format {format_version}, expected {FORMAT_VERSION}")
+        if offset + length > len(self._map):
+            raise SnapshotError(f"{path} is truncated")
+        self.manifest: Dict[str, Any] = json.loads(self._map[offset:offset + length])
+
+        self.version: str = self.manifest["version"]
+        self.generation: int = self.manifest["generation"]
+        self.size: int = self.manifest["slots"]
+        self.shoes: int = self.manifest["shoes"]
+        self._id_width: int = self.manifest["id_width"]
+        self._view = memoryview(self._map)
+        self._ids_start = self.manifest["sections"]["ids"][0]
+        self._id_index_start = self.manifest["sections"]["id_index"][0]
+        self._id_index_slots = self._section("id_index")[self.shoes * self._id_width:].cast("i")
+        self._row_offsets = self._section("row_offsets").cast("Q")
+        self._rows_start = self.manifest["sections"]["rows"][0]
+        self._names_start, names_length = self.manifest["sections"]["names"]
+        self._names_end = self._names_start + names_length
+        self._name_offsets = self._section("name_offsets").cast("Q")
+        self._neighbours = self._load_neighbours()
+
+    def _section(self, name: str) -> memoryview:
+        offset, length = self.manifest["sections"][name]
+        return self._view[offset:offset + length]
+
+    def _load_neighbours(self) -> Optional[Tuple[memoryview, memoryview, memoryview, memoryview]]:
+        if "neighbours" not in self.manifest["sections"]:
+            return None
+        section = self._section("neighbours")
+        starts_end = (self.size + 1) * 4
+        starts = section[:starts_end].cast("I")
+        count = starts[-1]
+        slots_end = starts_end + count * 4
+        scores_end = slots_end + count * 8
+        return (
+            starts,
+            section[starts_end:slots_end].cast("i"),
+            section[slots_end:scores_end].cast("d"),
+            section[scores_end:scores_end + count * 4].cast("I"),
+        )
+
+    # ============ Rows ============
+
+    def id_at(self, slot: int) -> Optional[str]:
+        """Shoe ID in `slot` (None for a removed slot)"""
+        start = self._ids_start + slot * self._id_width
+        shoe_id = self._map[start:start + self._id_width].rstrip(b"\0")
+        return shoe_id.decode() if shoe_id else None
+
+    def _indexed_id(self, position: int) -> bytes:
+        start = self._id_index_start + position * self._id_width
+        return self._map[start:start + self._id_width]
+
+    def slot_of(self, shoe_id: str) -> Optional[int]:
+        """Slot of `shoe_id`, by binary search of the sorted ID index"""
+        key = shoe_id.encode()
+        if len(key) > self._id_width:
+            return None
+        key = key.ljust(self._id_width, b"\0")
+        low, high = 0, self.shoes
+        while low < high:
+            middle = (low + high) // 2
+            if self._indexed_id(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.shoes and self._indexed_id(low) == key:
+            return self._id_index_slots[low]
+        return None
+
+    def iter_ids(self) -> Iterator[str]:
+        """Live shoe IDs in sorted order"""
+        for position in range(self.shoes):
+            yield self._indexed_id(position).rstrip(b"\0").decode()
+
+    def row(self, slot: int) -> Optional[Dict[str, Any]]:
+        """Decode one row (None for a slot whose shoe was removed)"""
+        start, stop = self._row_offsets[slot], self._row_offsets[slot + 1]
+        if start == stop:
+            return None
+        return json.loads(self._map[self._rows_start + start:self._rows_start + stop])
+
+    # ============ Indexes ============
+
+    def live(self) -> int:
+        offset, _ = self.manifest["sections"]["bitmaps"]
+        return int.from_bytes(self._map[offset:offset + self.manifest["bitmap_width"]], "little")
+
+    def bitmaps(self, facet: str) -> "MappedBitmaps":
+        """One facet's value -> bitmap mapping, read from the mapping in place"""
+        section = self._section("bitmaps")
+        width = self.manifest["bitmap_width"]
+        return MappedBitmaps({
+            value: section[index * width:(index + 1) * width]
+            for value, index in self.manifest["facets"].get(facet, [])
+        })
+
+    def spec(self, field: str) -> Tuple[memoryview, memoryview]:
+        """One spec field's sorted float64 values and int32 slots, zero-copy"""
+        section = self._section(f"spec:{field}")
+        split = len(section) * 2 // 3  # 8-byte values, 4-byte slots
+        return section[:split].cast("d"), section[split:].cast("i")
+
+    def search(self, needle: str) -> Iterator[int]:
+        """Slots whose lowercased name contains `needle`, scanning the mapped names"""
+        encoded = needle.lower().encode()
+        if b"\n" in encoded:
+            return
+        position = self._map.find(encoded, self._names_start, self._names_end)
+        while position != -1:
+            slot = bisect_right(self._name_offsets, position - self._names_start) - 1
+            yield slot
+            position = self._map.find(
+                encoded, self._names_start + self._name_offsets[slot + 1], self._names_end
+            )
+
+    @property
+    def has_neighbours(self) -> bool:
+        return self._neighbours is not None
+
+    def neighbours(self, slot: int) -> Optional[List[Neighbour]]:
+        """The stored similar-shoe list of `slot`, or None if none was stored"""
+        if self._neighbours is None:
+            return None
+        starts, slots, scores, explanation_ids = self._neighbours
+        start, stop = starts[slot], starts[slot + 1]
+        if start == stop:
+            return None
+        explanations = self.manifest["explanations"]
+        return [
+            (scores[i], explanations[explanation_ids[i]], self.id_at(slots[i]))
+            for i in range(start, stop)
+        ]
+
+
+class MappedRows:
+    """
+    The catalog's row list over a snapshot, read-only. Rows are decoded on
+    access and only the most recent `cache_size` are kept, so a worker's
+    memory follows the cache size rather than the catalog size.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, cache_size: int) -> None:
+        self.snapshot = snapshot
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.snapshot.size
+
+    def __getitem__(self, slot: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if slot in self._cache:
+                self._cache.move_to_end(slot)
+                return self._cache[slot]
+        row = self.snapshot.row(slot)
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[slot] = row
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return row
+
+    def __iter__(self) -> Iterator[Optional[Dict[str, Any]]]:
+        """Every row in slot order, decoded without filling the cache"""
+        for slot in range(self.snapshot.size):
+            yield self.snapshot.row(slot)
+
+    @property
+    def cached(self) -> int:
+        return len(self._cache)
+
+
+class MappedBitmaps(Mapping):
+    """
+    Read-only facet value -> bitmap mapping over a snapshot. A bitmap is
+    decoded into an int only for the query that reads it, so between queries
+    the bitmaps take no private memory.
+    """
+
+    def __init__(self, views: Dict[Any, memoryview]) -> None:
+        self._views = views
+
+    def __getitem__(self, value: Any) -> int:
+        return int.from_bytes(self._views[value], "little")
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._views)
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def counts(self) -> Dict[Any, int]:
+        """Popcount of every bitmap"""
+        return {value: int.from_bytes(view, "little").bit_count() for value, view in self._views.items()}
+
+
+class MappedSlots(Mapping):
+    """Read-only shoe ID -> slot mapping over a snapshot's sorted ID index"""
+
+    def __init__(self, snapshot: CatalogSnapshot) -> None:
+        self.snapshot = snapshot
+
+    def __getitem__(self, shoe_id: str) -> int:
+        slot = self.snapshot.slot_of(shoe_id)
+        if slot is None:
+            raise KeyError(shoe_id)
+        return slot
+
+    def __iter__(self) -> Iterator[str]:
+        return self.snapshot.iter_ids()
+
+    def __len__(self) -> int:
+        return self.snapshot.shoes
@@ -1,20 +1,48 @@
-from supabase import create_client, Client
+"""
+Supabase clients, created on first use.
+
+Importing the `supabase` package pulls in the auth, storage, realtime and
+PostgREST stacks, so nothing here touches it until a client is actually
+asked for; importing the API or a script stays cheap and `--help` never
+needs credentials. Call `get_supabase_client()` / `get_supabase_server()`
+where the client is used rather than binding one at module import.
+"""
+
 from functools import lru_cache
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from app.core.config import settings
 
+# Annotation aliases that resolve at runtime (FastAPI, get_type_hints) without
+# importing the client stack; type checkers see the real classes.
+if TYPE_CHECKING:
+    from supabase_auth.types import User
+
+    from supabase import Client
+else:
+    Client = Any
+    User = Any
+
 
 def _validate_credentials() -> bool:
     """Check if Supabase credentials are configured"""
     return bool(
-        settings.SUPABASE_URL 
-        and settings.SUPABASE_KEY 
+        settings.SUPABASE_URL
+        and settings.SUPABASE_KEY
         and settings.SUPABASE_SERVICE_KEY
         and settings.SUPABASE_URL != "https://your-project-id.supabase.co"
     )
 
 
+def create_client(url: str, key: str) -> Client:
+    """`supabase.create_client`, with PostgREST query timing installed first"""
+    from app.core.timing import instrument_postgrest
+    from supabase import create_client as _create_client
+
+    instrument_postgrest()
+    return _create_client(url, key)
+
+
 @lru_cache()
 def get_supabase_client() -> Optional[Client]:
     """
@@ -40,7 +68,3 @@ def get_supabase_server() -> Optional[Client]:
         return None
     return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
 
-
-# Convenience exports - will be None if not configured
-supabase = get_supabase_client()
-supabase_admin = get_supabase_server()  # Note: Does NOT bypass RLS with new Supabase keys
@@ -0,0 +1,237 @@
+"""
+Per-request timing.
+
+`TimingMiddleware` opens a timeline for every HTTP request; code running in
+the request adds spans to it (`span("auth")`, `db_call(table, operation)`),
+and `TimedRoute` marks when the endpoint starts and returns so the rest of
+the request splits into compute (endpoint minus database time) and encode
+(endpoint return to response headers). The timeline is returned as a
+`Server-Timing` header and every span is fed into the histograms below.
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Counter, Gauge, Histogram
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time until the response headers were sent", ("route", "status")
+)
+SPAN_LATENCY = Histogram("http_request_span_duration_seconds", "Time spent per request phase", ("span",))
+DB_LATENCY = Histogram("supabase_query_duration_seconds", "Supabase query latency", ("table", "operation"))
+DB_ERRORS = Counter("supabase_query_errors_total", "Supabase queries that raised", ("table", "operation"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+
+class Timeline:
+    """Spans recorded during one request"""
+
+    __slots__ = ("started", "spans", "db", "endpoint_started", "endpoint_finished", "endpoint_db")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+        # (table, operation) -> [calls, seconds]
+        self.db: Dict[Tuple[str, str], List[float]] = {}
+        self.endpoint_started: Optional[float] = None
+        self.endpoint_finished: Optional[float] = None
+        self.endpoint_db = 0.0
+
+    def phases(self, responded: float) -> List[Tuple[str, float]]:
+        """Derived compute/encode spans plus the total, once the headers are going out"""
+        phases = []
+        if self.endpoint_started is not None:
+            endpoint_end = self.endpoint_finished or responded
+            phases.append(("compute", max(endpoint_end - self.endpoint_started - self.endpoint_db, 0.0)))
+            if self.endpoint_finished is not None:
+                phases.append(("encode", responded - self.endpoint_finished))
+        phases.append(("total", responded - self.started))
+        return phases
+
+    def header(self, phases: List[Tuple[str, float]]) -> str:
+        entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.spans]
+        for (table, operation), (calls, seconds) in self.db.items():
+            count = f" x{int(calls)}" if calls > 1 else ""
+            entries.append(f'db;desc="{table} {operation}{count}";dur={seconds * 1000:.2f}')
+        entries.extend(f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases)
+        return ", ".join(entries)
+
+
+_timeline: ContextVar[Optional[Timeline]] = ContextVar("timeline", default=None)
+
+
+def current_timeline() -> Optional[Timeline]:
+    return _timeline.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block as a named span of the current request (no-op outside one)"""
+    timeline = _timeline.get()
+    if timeline is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timeline.spans.append((name, time.perf_counter() - started))
+
+
+@contextmanager
+def db_call(table: str, operation: str) -> Iterator[None]:
+    """Time one database round trip, inside a request or not"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_ERRORS.inc(table, operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        DB_LATENCY.observe(elapsed, table, operation)
+        timeline = _timeline.get()
+        if timeline is not None:
+            totals = timeline.db.get((table, operation))
+            if totals is None:
+                timeline.db[(table, operation)] = [1, elapsed]
+            else:
+                totals[0] += 1
+                totals[1] += elapsed
+            if timeline.endpoint_started is not None and timeline.endpoint_finished is None:
+                timeline.endpoint_db += elapsed
+
+
+def route_label(scope: Scope) -> str:
+    """The matched route's full path template, so labels don't grow with IDs"""
+    route = scope.get("route")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return "unmatched"
+    # Routes of included routers only know their own path: find the prefix they sit under
+    path = scope["path"]
+    for i, char in enumerate(path + "/"):
+        if char == "/" and path_regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path or "unmatched"
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware: times each HTTP request and adds a Server-Timing header"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeline = Timeline()
+        token = _timeline.set(timeline)
+        status = 500
+        phases: List[Tuple[str, float]] = []
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status, phases
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                phases = timeline.phases(time.perf_counter())
+                MutableHeaders(scope=message).append("Server-Timing", timeline.header(phases))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            IN_FLIGHT.dec()
+            _timeline.reset(token)
+            if not phases:
+                phases = timeline.phases(time.perf_counter())
+            REQUEST_LATENCY.observe(phases[-1][1], route_label(scope), str(status))
+            for name, seconds in timeline.spans + phases[:-1]:
+                SPAN_LATENCY.observe(seconds, name)
+            if timeline.db:
+                SPAN_LATENCY.observe(sum(seconds for _, seconds in timeline.db.values()), "db")
+
+
+def _mark_endpoint(started: bool) -> None:
+    timeline = _timeline.get()
+    if timeline is not None:
+        if started:
+            timeline.endpoint_started = time.perf_counter()
+        else:
+            timeline.endpoint_finished = time.perf_counter()
+
+
+def timed_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a route endpoint so the timeline knows when it ran"""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            _mark_endpoint(True)
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint(False)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            _mark_endpoint(True)
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint(False)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint reports to the request timeline"""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+
+# ============ Supabase query instrumentation ============
+
+def _query_labels(request: Any) -> Tuple[str, str]:
+    """(table, operation) of a postgrest RequestConfig"""
+    segments = str(request.path).rstrip("/").split("/")
+    if len(segments) >= 2 and segments[-2] == "rpc":
+        return segments[-1], "rpc"
+    method = request.http_method
+    if method == "POST":
+        prefer = request.headers.get("Prefer", "")
+        return segments[-1], "upsert" if "resolution=" in prefer else "insert"
+    operation = {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}.get(method, method.lower())
+    return segments[-1], operation
+
+
+def _timed_execute(execute: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(execute)
+    def wrapper(self: Any) -> Any:
+        with db_call(*_query_labels(self.request)):
+            return execute(self)
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def instrument_postgrest() -> None:
+    """Time every synchronous postgrest query (idempotent)"""
+    from postgrest._sync import request_builder
+
+    for builder in (
+        request_builder.SyncQueryRequestBuilder,
+        request_builder.SyncSingleRequestBuilder,
+        request_builder.SyncMaybeSingleRequestBuilder,
+    ):
+        if not getattr(builder.execute, "__timed__", False):
+            builder.execute = _timed_execute(builder.execute)
@@ -0,0 +1,132 @@
+"""
+Start-up warm-up.
+
+Without it the first requests after a deploy pay for opening Supabase
+connections, loading the catalog snapshot and building its search and
+similarity structures. The lifespan hook runs these phases in the background
+once the server is accepting connections; readiness is withheld until they
+have all completed, and each phase's timing is reported. A failed run is
+retried after RETRY_SECONDS.
+
+When the lifespan hook found a snapshot file, the catalog is already serving
+from it. The catalog and snapshot phases go through app/core/catalog_sync.py:
+the builder worker checks the version against the database and publishes the
+file if anything it holds has changed, the other workers wait for that publish.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.catalog import catalog
+from app.core.catalog_sync import catalog_sync
+from app.core.health import health_monitor
+from app.core.metrics import CallbackMetric
+from app.core.similarity import similarity_index
+
+RETRY_SECONDS = 15.0
+
+
+async def _open_connections() -> None:
+    """Open the server client's connection pool with a first database probe"""
+    await health_monitor.check()
+    if health_monitor.database != "connected":
+        raise RuntimeError(health_monitor.last_error or "database probe failed")
+
+
+async def _load_catalog() -> None:
+    await catalog_sync.load()
+
+
+async def _build_search() -> None:
+    await asyncio.to_thread(catalog.prepare_search)
+
+
+async def _build_similarity() -> None:
+    await asyncio.to_thread(similarity_index.build)
+
+
+async def _publish_snapshot() -> None:
+    await catalog_sync.publish_if_needed()
+
+
+PHASES: List[Tuple[str, Callable[[], Awaitable[None]]]] = [
+    ("connections", _open_connections),
+    ("catalog", _load_catalog),
+    ("search", _build_search),
+    ("similarity", _build_similarity),
+    ("snapshot", _publish_snapshot),
+]
+
+
+class WarmUp:
+    """Runs PHASES in order and records how long each took"""
+
+    def __init__(self, phases: List[Tuple[str, Callable[[], Awaitable[None]]]] = PHASES) -> None:
+        self.phases = phases
+        self.ready = False
+        self.attempts = 0
+        self.report_by_phase: Dict[str, Dict[str, Any]] = {}
+        self.total_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> bool:
+        """One pass over every phase; stops at the first failure"""
+        self.attempts += 1
+        self.report_by_phase = {name: {"status": "pending"} for name, _ in self.phases}
+        started = time.perf_counter()
+        for name, phase in self.phases:
+            self.report_by_phase[name] = {"status": "running"}
+            phase_started = time.perf_counter()
+            try:
+                await phase()
+            except Exception as e:
+                self.report_by_phase[name] = {
+                    "status": "failed",
+                    "ms": round((time.perf_counter() - phase_started) * 1000, 2),
+                    "error": str(e),
+                }
+                return False
+            self.report_by_phase[name] = {
+                "status": "done",
+                "ms": round((time.perf_counter() - phase_started) * 1000, 2),
+            }
+        self.total_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.ready = True
+        return True
+
+    async def _run(self) -> None:
+        while not await self.run_once():
+            await asyncio.sleep(RETRY_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="warm-up")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "total_ms": self.total_ms,
+            "phases": self.report_by_phase,
+        }
+
+
+warmup = WarmUp()
+
+CallbackMetric(
+    "warmup_phase_duration_seconds", "How long each start-up warm-up phase took", "gauge", ("phase",),
+    lambda: {
+        (name,): phase["ms"] / 1000
+        for name, phase in warmup.report_by_phase.items() if "ms" in phase
+    },
+)
@@ -1,8 +1,40 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 
-from app.api import shoes, rotation, graveyard, recommendations, users, auth
+from app.api import shoes, rotation, graveyard, recommendations, users, auth, admin
+from app.core.catalog_sync import catalog_sync
 from app.core.config import settings
+from app.core.health import health_monitor
+from app.core.metrics import CONTENT_TYPE, REGISTRY, CallbackMetric
+from app.core.profiler import ProfilingMiddleware
+from app.core.image_cache import get_image_proxy
+from app.core.timing import TimingMiddleware
+from app.core.warmup import warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Map the shared catalog snapshot and start following (or building) it,
+    then start the background database probe and warm-up (connections,
+    catalog, search and similarity structures); close pooled clients on
+    shutdown.
+    """
+    catalog_sync.start()
+    health_monitor.start()
+    warmup.start()
+    yield
+    await warmup.stop()
+    await catalog_sync.stop()
+    await health_monitor.stop()
+    if get_image_proxy.cache_info().currsize:
+        await get_image_proxy().close()
+
 
 app = FastAPI(
     title="TurnOver API",
@@ -10,6 +42,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -19,8 +52,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# On-demand request profiling, only installed when a profiler token is configured
+if settings.PROFILER_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-request spans (auth, each Supabase query, compute, encode) as a Server-Timing header
+app.add_middleware(TimingMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
@@ -28,6 +69,16 @@ app.include_router(shoes.router, prefix="/api/shoes", tags=["Shoes"])
 app.include_router(rotation.router, prefix="/api/rotation", tags=["Rotation"])
 app.include_router(graveyard.router, prefix="/api/graveyard", tags=["Graveyard"])
 app.include_router(recommendations.router, prefix="/api/recommendations", tags=["Recommendations"])
+if settings.PROFILER_TOKEN:
+    app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+
+# Serve the local image mirror (see app/scripts/image_mirror.py) unless it lives on a CDN
+if settings.IMAGE_MIRROR_BASE_URL.startswith("/"):
+    app.mount(
+        settings.IMAGE_MIRROR_BASE_URL,
+        StaticFiles(directory=settings.IMAGE_MIRROR_DIR, check_dir=False),
+        name="media",
+    )
 
 
 @app.get("/", tags=["Health"])
@@ -38,23 +89,58 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Detailed health check including database connectivity"""
-    from app.core.supabase import supabase_admin
-    
-    db_status = "unknown"
-    db_shoe_count = 0
-    
-    try:
-        # Test database connectivity
-        response = supabase_admin.table("shoes").select("*", count="exact").limit(1).execute()
-        db_status = "connected"
-        db_shoe_count = response.count or 0
-    except Exception as e:
-        db_status = f"error: {str(e)}"
-    
+    """Detailed health check from the latest background database probe"""
+    report = health_monitor.report()
+    if report["database"] == "error":
+        database = f"error: {report['last_error']}"
+    else:
+        database = report["database"]
     return {
-        "status": "healthy" if db_status == "connected" else "degraded",
-        "database": db_status,
-        "shoe_count": db_shoe_count,
+        "status": "healthy" if health_monitor.is_ready else "degraded",
+        "database": database,
+        "shoe_count": report["shoe_count"] or 0,
         "version": "0.1.0",
+        "probe": report,
+        "warmup": warmup.report(),
+        "catalog": catalog_sync.report(),
     }
+
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness: the process is up and its event loop is responsive. Never touches the database"""
+    return {"status": "alive", "uptime_seconds": round(health_monitor.uptime, 1)}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """
+    Readiness: warm-up has finished and the latest database probe succeeded
+    and is fresh (503 otherwise). Includes the warm-up phase timings.
+    """
+    ready = warmup.ready and health_monitor.is_ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", **health_monitor.report(), "warmup": warmup.report()},
+    )
+
+
+def _threadpool_threads():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {("busy",): limiter.borrowed_tokens, ("limit",): limiter.total_tokens}
+
+
+def _threadpool_queue_depth():
+    return {(): anyio.to_thread.current_default_thread_limiter().statistics().tasks_waiting}
+
+
+# Read at scrape time, from inside the event loop that owns the limiter
+CallbackMetric("threadpool_threads", "Worker threads for sync endpoints and dependencies", "gauge", ("state",), _threadpool_threads)
+CallbackMetric("threadpool_queue_depth", "Sync calls waiting for a worker thread", "gauge", (), _threadpool_queue_depth)
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: request latency, Supabase queries, in-flight requests, thread pool, caches"""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
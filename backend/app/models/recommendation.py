@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -15,6 +15,7 @@ class RecommendedShoe(BaseModel):
     stack_height_heel: float
     stack_height_forefoot: float
     image_url: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -58,6 +58,7 @@ class ShoeBase(BaseModel):
 class Shoe(ShoeBase):
     """Complete shoe model with ID"""
     id: str
+    image_variants: Optional[Dict[str, str]] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
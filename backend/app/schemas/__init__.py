@@ -3,6 +3,7 @@ from app.schemas.shoe import (
     ShoeCreate,
     ShoeUpdate,
     ShoeResponse,
+    ShoeFacetsResponse,
     RotationShoeCreate,
     RotationShoeResponse,
     RetiredShoeCreate,
@@ -23,6 +24,7 @@ __all__ = [
     "ShoeCreate",
     "ShoeUpdate",
     "ShoeResponse",
+    "ShoeFacetsResponse",
     "RotationShoeCreate",
     "RotationShoeResponse",
     "RetiredShoeCreate",
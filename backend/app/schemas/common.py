@@ -1,5 +1,11 @@
-from pydantic import BaseModel
-from typing import Generic, TypeVar, Optional, List
+# Starlette rather than fastapi imports: the scripts use these schemas, and
+# importing the fastapi package would build its whole OpenAPI model stack
+from starlette import status
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from pydantic import BaseModel, create_model
+from functools import lru_cache
+from typing import Any, Dict, Generic, Iterable, TypeVar, Optional, List, Tuple, Type
 
 T = TypeVar("T")
 
@@ -24,3 +30,55 @@ class MessageResponse(BaseModel):
     """Simple message response"""
     success: bool
     message: str
+
+
+# ============ Sparse Fieldsets ============
+
+def parse_fields(
+    model: Type[BaseModel],
+    fields: Optional[str],
+    required: Iterable[str] = ("id",),
+) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma-separated `fields=` parameter into model field names.
+    Returns None when no projection was requested; unknown fields are a 400.
+    """
+    if not fields:
+        return None
+    
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    
+    return tuple(dict.fromkeys([*required, *requested]))
+
+
+@lru_cache(maxsize=256)
+def sparse_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Build (once per field set) a copy of `model` restricted to `fields`"""
+    return create_model(
+        f"Sparse{model.__name__}",
+        **{
+            name: (info.annotation, info)
+            for name, info in model.model_fields.items()
+            if name in fields
+        },
+    )
+
+
+def project(model: Type[BaseModel], fields: Tuple[str, ...], row: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate the selected fields of a row and return them JSON-ready"""
+    sparse = sparse_model(model, fields)
+    return sparse(**{name: row.get(name) for name in fields}).model_dump(mode="json")
+
+
+def sparse_response(data: Any) -> Response:
+    """Wrap already-projected data in the standard ApiResponse envelope"""
+    return Response(
+        content=ApiResponse[Any](data=data, success=True).model_dump_json(),
+        media_type="application/json",
+    )
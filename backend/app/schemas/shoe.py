@@ -1,10 +1,37 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
+from urllib.parse import urlsplit
+import ipaddress
 
+from app.core.config import settings
 from app.models.shoe import ShoeCategory, ShoeTag
 
 
+def check_image_url(url: Optional[str]) -> Optional[str]:
+    """
+    Image URLs are fetched server-side by the image proxy, so only accept
+    http(s) URLs to a named or public host, or a path in the image mirror.
+    The proxy checks resolved addresses again when it fetches.
+    """
+    if url is None:
+        return None
+    mirror_prefix = settings.IMAGE_MIRROR_BASE_URL.rstrip("/") + "/"
+    if mirror_prefix.startswith("/") and url.startswith(mirror_prefix):
+        return url
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("image_url must be an http(s) URL")
+    host = parts.hostname
+    try:
+        public = ipaddress.ip_address(host).is_global
+    except ValueError:
+        public = host != "localhost" and not host.endswith(".localhost")
+    if not public:
+        raise ValueError("image_url must point to a public host")
+    return url
+
+
 # ============ Shoe Schemas ============
 
 class ShoeCreate(BaseModel):
@@ -17,7 +44,9 @@ class ShoeCreate(BaseModel):
     drop: float = Field(..., ge=0, description="Drop in mm")
     stack_height_heel: float = Field(..., ge=0, description="Heel stack height in mm")
     stack_height_forefoot: float = Field(..., ge=0, description="Forefoot stack height in mm")
-    image_url: Optional[str] = None
+    image_url: Optional[str] = Field(None, max_length=2048)
+
+    _check_image_url = field_validator("image_url")(check_image_url)
 
 
 class ShoeUpdate(BaseModel):
@@ -30,7 +59,9 @@ class ShoeUpdate(BaseModel):
     drop: Optional[float] = Field(None, ge=0)
     stack_height_heel: Optional[float] = Field(None, ge=0)
     stack_height_forefoot: Optional[float] = Field(None, ge=0)
-    image_url: Optional[str] = None
+    image_url: Optional[str] = Field(None, max_length=2048)
+
+    _check_image_url = field_validator("image_url")(check_image_url)
 
 
 class ShoeResponse(BaseModel):
@@ -45,6 +76,7 @@ class ShoeResponse(BaseModel):
     stack_height_heel: float
     stack_height_forefoot: float
     image_url: Optional[str] = None
+    image_variants: Optional[Dict[str, str]] = None  # Mirrored thumbnails by width
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -52,6 +84,14 @@ class ShoeResponse(BaseModel):
         from_attributes = True
 
 
+class ShoeFacetsResponse(BaseModel):
+    """Schema for catalog facet counts under the current filter"""
+    total: int
+    categories: Dict[str, int]
+    brands: Dict[str, int]
+    tags: Dict[str, int]
+
+
 # ============ Rotation Shoe Schemas ============
 
 class RotationShoeCreate(BaseModel):
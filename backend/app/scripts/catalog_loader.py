@@ -0,0 +1,437 @@
+"""
+Streaming catalog loader for seed_database.
+
+Catalog files (CSV or JSONL, optionally gzipped) are read lazily and pushed
+through a generator pipeline:
+
+    read_records -> validate_records -> batch_records -> upsert
+
+Upserts run on a small thread pool with a bounded number of batches in flight,
+so memory stays flat however large the file is. The batch size adapts to the
+observed upsert latency (additive increase, multiplicative decrease). Progress
+reports include rows/s and the offset that a re-run can resume from with
+--offset: every record before it has been committed.
+
+In diff mode the existing rows' content hashes (shoe_content_hashes view,
+migration 004) are fetched first and unchanged records are dropped from the
+pipeline, so a re-seed only writes what actually changed.
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import islice
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.supabase import get_supabase_server
+from app.models.shoe import ShoeTag
+from app.schemas.shoe import ShoeCreate
+
+DEFAULT_WORKERS = 4  # Upsert batches in flight at once
+DEFAULT_BATCH_SIZE = 200
+MIN_BATCH_SIZE = 20
+MAX_BATCH_SIZE = 2000
+BATCH_SIZE_STEP = 50  # Additive increase per fast batch
+TARGET_BATCH_SECONDS = 1.0  # Batches slower than this halve the batch size
+UPSERT_RETRIES = 3
+PROGRESS_INTERVAL_SECONDS = 5.0
+MAX_REPORTED_ERRORS = 10
+HASH_PAGE_SIZE = 1000
+DELETE_BATCH_SIZE = 200
+DIFF_SAMPLE_SIZE = 10  # Examples listed per kind in the diff report
+HASHED_SPECS = ("weight", "drop", "stack_height_heel", "stack_height_forefoot")
+
+TAG_SEPARATORS = ("|", ";", ",")
+TAG_ALIASES = {"cushion": "cushioned", "light": "lightweight", "stability": "stable"}
+KNOWN_TAGS = {tag.value for tag in ShoeTag}
+
+Record = Tuple[int, Dict[str, Any]]  # (position in the source file, fields)
+ShoeKey = Tuple[str, str]  # (brand, name)
+
+
+class AdaptiveBatchSize:
+    """AIMD controller: grow slowly while batches are fast, halve when they are slow"""
+
+    def __init__(
+        self,
+        initial: int = DEFAULT_BATCH_SIZE,
+        minimum: int = MIN_BATCH_SIZE,
+        maximum: int = MAX_BATCH_SIZE,
+        target_seconds: float = TARGET_BATCH_SECONDS,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.value = max(minimum, min(initial, maximum))
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        if ok and seconds <= self.target_seconds:
+            self.value = min(self.maximum, self.value + BATCH_SIZE_STEP)
+        else:
+            self.value = max(self.minimum, self.value // 2)
+
+
+# ============================================
+# PIPELINE STAGES
+# ============================================
+
+def _open_text(path: str) -> io.TextIOBase:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def read_records(path: str, offset: int = 0) -> Iterator[Record]:
+    """Yield (position, raw fields) for each record, skipping the first `offset`"""
+    name = path[:-3] if path.endswith(".gz") else path
+    with _open_text(path) as f:
+        if name.endswith(".csv"):
+            records: Iterable[Dict[str, Any]] = csv.DictReader(f)
+        elif name.endswith((".jsonl", ".ndjson")):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            raise ValueError(f"Unsupported catalog file (expected .csv or .jsonl): {path}")
+
+        for position, record in enumerate(records):
+            if position >= offset:
+                yield position, record
+
+
+def normalize_tags(raw: Any) -> Tuple[List[str], List[str]]:
+    """
+    Turn a tag field (list, JSON array string or delimited string) into known
+    ShoeTag values, deduplicated in order. Returns (tags, unknown).
+    """
+    if raw is None:
+        values: List[Any] = []
+    elif isinstance(raw, str):
+        text = raw.strip()
+        if text.startswith("["):
+            values = json.loads(text)
+        else:
+            separator = next((sep for sep in TAG_SEPARATORS if sep in text), None)
+            values = text.split(separator) if separator else [text]
+    else:
+        values = list(raw)
+
+    tags: List[str] = []
+    unknown: List[str] = []
+    for value in values:
+        tag = str(value).strip().lower().replace(" ", "-")
+        tag = TAG_ALIASES.get(tag, tag)
+        if not tag:
+            continue
+        if tag not in KNOWN_TAGS:
+            unknown.append(tag)
+        elif tag not in tags:
+            tags.append(tag)
+    return tags, unknown
+
+
+def validate_records(
+    records: Iterable[Record],
+    stats: Dict[str, int],
+    rejected: Optional[List[ShoeKey]] = None,
+) -> Iterator[Record]:
+    """
+    Validate against ShoeCreate; invalid records are counted and reported, not
+    raised. The (brand, name) of rejected records that have one is appended
+    to `rejected`, so a diff doesn't mistake their shoes for missing ones.
+    """
+    for position, record in records:
+        stats["read"] += 1
+        try:
+            tags, unknown = normalize_tags(record.get("tags"))
+            if unknown:
+                stats["unknown_tags"] += len(unknown)
+            fields = {key: value for key, value in record.items() if value not in (None, "")}
+            fields["tags"] = tags
+            shoe = ShoeCreate.model_validate(fields)
+        except (ValidationError, ValueError) as e:
+            stats["rejected"] += 1
+            if stats["rejected"] <= MAX_REPORTED_ERRORS:
+                print(f"   ⚠️  Record {position}: {str(e).splitlines()[0]}")
+            if rejected is not None and record.get("brand") and record.get("name"):
+                rejected.append((str(record["brand"]), str(record["name"])))
+            continue
+        # Leave out unset image URLs so the upsert doesn't erase fetched images
+        yield position, shoe.model_dump(mode="json", exclude_none=True)
+
+
+def _decimal_text(value: Any) -> str:
+    """Render a spec the way a DECIMAL(_, 1) column prints"""
+    return str(Decimal(str(value)).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Hash of the catalog-owned fields; must match the shoe_content_hashes view"""
+    parts = [
+        row["category"],
+        ",".join(sorted(row.get("tags") or [])),
+        *(_decimal_text(row[field]) for field in HASHED_SPECS),
+    ]
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def fetch_content_hashes() -> Dict[ShoeKey, Tuple[str, str]]:
+    """Map (brand, name) -> (id, content hash) for every shoe in the database"""
+    existing: Dict[ShoeKey, Tuple[str, str]] = {}
+    last_id = None
+    while True:
+        query = get_supabase_server().table("shoe_content_hashes").select("id, brand, name, content_hash")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(HASH_PAGE_SIZE).execute().data or []
+        for row in rows:
+            existing[(row["brand"], row["name"])] = (row["id"], row["content_hash"])
+        if len(rows) < HASH_PAGE_SIZE:
+            return existing
+        last_id = rows[-1]["id"]
+
+
+def diff_records(
+    records: Iterable[Record],
+    existing: Dict[ShoeKey, Tuple[str, str]],
+    stats: Dict[str, int],
+    samples: Dict[str, List[str]],
+) -> Iterator[Record]:
+    """
+    Pass on only new or changed records. Matched keys are removed from
+    `existing`, so what is left afterwards is missing from the source.
+    """
+    for position, row in records:
+        current = existing.pop((row["brand"], row["name"]), None)
+        if current is None:
+            kind = "new"
+        elif current[1] != content_hash(row):
+            kind = "changed"
+        else:
+            stats["unchanged"] += 1
+            continue
+        stats[kind] += 1
+        if len(samples[kind]) < DIFF_SAMPLE_SIZE:
+            samples[kind].append(f"{row['brand']} {row['name']}")
+        yield position, row
+
+
+def delete_shoes(ids: List[str]) -> int:
+    """Delete shoes by ID in chunks (cascades to rotations and graveyards)"""
+    for i in range(0, len(ids), DELETE_BATCH_SIZE):
+        get_supabase_server().table("shoes").delete().in_("id", ids[i:i + DELETE_BATCH_SIZE]).execute()
+    return len(ids)
+
+
+def batch_records(records: Iterable[Record], size: Callable[[], int]) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Group records into (end offset, rows) batches of `size()` rows. A batch is
+    cut early when the column set changes, since a bulk upsert needs uniform
+    keys, and duplicate (brand, name) pairs within a batch keep the last row.
+    """
+    rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    columns = None
+    end = 0
+    for position, row in records:
+        row_columns = tuple(sorted(row))
+        if rows and (row_columns != columns or len(rows) >= size()):
+            yield end, list(rows.values())
+            rows = {}
+        columns = row_columns
+        rows[(row["brand"], row["name"])] = row
+        end = position + 1
+    if rows:
+        yield end, list(rows.values())
+
+
+def upsert_batch(rows: List[Dict[str, Any]]) -> None:
+    """Upsert one batch on (brand, name), retrying transient failures"""
+    for attempt in range(UPSERT_RETRIES + 1):
+        try:
+            get_supabase_server().table("shoes").upsert(
+                rows, on_conflict="brand,name", returning="minimal"
+            ).execute()
+            return
+        except Exception:
+            if attempt == UPSERT_RETRIES:
+                raise
+            time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+
+
+# ============================================
+# LOADER
+# ============================================
+
+def _skip_upsert(rows: List[Dict[str, Any]]) -> None:
+    """Dry runs push batches through the pipeline without writing them"""
+
+
+def print_diff_report(stats: Dict[str, int], samples: Dict[str, List[str]], prune: bool) -> None:
+    print("\n📋 Catalog diff:")
+    kinds = [
+        ("new", "New"),
+        ("changed", "Changed"),
+        ("kept", "Rejected in source (kept as is)"),
+        ("missing", "Missing from source"),
+    ]
+    for kind, label in kinds:
+        suffix = " (deleted)" if kind == "missing" and prune else ""
+        print(f"   {label}: {stats[kind]:,}{suffix}")
+        for example in samples[kind]:
+            print(f"     - {example}")
+    print(f"   Unchanged: {stats['unchanged']:,}")
+
+
+def load_records(
+    records: Iterable[Record],
+    offset: int = 0,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    upsert: Callable[[List[Dict[str, Any]]], None] = upsert_batch,
+    diff: bool = False,
+    prune: bool = False,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    """
+    Stream raw catalog records into the shoes table.
+
+    Args:
+        records: (position, fields) pairs, e.g. from read_records
+        offset: Position of the first record (from a previous run's report)
+        workers: Maximum upsert batches in flight
+        batch_size: Initial batch size; adapts to observed latency
+        upsert: Function that writes one batch
+        diff: Only upsert records whose content hash differs from the database
+        prune: Delete shoes missing from the source (implies diff)
+        dry_run: Print the diff report without writing anything (implies diff)
+
+    Returns:
+        Statistics dict, including the committed `offset`
+    """
+    diff = diff or prune or dry_run
+    if prune and offset:
+        raise ValueError("--prune needs the whole source; it can't be combined with --offset")
+
+    stats = {
+        "read": 0,
+        "rejected": 0,
+        "unknown_tags": 0,
+        "new": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "kept": 0,
+        "missing": 0,
+        "deleted": 0,
+        "upserted": 0,
+        "batches": 0,
+        "offset": offset,
+        "batch_size": batch_size,
+        "elapsed_ms": 0,
+    }
+    samples: Dict[str, List[str]] = {"new": [], "changed": [], "kept": [], "missing": []}
+    rejected_keys: List[ShoeKey] = []
+    sizer = AdaptiveBatchSize(initial=batch_size)
+    # Batches finish out of order; the committed offset only advances past a
+    # batch once every earlier batch has finished too
+    finished: Dict[int, int] = {}
+    in_flight: Deque[Tuple[Future, int, int, int]] = deque()
+    batch_start = offset
+    started = time.perf_counter()
+    last_report = started
+
+    def timed_upsert(rows: List[Dict[str, Any]]) -> float:
+        batch_started = time.perf_counter()
+        upsert(rows)
+        return time.perf_counter() - batch_started
+
+    def collect(block: bool) -> None:
+        if block:
+            wait([item[0] for item in in_flight], return_when=FIRST_COMPLETED)
+        for item in list(in_flight):
+            future, start, end, count = item
+            if not future.done():
+                continue
+            in_flight.remove(item)
+            try:
+                seconds = future.result()
+            except Exception:
+                sizer.observe(0, ok=False)
+                raise
+            sizer.observe(seconds)
+            stats["upserted"] += count
+            stats["batches"] += 1
+            finished[start] = end
+        while stats["offset"] in finished:
+            stats["offset"] = finished.pop(stats["offset"])
+
+    def report() -> None:
+        elapsed = time.perf_counter() - started
+        rate = stats["upserted"] / elapsed if elapsed else 0.0
+        print(f"   {stats['upserted']:,} upserted, {stats['rejected']:,} rejected, "
+              f"{rate:,.0f} rows/s, batch size {sizer.value}, resume offset {stats['offset']:,}")
+
+    valid = validate_records(records, stats, rejected_keys if diff else None)
+    if diff:
+        print("🔎 Fetching content hashes of existing shoes...")
+        existing = fetch_content_hashes()
+        valid = diff_records(valid, existing, stats, samples)
+    if dry_run:
+        upsert = _skip_upsert
+    pipeline = batch_records(valid, size=lambda: sizer.value)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for end, rows in pipeline:
+                # Back-pressure: don't read ahead until a batch slot is free
+                while len(in_flight) >= workers:
+                    collect(block=True)
+                in_flight.append((pool.submit(timed_upsert, rows), batch_start, end, len(rows)))
+                batch_start = end
+
+                if time.perf_counter() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                    collect(block=False)
+                    report()
+                    last_report = time.perf_counter()
+
+            while in_flight:
+                collect(block=True)
+            # Trailing rejected or unchanged records have nothing left to wait for
+            stats["offset"] = max(stats["offset"], offset + stats["read"])
+        finally:
+            stats["batch_size"] = sizer.value
+            stats["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
+            if in_flight or stats["offset"] < offset + stats["read"]:
+                print(f"   ⏸️  Stopped early; resume with --offset {stats['offset']}")
+    if diff:
+        # A shoe whose source row failed validation is still in the source
+        for key in rejected_keys:
+            if existing.pop(key, None) is not None:
+                stats["kept"] += 1
+                if len(samples["kept"]) < DIFF_SAMPLE_SIZE:
+                    samples["kept"].append(f"{key[0]} {key[1]}")
+        # Rejected rows may be shoes we couldn't match at all (e.g. a broken
+        # brand), and deleting cascades into users' rotations and graveyards
+        if prune and stats["rejected"]:
+            print(f"   ⚠️  Not pruning: {stats['rejected']:,} source records were rejected; "
+                  f"fix them and re-run with --prune")
+            prune = False
+        stats["missing"] = len(existing)
+        samples["missing"] = [f"{brand} {name}" for brand, name in islice(existing, DIFF_SAMPLE_SIZE)]
+        if prune and not dry_run and existing:
+            stats["deleted"] = delete_shoes([shoe_id for shoe_id, _ in existing.values()])
+        print_diff_report(stats, samples, prune and not dry_run)
+    if not dry_run:
+        report()
+    return stats
+
+
+def load_catalog_file(path: str, offset: int = 0, **options: Any) -> Dict[str, int]:
+    """Stream a CSV or JSONL file (optionally .gz) into the shoes table; see load_records"""
+    return load_records(read_records(path, offset), offset=offset, **options)
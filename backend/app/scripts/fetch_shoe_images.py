@@ -3,6 +3,15 @@
 Shoe Image Fetcher for TurnOver
 Fetches shoe images from The Sneaker Database API (RapidAPI) and updates the database
 
+Lookups run concurrently over one pooled HTTP client. A token bucket keeps the
+request rate under the RapidAPI quota, and 429/5xx responses are retried with
+jittered exponential backoff. Responses are cached on disk and runs checkpoint
+their progress, so re-runs only query what is new and crashed runs resume.
+Image URLs are written back in batches through the update_shoe_images RPC
+(migration 006), which touches only the image columns.
+With --mirror, each image is also downloaded into the local image mirror and its
+thumbnail URLs are recorded on the shoe (see app/scripts/image_mirror.py).
+
 Usage:
     python -m app.scripts.fetch_shoe_images
     
@@ -10,19 +19,35 @@ Usage:
     python -m app.scripts.fetch_shoe_images --dry-run    # Preview without updating DB
     python -m app.scripts.fetch_shoe_images --limit 5    # Process only first 5 shoes
     python -m app.scripts.fetch_shoe_images --force      # Re-fetch even if image exists
+    python -m app.scripts.fetch_shoe_images --concurrency 16 --rate 10
+    python -m app.scripts.fetch_shoe_images --api-url http://localhost:9000  # Mock server
+    python -m app.scripts.fetch_shoe_images --offline    # Use cached lookups only, no network
+    python -m app.scripts.fetch_shoe_images --restart    # Ignore the previous run's checkpoint
+    python -m app.scripts.fetch_shoe_images --batch-size 200 --flush-interval 10
+    python -m app.scripts.fetch_shoe_images --mirror     # Also mirror images + thumbnails locally
 """
 
 import sys
 import argparse
+import asyncio
+import random
 import time
 import httpx
-from typing import Optional, Dict, Any, List
+from contextlib import nullcontext
+from typing import Callable, Optional, Dict, Any, List, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, '.')
 
-from app.core.supabase import supabase_admin
+from app.core.supabase import get_supabase_server
 from app.core.config import settings
+from app.scripts.image_mirror import ImageMirror, pillow_available
+from app.scripts.sneaker_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_NEGATIVE_TTL_SECONDS,
+    DEFAULT_TTL_SECONDS,
+    SneakerCache,
+)
 
 
 # ============================================
@@ -32,7 +57,49 @@ RAPIDAPI_HOST = "the-sneaker-database.p.rapidapi.com"
 API_BASE_URL = f"https://{RAPIDAPI_HOST}"
 
 # Rate limiting - be respectful of API limits
-REQUEST_DELAY_SECONDS = 0.5  # Delay between API requests
+DEFAULT_CONCURRENCY = 8  # Lookups in flight at once
+DEFAULT_REQUESTS_PER_SECOND = 2.0  # Sustained request rate allowed by the quota
+REQUEST_TIMEOUT_SECONDS = 15.0
+
+# Retries for throttled (429) and server-side (5xx) failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+# Batched database writes
+DEFAULT_WRITE_BATCH_SIZE = 100  # Image URLs per write
+DEFAULT_FLUSH_INTERVAL_SECONDS = 5.0  # Flush a partial batch after this long
+WRITE_RETRIES = 3
+
+# PostgREST caps responses at 1000 rows by default
+SHOE_PAGE_SIZE = 1000
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter.
+    Refills `rate` tokens per second up to `capacity`; each request takes one.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available, then take it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 def get_headers() -> Dict[str, str]:
@@ -43,16 +110,70 @@ def get_headers() -> Dict[str, str]:
     }
 
 
-def search_sneaker(brand: str, name: str) -> Optional[Dict[str, Any]]:
+def create_client(
+    api_base_url: str = API_BASE_URL,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """Create the shared, connection-pooled API client (`transport` replaces the network, e.g. in tests)"""
+    return httpx.AsyncClient(
+        base_url=api_base_url,
+        headers=get_headers(),
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        transport=transport,
+    )
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry `attempt` (0-based): Retry-After if given, else full jitter"""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+async def get_with_retry(
+    client: httpx.AsyncClient,
+    limiter: TokenBucket,
+    url: str,
+    params: Dict[str, Any],
+    stats: Optional[Dict[str, int]] = None,
+) -> httpx.Response:
+    """GET through the rate limiter, retrying 429s and 5xx with jittered backoff"""
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire()
+        response = await client.get(url, params=params)
+        if response.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+            return response
+        if stats is not None:
+            stats["retries"] += 1
+        await asyncio.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+    return response
+
+
+async def query_sneaker(
+    client: httpx.AsyncClient,
+    limiter: TokenBucket,
+    brand: str,
+    name: str,
+    stats: Optional[Dict[str, int]] = None,
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
     """
     Search for a sneaker in The Sneaker Database
     
     Args:
+        client: Shared API client from create_client()
+        limiter: Rate limiter shared by all lookups
         brand: The shoe brand (e.g., "Nike", "ASICS")
         name: The shoe model name (e.g., "Pegasus 41")
     
     Returns:
-        The best matching sneaker data, or None if not found
+        (definitive, sneaker_data): sneaker_data is the best match or None.
+        `definitive` is False when the lookup failed (timeout, API error)
+        and the result should not be cached.
     """
     try:
         # The Sneaker Database API endpoint: /sneakers with brand, name, and limit params
@@ -62,10 +183,8 @@ def search_sneaker(brand: str, name: str) -> Optional[Dict[str, Any]]:
             "brand": brand,
             "name": name
         }
-        url = f"{API_BASE_URL}/sneakers"
         
-        with httpx.Client(timeout=15.0) as client:
-            response = client.get(url, headers=get_headers(), params=params)
+        response = await get_with_retry(client, limiter, "/sneakers", params, stats)
         
         if response.status_code == 200:
             data = response.json()
@@ -74,15 +193,17 @@ def search_sneaker(brand: str, name: str) -> Optional[Dict[str, Any]]:
             results = data.get('results', [])
             if results and len(results) > 0:
                 # Return the first (best) match
-                return results[0]
+                return True, results[0]
             else:
-                print(f"   ⚠️  No results found")
+                print(f"   ⚠️  No results found for: {brand} {name}")
+                return True, None
         
         elif response.status_code == 404:
             print(f"   ⚠️  No results found for: {brand} {name}")
+            return True, None
         else:
             print(f"   ❌ API error ({response.status_code}): {response.text[:100]}")
-            
+    
     except httpx.TimeoutException:
         print(f"   ⏱️  Timeout searching for: {brand} {name}")
     except httpx.RequestError as e:
@@ -90,7 +211,51 @@ def search_sneaker(brand: str, name: str) -> Optional[Dict[str, Any]]:
     except Exception as e:
         print(f"   ❌ Unexpected error: {str(e)[:100]}")
     
-    return None
+    return False, None
+
+
+async def search_sneaker(
+    client: httpx.AsyncClient,
+    limiter: TokenBucket,
+    brand: str,
+    name: str,
+    stats: Optional[Dict[str, int]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Search for a sneaker, returning the best match or None"""
+    _, sneaker_data = await query_sneaker(client, limiter, brand, name, stats)
+    return sneaker_data
+
+
+async def lookup_sneaker(
+    brand: str,
+    name: str,
+    client: Optional[httpx.AsyncClient],
+    limiter: TokenBucket,
+    cache: Optional[SneakerCache],
+    stats: Dict[str, int],
+    offline: bool = False,
+    refresh: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Cached sneaker search. Fresh cache entries (including cached misses) are
+    served without a request; offline lookups also accept expired entries and
+    never touch the network.
+    """
+    if cache is not None and not refresh:
+        hit, sneaker_data = cache.get(brand, name, allow_expired=offline)
+        if hit:
+            stats["cache_hits"] += 1
+            return sneaker_data
+    
+    if offline or client is None:
+        stats["uncached"] += 1
+        return None
+    
+    stats["lookups"] += 1
+    definitive, sneaker_data = await query_sneaker(client, limiter, brand, name, stats)
+    if definitive and cache is not None:
+        cache.put(brand, name, sneaker_data)
+    return sneaker_data
 
 
 def extract_image_url(sneaker_data: Dict[str, Any]) -> Optional[str]:
@@ -106,7 +271,7 @@ def extract_image_url(sneaker_data: Dict[str, Any]) -> Optional[str]:
     # Try common image field names
     image_fields = [
         'image',
-        'thumbnail', 
+        'thumbnail',
         'imageUrl',
         'image_url',
         'main_picture_url',
@@ -143,31 +308,197 @@ def extract_image_url(sneaker_data: Dict[str, Any]) -> Optional[str]:
 
 
 def get_all_shoes() -> List[Dict[str, Any]]:
-    """Fetch all shoes from the database"""
+    """Fetch all shoes from the database, page by page (keyset on id), in brand order"""
+    shoes: List[Dict[str, Any]] = []
+    last_id = None
     try:
-        response = supabase_admin.table("shoes").select("*").order("brand").execute()
-        return response.data or []
+        while True:
+            query = get_supabase_server().table("shoes").select("*")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            page = query.order("id").limit(SHOE_PAGE_SIZE).execute().data or []
+            shoes.extend(page)
+            if len(page) < SHOE_PAGE_SIZE:
+                break
+            last_id = page[-1]["id"]
     except Exception as e:
         print(f"❌ Failed to fetch shoes: {str(e)}")
         return []
+    shoes.sort(key=lambda shoe: (shoe["brand"], shoe["name"]))
+    return shoes
 
 
-def update_shoe_image(shoe_id: str, image_url: str) -> bool:
-    """Update a shoe's image URL in the database"""
-    try:
-        supabase_admin.table("shoes").update({
-            "image_url": image_url
-        }).eq("id", shoe_id).execute()
+def update_shoe_images(updates: List[Dict[str, Any]]) -> int:
+    """
+    Write a batch of image updates ({"id", "image_url"[, "image_variants"]}) in
+    one round trip. Only the image columns are written, so the rest of the
+    row may have changed since the run read it. Returns the shoes changed.
+    """
+    response = get_supabase_server().rpc("update_shoe_images", {"updates": updates}).execute()
+    return response.data or 0
+
+
+class ImageUpdateWriter:
+    """
+    Buffers image URL updates and flushes them as batched writes.
+    A batch is flushed when it reaches `batch_size`, when `flush_interval`
+    seconds pass, and on close. Failed flushes are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        stats: Dict[str, int],
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        on_written: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.stats = stats
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "ImageUpdateWriter":
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def add(
+        self,
+        shoe: Dict[str, Any],
+        image_url: str,
+        image_variants: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Queue one shoe's new image URL (and mirrored variants, if any)"""
+        row: Dict[str, Any] = {"id": shoe["id"], "image_url": image_url}
+        if image_variants is not None:
+            row["image_variants"] = image_variants
+        elif image_url != shoe.get("image_url"):
+            # The image endpoint prefers variants, so stale ones would keep serving the old picture
+            row["image_variants"] = None
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write everything buffered so far"""
+        async with self._lock:
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                changed = await asyncio.to_thread(update_shoe_images, batch)
+                break
+            except Exception as e:
+                if attempt == WRITE_RETRIES:
+                    print(f"   ❌ Failed to write batch of {len(batch)}: {str(e)[:100]}")
+                    self.stats["errors"] += len(batch)
+                    return
+                await asyncio.sleep(backoff_delay(attempt))
+        
+        print(f"   💾 Wrote batch of {len(batch)} image URLs ({changed} changed)")
+        self.stats["updated"] += changed
+        self.stats["writes"] += 1
+        if self.on_written:
+            self.on_written([row["id"] for row in batch])
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            # Shielded: stopping the timer mustn't abandon a batch mid-write
+            await asyncio.shield(self.flush())
+
+    async def close(self) -> None:
+        """Stop the flush timer and write whatever is left"""
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        # Waits on the lock for a periodic flush that was already running
+        await self.flush()
+
+
+async def process_shoe(
+    position: str,
+    shoe: Dict[str, Any],
+    client: Optional[httpx.AsyncClient],
+    limiter: TokenBucket,
+    cache: Optional[SneakerCache],
+    writer: ImageUpdateWriter,
+    stats: Dict[str, int],
+    dry_run: bool,
+    force: bool,
+    offline: bool = False,
+    refresh_cache: bool = False,
+    mirror: Optional[ImageMirror] = None,
+) -> bool:
+    """
+    Look up one shoe and queue its image URL for writing.
+    Returns True if the shoe is finished now, False if it is waiting on a write.
+    """
+    brand = shoe['brand']
+    name = shoe['name']
+    label = f"{position} {brand} {name}"
+    
+    # Skip if already has image (unless force flag is set)
+    if shoe.get('image_url') and not force:
+        if mirror is None or shoe.get('image_variants'):
+            print(f"{label}\n   ✓ Already has image, skipping")
+            stats["skipped"] += 1
+            return True
+        # Known image that hasn't been mirrored yet: no lookup needed
+        image_url = shoe['image_url']
+        print(f"{label}\n   🪞 Mirroring existing image")
+    else:
+        sneaker_data = await lookup_sneaker(
+            brand, name, client, limiter, cache, stats, offline=offline, refresh=refresh_cache
+        )
+        image_url = extract_image_url(sneaker_data) if sneaker_data else None
+        
+        if not image_url:
+            if sneaker_data:
+                print(f"{label}\n   ⚠️  Found shoe data but no image URL")
+            stats["not_found"] += 1
+            return True
+        
+        print(f"{label}\n   🖼️  Found image: {image_url[:60]}...")
+        stats["found"] += 1
+    
+    if dry_run:
+        print(f"   🔍 [DRY RUN] Would update database")
         return True
-    except Exception as e:
-        print(f"   ❌ Failed to update database: {str(e)}")
-        return False
+    
+    image_variants = await mirror.mirror(image_url, stats) if mirror is not None else None
+    await writer.add(shoe, image_url, image_variants)
+    return False
 
 
-def fetch_and_update_images(
+async def fetch_and_update_images(
     dry_run: bool = False,
     limit: Optional[int] = None,
-    force: bool = False
+    force: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+    api_base_url: str = API_BASE_URL,
+    cache: Optional[SneakerCache] = None,
+    offline: bool = False,
+    refresh_cache: bool = False,
+    run_id: str = "default",
+    resume: bool = True,
+    batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    mirror_images: bool = False,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
 ) -> Dict[str, int]:
     """
     Main function to fetch images and update the database
@@ -176,6 +507,18 @@ def fetch_and_update_images(
         dry_run: If True, don't actually update the database
         limit: Maximum number of shoes to process
         force: If True, re-fetch even if image already exists
+        concurrency: Number of lookups in flight at once
+        requests_per_second: Sustained API request rate
+        api_base_url: API root (point at a local mock server for testing)
+        cache: Lookup cache and checkpoint store (None disables both)
+        offline: If True, derive images from cached lookups only
+        refresh_cache: If True, ignore cached lookups (results are still stored)
+        run_id: Checkpoint name; a run with the same id resumes from it
+        resume: If False, discard the checkpoint and start over
+        batch_size: Image URLs per database write
+        flush_interval: Seconds before a partial batch is written
+        mirror_images: If True, mirror each image locally with thumbnails
+        transport: HTTP transport for the API and image clients (e.g. httpx.MockTransport)
     
     Returns:
         Stats dictionary with counts
@@ -183,10 +526,20 @@ def fetch_and_update_images(
     stats = {
         "total": 0,
         "skipped": 0,
+        "resumed": 0,
+        "lookups": 0,
+        "cache_hits": 0,
+        "uncached": 0,
+        "retries": 0,
         "found": 0,
         "not_found": 0,
         "updated": 0,
-        "errors": 0
+        "writes": 0,
+        "images_mirrored": 0,
+        "images_deduplicated": 0,
+        "images_unchanged": 0,
+        "errors": 0,
+        "elapsed_ms": 0,
     }
     
     print("📋 Fetching shoes from database...")
@@ -201,75 +554,110 @@ def fetch_and_update_images(
         shoes = shoes[:limit]
     
     stats["total"] = len(shoes)
-    print(f"📦 Processing {len(shoes)} shoes...\n")
     
-    for i, shoe in enumerate(shoes, 1):
-        shoe_id = shoe['id']
-        brand = shoe['brand']
-        name = shoe['name']
-        current_image = shoe.get('image_url')
-        
-        print(f"[{i}/{len(shoes)}] {brand} {name}")
-        
-        # Skip if already has image (unless force flag is set)
-        if current_image and not force:
-            print(f"   ✓ Already has image, skipping")
-            stats["skipped"] += 1
-            continue
-        
-        # Search for the sneaker
-        sneaker_data = search_sneaker(brand, name)
-        
-        if sneaker_data:
-            image_url = extract_image_url(sneaker_data)
-            
-            if image_url:
-                print(f"   🖼️  Found image: {image_url[:60]}...")
-                stats["found"] += 1
-                
-                if not dry_run:
-                    if update_shoe_image(shoe_id, image_url):
-                        print(f"   ✅ Updated in database")
-                        stats["updated"] += 1
-                    else:
-                        stats["errors"] += 1
-                else:
-                    print(f"   🔍 [DRY RUN] Would update database")
-            else:
-                print(f"   ⚠️  Found shoe data but no image URL")
-                stats["not_found"] += 1
+    # Resume from the checkpoint of an interrupted run
+    checkpoints = cache is not None and not dry_run
+    if checkpoints:
+        if resume:
+            completed = cache.completed(run_id)
+            shoes = [shoe for shoe in shoes if shoe['id'] not in completed]
+            stats["resumed"] = stats["total"] - len(shoes)
+            if stats["resumed"]:
+                print(f"⏩ Resuming run '{run_id}': {stats['resumed']} shoes already done")
         else:
-            stats["not_found"] += 1
+            cache.clear_run(run_id)
+    
+    mode = "offline" if offline else f"{concurrency} concurrent, {requests_per_second:g} req/s"
+    print(f"📦 Processing {len(shoes)} shoes ({mode})...\n")
+    
+    started = time.perf_counter()
+    limiter = TokenBucket(requests_per_second)
+    pending = iter(enumerate(shoes, 1))
+
+    def mark_completed(shoe_ids: List[str]) -> None:
+        if checkpoints:
+            for shoe_id in shoe_ids:
+                cache.mark_completed(run_id, shoe_id)
+    
+    client_context = nullcontext() if offline else create_client(api_base_url, concurrency, transport)
+    image_client_context = nullcontext()
+    if mirror_images and not offline:
+        # No keep-alive: the mirror connects to checked addresses, and a
+        # connection opened for one host must not carry another host's request
+        image_client_context = httpx.AsyncClient(
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=0),
+            transport=transport,
+        )
+    writer = ImageUpdateWriter(stats, batch_size, flush_interval, on_written=mark_completed)
+    
+    # The writer flushes on exit, including when the run is interrupted
+    async with client_context as client, image_client_context as image_client, writer:
+        mirror = ImageMirror(image_client, cache) if image_client is not None else None
+
+        async def worker() -> None:
+            # Workers share one iterator, so at most `concurrency` shoes are in flight
+            # One shoe failing unexpectedly must not cancel the others (and the final flush)
+            for i, shoe in pending:
+                position = f"[{i}/{len(shoes)}]"
+                try:
+                    done = await process_shoe(
+                        position, shoe, client, limiter, cache, writer, stats,
+                        dry_run, force, offline=offline, refresh_cache=refresh_cache, mirror=mirror,
+                    )
+                except Exception as e:
+                    print(f"{position} {shoe['brand']} {shoe['name']}\n   ❌ Unexpected error: {str(e)[:100]}")
+                    stats["errors"] += 1
+                    continue
+                if done:
+                    mark_completed([shoe['id']])
         
-        # Rate limiting
-        if i < len(shoes):
-            time.sleep(REQUEST_DELAY_SECONDS)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    
+    # A clean finish needs no checkpoint; keep it if some shoes must be retried
+    if checkpoints and not stats["errors"]:
+        cache.clear_run(run_id)
     
+    stats["elapsed_ms"] = int((time.perf_counter() - started) * 1000)
     return stats
 
 
 def print_stats(stats: Dict[str, int], dry_run: bool):
     """Print summary statistics"""
+    elapsed = stats["elapsed_ms"] / 1000
     print("\n" + "=" * 50)
     print("📊 Summary")
     print("=" * 50)
     print(f"   Total processed: {stats['total']}")
+    if stats["resumed"]:
+        print(f"   Done in previous run: {stats['resumed']}")
     print(f"   Already had images: {stats['skipped']}")
     print(f"   Images found: {stats['found']}")
     print(f"   Images not found: {stats['not_found']}")
+    print(f"   API lookups: {stats['lookups']} ({stats['retries']} retries)")
+    print(f"   Cache hits: {stats['cache_hits']}")
+    if stats["uncached"]:
+        print(f"   Not in cache (offline): {stats['uncached']}")
+    if elapsed:
+        print(f"   Elapsed: {elapsed:.1f}s ({stats['lookups'] / elapsed:.1f} lookups/s, "
+              f"{stats['total'] / elapsed:.1f} shoes/s)")
     if not dry_run:
-        print(f"   Successfully updated: {stats['updated']}")
+        print(f"   Successfully updated: {stats['updated']} ({stats['writes']} batched writes)")
+        if stats["images_mirrored"] or stats["images_deduplicated"] or stats["images_unchanged"]:
+            print(f"   Images mirrored: {stats['images_mirrored']} "
+                  f"({stats['images_deduplicated']} duplicates, {stats['images_unchanged']} unchanged)")
         print(f"   Errors: {stats['errors']}")
     else:
         print(f"   [DRY RUN - No changes made]")
 
 
-def test_api_connection():
+async def test_api_connection(api_base_url: str = API_BASE_URL) -> bool:
     """Test the API connection with a known sneaker"""
     print("🔗 Testing API connection...")
     
     # Test with a popular shoe that should definitely be in the database
-    test_data = search_sneaker("Nike", "Air Max")
+    async with create_client(api_base_url, concurrency=1) as client:
+        test_data = await search_sneaker(client, TokenBucket(1), "Nike", "Air Max")
     
     if test_data:
         print("✅ API connection successful!")
@@ -294,6 +682,34 @@ def main():
     parser.add_argument("--limit", type=int, help="Maximum number of shoes to process")
     parser.add_argument("--force", action="store_true", help="Re-fetch even if image already exists")
     parser.add_argument("--test", action="store_true", help="Test API connection only")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Lookups in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f"Max API requests per second (default: {DEFAULT_REQUESTS_PER_SECOND:g})")
+    parser.add_argument("--api-url", default=API_BASE_URL,
+                        help="API base URL, e.g. a local mock server")
+    parser.add_argument("--offline", action="store_true",
+                        help="Use cached lookups only, making no API requests")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH,
+                        help=f"Lookup cache file (default: {DEFAULT_CACHE_PATH})")
+    parser.add_argument("--cache-ttl-days", type=float, default=DEFAULT_TTL_SECONDS / 86400,
+                        help="Days before a cached match is re-queried")
+    parser.add_argument("--negative-ttl-days", type=float, default=DEFAULT_NEGATIVE_TTL_SECONDS / 86400,
+                        help="Days before a cached miss is re-queried")
+    parser.add_argument("--refresh-cache", action="store_true",
+                        help="Ignore cached lookups and query the API again")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the lookup cache and checkpoints")
+    parser.add_argument("--run-id", default="default",
+                        help="Checkpoint name; re-running with the same id resumes")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard the checkpoint and process every shoe again")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_WRITE_BATCH_SIZE,
+                        help=f"Image URLs per database write (default: {DEFAULT_WRITE_BATCH_SIZE})")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL_SECONDS,
+                        help="Seconds before a partial batch is written")
+    parser.add_argument("--mirror", action="store_true",
+                        help=f"Mirror images locally with thumbnails (into {settings.IMAGE_MIRROR_DIR}/)")
     
     args = parser.parse_args()
     
@@ -302,32 +718,67 @@ def main():
     print("=" * 50)
     
     # Check Supabase connection
-    if not supabase_admin:
+    if not get_supabase_server():
         print("❌ Supabase not configured. Please check your .env file.")
         sys.exit(1)
     
-    # Check RapidAPI key
-    if not settings.RAPIDAPI_KEY:
-        print("❌ RAPIDAPI_KEY not configured. Please add it to your .env file.")
-        print("   Example: RAPIDAPI_KEY=your_key_here")
+    if args.offline and args.no_cache:
+        print("❌ --offline needs the lookup cache; drop --no-cache.")
+        sys.exit(1)
+    
+    if args.mirror and not pillow_available():
+        print("❌ --mirror needs Pillow: pip install 'turnover-backend[images]'")
         sys.exit(1)
     
-    print(f"🔑 Using RapidAPI key: {settings.RAPIDAPI_KEY[:10]}...")
+    if args.mirror and args.offline:
+        print("⚠️  Image mirroring downloads images, so it is skipped in --offline mode")
     
-    # Test API connection first
-    if args.test or not test_api_connection():
-        if args.test:
-            return
-        print("\n⚠️  Continuing anyway - some requests may fail")
+    if not args.offline:
+        # Check RapidAPI key
+        if not settings.RAPIDAPI_KEY:
+            print("❌ RAPIDAPI_KEY not configured. Please add it to your .env file.")
+            print("   Example: RAPIDAPI_KEY=your_key_here")
+            sys.exit(1)
+        
+        print(f"🔑 Using RapidAPI key: {settings.RAPIDAPI_KEY[:10]}...")
+        
+        # Test API connection first
+        if args.test or not asyncio.run(test_api_connection(args.api_url)):
+            if args.test:
+                return
+            print("\n⚠️  Continuing anyway - some requests may fail")
+    
+    cache = None
+    if not args.no_cache:
+        cache = SneakerCache(
+            args.cache_path,
+            ttl_seconds=args.cache_ttl_days * 86400,
+            negative_ttl_seconds=args.negative_ttl_days * 86400,
+        )
+        print(f"🗄️  Lookup cache: {args.cache_path}")
     
     print()
     
     # Run the main fetch and update process
-    stats = fetch_and_update_images(
+    stats = asyncio.run(fetch_and_update_images(
         dry_run=args.dry_run,
         limit=args.limit,
-        force=args.force
-    )
+        force=args.force,
+        concurrency=args.concurrency,
+        requests_per_second=args.rate,
+        api_base_url=args.api_url,
+        cache=cache,
+        offline=args.offline,
+        refresh_cache=args.refresh_cache,
+        run_id=args.run_id,
+        resume=not args.restart,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        mirror_images=args.mirror,
+    ))
+    
+    if cache is not None:
+        cache.close()
     
     # Print summary
     print_stats(stats, args.dry_run)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for TurnOver
+Produces realistic catalogs and users at production scale for load testing
+
+Distributions (brands, categories, tags per category, spec ranges) are derived
+from SHOES_DATA. Users get profiles, rotations and graveyards; shoe popularity
+and ratings are skewed the way real usage is. Every entity is generated from
+its own RNG seeded by (seed, kind, index), so output is byte-for-byte
+reproducible and any slice can be regenerated without the rest. IDs are
+uuid5s of the same inputs, so rotations can reference shoes without holding
+the catalog in memory.
+
+Usage:
+    python -m app.scripts.generate_synthetic_data --shoes 100000 --users 10000
+
+    Or with options:
+    python -m app.scripts.generate_synthetic_data --out fixtures/large --gzip
+    python -m app.scripts.generate_synthetic_data --shoes 1000000 --users 100000 --seed 7
+    python -m app.scripts.generate_synthetic_data --target supabase --shoes 5000 --users 200
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+from app.scripts.seed_database import SHOES_DATA
+
+# ============================================
+# DISTRIBUTIONS
+# ============================================
+DEFAULT_SEED = 42
+DEFAULT_SHOES = 10_000
+DEFAULT_USERS = 1_000
+DEFAULT_OUT_DIR = "fixtures/synthetic"
+SPEC_FIELDS = ("weight", "drop", "stack_height_forefoot")  # Heel = forefoot + drop
+
+# Fixed reference point so timestamps don't depend on when the script runs
+REFERENCE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+ID_NAMESPACE = uuid.UUID("6f1c7a52-3b0e-4d5e-9a51-0f6f3d2b7c10")
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Casey", "Riley", "Morgan", "Jamie",
+               "Avery", "Quinn", "Devon", "Kai", "Rowan", "Emerson", "Hayden", "Skyler"]
+LAST_NAMES = ["Kim", "Patel", "Garcia", "Smith", "Nguyen", "Okafor", "Rossi", "Muller",
+              "Silva", "Cohen", "Tanaka", "Brown", "Novak", "Haddad", "Larsen", "Walsh"]
+REVIEW_SNIPPETS = ["Great for easy miles", "Too firm for me", "Wore out fast",
+                   "Best race shoe I've owned", "Solid daily trainer", "Ran a PR in these"]
+
+# Ratings lean positive, like real review data
+RATING_WEIGHTS = {1: 4, 2: 7, 3: 17, 4: 36, 5: 36}
+POPULARITY_SKEW = 3.0  # Higher = more rotations concentrated on the top shoes
+MEAN_ROTATION_SIZE = 3
+MEAN_GRAVEYARD_SIZE = 4
+
+
+def _stem(name: str) -> str:
+    """Model line without its version, e.g. 'Gel-Nimbus 26' -> 'Gel-Nimbus'"""
+    words = name.split()
+    while len(words) > 1 and re.search(r"\d", words[-1]):
+        words.pop()
+    return " ".join(words)
+
+
+class CatalogDistribution:
+    """Empirical distributions of the seed catalog"""
+
+    def __init__(self, shoes: List[Dict[str, Any]]):
+        brand_counts = Counter(shoe["brand"] for shoe in shoes)
+        category_counts = Counter(shoe["category"] for shoe in shoes)
+        self.brands = list(brand_counts)
+        self.brand_weights = [brand_counts[brand] for brand in self.brands]
+        self.categories = list(category_counts)
+        self.category_weights = [category_counts[category] for category in self.categories]
+
+        stems: Dict[str, set] = defaultdict(set)
+        tag_counts: Dict[str, Counter] = defaultdict(Counter)
+        tag_sizes: Dict[str, Counter] = defaultdict(Counter)
+        specs: Dict[Tuple[str, str], List[float]] = defaultdict(list)
+        for shoe in shoes:
+            category = shoe["category"]
+            stems[shoe["brand"]].add(_stem(shoe["name"]))
+            tag_counts[category].update(shoe["tags"])
+            tag_sizes[category][len(shoe["tags"])] += 1
+            for field in SPEC_FIELDS:
+                specs[(category, field)].append(float(shoe[field]))
+
+        self.stems = {brand: sorted(values) for brand, values in stems.items()}
+        self.tags = {category: list(counts) for category, counts in tag_counts.items()}
+        self.tag_weights = {category: list(counts.values()) for category, counts in tag_counts.items()}
+        self.tag_sizes = {category: (list(sizes), list(sizes.values())) for category, sizes in tag_sizes.items()}
+        # (mean, stdev, min, max) per category and field
+        self.specs = {
+            key: (statistics.mean(values), statistics.pstdev(values) or 1.0, min(values), max(values))
+            for key, values in specs.items()
+        }
+
+    def spec(self, rng: random.Random, category: str, field: str) -> float:
+        """Gaussian around the seed data, clamped to a margin around its range"""
+        mean, stdev, low, high = self.specs[(category, field)]
+        margin = (high - low) * 0.1
+        value = min(max(rng.gauss(mean, stdev), low - margin), high + margin)
+        return round(max(value, 0.0), 0 if field == "weight" else 1)
+
+    def sample_tags(self, rng: random.Random, category: str) -> List[str]:
+        sizes, size_weights = self.tag_sizes[category]
+        size = rng.choices(sizes, size_weights)[0]
+        tags, weights = list(self.tags[category]), list(self.tag_weights[category])
+        chosen: List[str] = []
+        while tags and len(chosen) < size:
+            index = rng.choices(range(len(tags)), weights)[0]
+            chosen.append(tags.pop(index))
+            weights.pop(index)
+        return chosen
+
+
+# ============================================
+# GENERATORS
+# ============================================
+
+def entity_rng(seed: int, kind: str, index: int) -> random.Random:
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def entity_id(seed: int, kind: str, index: int) -> str:
+    return str(uuid.uuid5(ID_NAMESPACE, f"{seed}:{kind}:{index}"))
+
+
+def _timestamp(rng: random.Random, max_days_ago: int) -> str:
+    moment = REFERENCE_DATE - timedelta(seconds=rng.randrange(max_days_ago * 86400))
+    return moment.isoformat()
+
+
+def generate_shoe(index: int, seed: int = DEFAULT_SEED, dist: Optional[CatalogDistribution] = None) -> Dict[str, Any]:
+    """One catalog row; the same (index, seed) always gives the same shoe"""
+    dist = dist or DISTRIBUTION
+    rng = entity_rng(seed, "shoe", index)
+    brand = rng.choices(dist.brands, dist.brand_weights)[0]
+    category = rng.choices(dist.categories, dist.category_weights)[0]
+    forefoot = dist.spec(rng, category, "stack_height_forefoot")
+    drop = dist.spec(rng, category, "drop")
+    created_at = _timestamp(rng, 3 * 365)
+    return {
+        "id": entity_id(seed, "shoe", index),
+        "brand": brand,
+        # The index keeps (brand, name) unique at any catalog size
+        "name": f"{rng.choice(dist.stems[brand])} {index + 1}",
+        "category": category,
+        "tags": dist.sample_tags(rng, category),
+        "weight": dist.spec(rng, category, "weight"),
+        "drop": drop,
+        "stack_height_heel": round(forefoot + drop, 1),
+        "stack_height_forefoot": forefoot,
+        "image_url": None,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def generate_shoes(count: int, seed: int = DEFAULT_SEED, start: int = 0) -> Iterator[Dict[str, Any]]:
+    for index in range(start, count):
+        yield generate_shoe(index, seed)
+
+
+def _popular_shoe(rng: random.Random, shoe_count: int) -> int:
+    """Shoe index with a power-law skew towards low indices (the 'popular' shoes)"""
+    return min(int(shoe_count * rng.random() ** POPULARITY_SKEW), shoe_count - 1)
+
+
+def _geometric(rng: random.Random, mean: float) -> int:
+    """Non-negative count with the given mean and a long tail"""
+    count = 0
+    while rng.random() < mean / (mean + 1):
+        count += 1
+    return count
+
+
+def generate_user(index: int, shoe_count: int, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    One user with their profile, rotation and graveyard rows.
+    `shoe_count` must match the generated catalog so shoe IDs resolve.
+    """
+    rng = entity_rng(seed, "user", index)
+    user_id = entity_id(seed, "user", index)
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    joined_at = _timestamp(rng, 2 * 365)
+
+    preferred = [category for category in DISTRIBUTION.categories if rng.random() < 0.4]
+    profile = {
+        "id": entity_id(seed, "profile", index),
+        "user_id": user_id,
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": f"runner{index}@synthetic.example.com",
+        "avg_miles_per_week": round(min(rng.lognormvariate(3.0, 0.5), 150.0), 1),
+        "preferred_categories": preferred,
+        "created_at": joined_at,
+        "updated_at": joined_at,
+    }
+
+    rotation_shoes = {_popular_shoe(rng, shoe_count) for _ in range(_geometric(rng, MEAN_ROTATION_SIZE))}
+    rotation = [
+        {
+            "id": entity_id(seed, f"rotation:{index}", shoe),
+            "user_id": user_id,
+            "shoe_id": entity_id(seed, "shoe", shoe),
+            "start_date": _timestamp(rng, 365),
+        }
+        for shoe in sorted(rotation_shoes)
+    ]
+
+    graveyard = []
+    for position in range(_geometric(rng, MEAN_GRAVEYARD_SIZE)):
+        shoe = _popular_shoe(rng, shoe_count)
+        retired_at = _timestamp(rng, 2 * 365)
+        graveyard.append({
+            "id": entity_id(seed, f"graveyard:{index}", position),
+            "user_id": user_id,
+            "shoe_id": entity_id(seed, "shoe", shoe),
+            "retired_at": retired_at,
+            "rating": rng.choices(list(RATING_WEIGHTS), list(RATING_WEIGHTS.values()))[0],
+            "review": rng.choice(REVIEW_SNIPPETS) if rng.random() < 0.3 else None,
+            "miles_run": round(rng.uniform(150, 600), 1),
+            "created_at": retired_at,
+            "updated_at": retired_at,
+        })
+
+    return {"profile": profile, "rotation": rotation, "graveyard": graveyard}
+
+
+def generate_users(count: int, shoe_count: int, seed: int = DEFAULT_SEED) -> Iterator[Dict[str, Any]]:
+    for index in range(count):
+        yield generate_user(index, shoe_count, seed)
+
+
+DISTRIBUTION = CatalogDistribution(SHOES_DATA)
+
+
+# ============================================
+# OUTPUT
+# ============================================
+
+class FixtureWriter:
+    """One JSONL file per table under `directory`"""
+
+    TABLES = ("shoes", "profiles", "rotation", "graveyard")
+
+    def __init__(self, directory: str, compress: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        suffix = ".jsonl.gz" if compress else ".jsonl"
+        self.paths = {table: os.path.join(directory, f"{table}{suffix}") for table in self.TABLES}
+        self._files = {
+            table: gzip.open(path, "wt", encoding="utf-8") if compress else open(path, "w", encoding="utf-8")
+            for table, path in self.paths.items()
+        }
+        self.counts = Counter()
+
+    def write(self, table: str, rows: Iterable[Dict[str, Any]]) -> None:
+        f = self._files[table]
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")))
+            f.write("\n")
+            self.counts[table] += 1
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+def read_fixture(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream rows back out of a fixture file written by FixtureWriter"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_fixtures(directory: str, shoes: int, users: int, seed: int, compress: bool) -> Dict[str, int]:
+    writer = FixtureWriter(directory, compress)
+    try:
+        writer.write("shoes", generate_shoes(shoes, seed))
+        for user in generate_users(users, shoes, seed):
+            writer.write("profiles", [user["profile"]])
+            writer.write("rotation", user["rotation"])
+            writer.write("graveyard", user["graveyard"])
+    finally:
+        writer.close()
+    print(f"📁 Wrote fixtures to {directory}/")
+    return dict(writer.counts)
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_supabase(shoes: int, users: int, seed: int, batch_size: int, workers: int) -> Dict[str, int]:
+    """
+    Upsert the data into the configured project. Users are created through
+    the auth admin API (the signup trigger creates their profile rows).
+    """
+    from app.core.supabase import get_supabase_server
+
+    supabase_admin = get_supabase_server()
+    counts: Counter = Counter()
+
+    def upsert(table: str, rows: List[Dict[str, Any]], on_conflict: str) -> None:
+        supabase_admin.table(table).upsert(rows, on_conflict=on_conflict, returning="minimal").execute()
+        counts[table] += len(rows)
+
+    def create_user(user: Dict[str, Any]) -> None:
+        profile = user["profile"]
+        try:
+            supabase_admin.auth.admin.create_user({
+                "id": profile["user_id"],
+                "email": profile["email"],
+                "password": f"synthetic-{seed}-{profile['user_id'][:8]}",
+                "email_confirm": True,
+                "user_metadata": {"first_name": profile["first_name"], "last_name": profile["last_name"]},
+            })
+        except Exception as e:
+            # Re-runs find the user already there, which is fine
+            if "already" not in str(e).lower():
+                raise
+        counts["users"] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        shoe_rows = ({k: v for k, v in shoe.items() if k not in ("created_at", "updated_at")}
+                     for shoe in generate_shoes(shoes, seed))
+        list(pool.map(lambda batch: upsert("shoes", batch, "id"), _batches(shoe_rows, batch_size)))
+        print(f"   Shoes: {counts['shoes']:,}")
+
+        for chunk in _batches(generate_users(users, shoes, seed), batch_size):
+            list(pool.map(create_user, chunk))
+            profiles = [
+                {k: user["profile"][k] for k in ("user_id", "first_name", "last_name", "email",
+                                                 "avg_miles_per_week", "preferred_categories")}
+                for user in chunk
+            ]
+            upsert("profiles", profiles, "user_id")
+            rotation = [row for user in chunk for row in user["rotation"]]
+            graveyard = [row for user in chunk for row in user["graveyard"]]
+            if rotation:
+                upsert("rotation", rotation, "id")
+            if graveyard:
+                upsert("graveyard", graveyard, "id")
+            print(f"   Users: {counts['users']:,}")
+    return dict(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic TurnOver data for scale testing")
+    parser.add_argument("--shoes", type=int, default=DEFAULT_SHOES, help="Catalog size")
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS, help="Number of users")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed; same seed, same data")
+    parser.add_argument("--target", choices=["fixtures", "supabase"], default="fixtures",
+                        help="Write JSONL fixtures locally or upsert into Supabase")
+    parser.add_argument("--out", type=str, default=DEFAULT_OUT_DIR, help="Fixture directory")
+    parser.add_argument("--gzip", action="store_true", help="Compress fixture files")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per Supabase upsert")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent Supabase requests")
+
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("🧪 TurnOver Synthetic Data Generator")
+    print("=" * 50)
+    print(f"   {args.shoes:,} shoes, {args.users:,} users, seed {args.seed}")
+
+    if args.shoes < 1:
+        print("❌ --shoes must be at least 1")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        if args.target == "supabase":
+            counts = write_supabase(args.shoes, args.users, args.seed, args.batch_size, args.workers)
+        else:
+            counts = write_fixtures(args.out, args.shoes, args.users, args.seed, args.gzip)
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Generation failed: {str(e)}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - started
+    print("\n📊 Rows written:")
+    for table, count in counts.items():
+        print(f"   {table}: {count:,}")
+    print(f"   ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
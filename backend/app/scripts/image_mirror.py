@@ -0,0 +1,182 @@
+"""
+Local mirror for shoe images.
+
+Each source image is downloaded once and stored under its content hash, so the
+same picture used by several shoes (or re-fetched from a new URL) is kept only
+once. Fixed-width WebP thumbnails are generated next to the original, and the
+URLs of those variants are recorded on the shoe. Validators from the last
+download (ETag, Last-Modified) are sent back as conditional request headers,
+so unchanged images cost a 304 and no processing.
+
+Source URLs come from the catalog, so downloads go through the image proxy's
+guards (app/core/image_cache.py): every redirect hop must be a public host and
+is fetched from the address that was checked, and bodies are streamed and cut
+off past MAX_IMAGE_BYTES.
+
+Layout: <root>/<hash[:2]>/<hash>/original and <root>/<hash[:2]>/<hash>/<width>.webp
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.image_cache import (
+    MAX_REDIRECTS,
+    ImageFetchError,
+    check_public_url,
+    pinned_request,
+    read_capped,
+)
+from app.scripts.sneaker_cache import SneakerCache
+
+THUMBNAIL_WIDTHS = (160, 320, 640)
+THUMBNAIL_FORMAT = "webp"
+THUMBNAIL_QUALITY = 80
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+def pillow_available() -> bool:
+    """Thumbnails need the optional `Pillow` dependency"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write via a uniquely named temp file, so writers racing on one content hash never mix"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def render_thumbnails(original: bytes, directory: str, widths=THUMBNAIL_WIDTHS) -> None:
+    """Write one WebP per width (never upscaled) into `directory`"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(original)) as image:
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for width in widths:
+            variant = image.copy()
+            variant.thumbnail((width, width * 4))
+            buf = io.BytesIO()
+            variant.save(buf, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY, method=6)
+            _write_atomic(os.path.join(directory, f"{width}.{THUMBNAIL_FORMAT}"), buf.getvalue())
+
+
+class ImageMirror:
+    """Downloads, deduplicates and resizes shoe images into a local directory"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        cache: Optional[SneakerCache] = None,
+        root: Optional[str] = None,
+        base_url: Optional[str] = None,
+        widths=THUMBNAIL_WIDTHS,
+    ):
+        self.client = client
+        self.cache = cache
+        self.root = root or settings.IMAGE_MIRROR_DIR
+        self.base_url = (base_url or settings.IMAGE_MIRROR_BASE_URL).rstrip("/")
+        self.widths = widths
+
+    def _directory(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def variant_urls(self, content_hash: str) -> Dict[str, str]:
+        """Public URLs of each thumbnail, keyed by width"""
+        prefix = f"{self.base_url}/{content_hash[:2]}/{content_hash}"
+        return {str(width): f"{prefix}/{width}.{THUMBNAIL_FORMAT}" for width in self.widths}
+
+    def _has_variants(self, content_hash: str) -> bool:
+        directory = self._directory(content_hash)
+        return all(
+            os.path.exists(os.path.join(directory, f"{width}.{THUMBNAIL_FORMAT}"))
+            for width in self.widths
+        )
+
+    async def _download(self, source_url: str, headers: Dict[str, str]) -> Tuple[httpx.Response, bytes]:
+        """
+        The final response (after redirects) and its body, which is only read
+        for a 200. Raises ImageFetchError for a non-public hop, too many
+        redirects or a body over MAX_IMAGE_BYTES.
+        """
+        location = source_url
+        for _ in range(MAX_REDIRECTS + 1):
+            address = await check_public_url(location)
+            request = pinned_request(location, address)
+            request["headers"].update(headers)
+            async with self.client.stream("GET", **request) as response:
+                if response.is_redirect and "Location" in response.headers:
+                    location = str(httpx.URL(location).join(response.headers["Location"]))
+                    continue
+                if response.status_code != 200:
+                    return response, b""
+                return response, await read_capped(response, MAX_IMAGE_BYTES)
+        raise ImageFetchError("Image host redirected too many times")
+
+    async def mirror(self, source_url: str, stats: Optional[Dict[str, int]] = None) -> Optional[Dict[str, str]]:
+        """
+        Mirror one image and return its variant URLs, or None if it could not
+        be downloaded or decoded.
+        """
+        stats = stats if stats is not None else {}
+        known = self.cache.get_image(source_url) if self.cache else None
+
+        headers = {}
+        if known and self._has_variants(known[2]):
+            etag, last_modified, _ = known
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        try:
+            response, body = await self._download(source_url, headers)
+        except (httpx.HTTPError, ImageFetchError) as e:
+            print(f"   ❌ Image download failed: {str(e)[:100]}")
+            return None
+
+        if response.status_code == 304 and known:
+            stats["images_unchanged"] = stats.get("images_unchanged", 0) + 1
+            return self.variant_urls(known[2])
+        if response.status_code != 200:
+            print(f"   ❌ Image download failed ({response.status_code}): {source_url[:60]}")
+            return None
+
+        content_hash = hashlib.sha256(body).hexdigest()
+        if self._has_variants(content_hash):
+            stats["images_deduplicated"] = stats.get("images_deduplicated", 0) + 1
+        else:
+            directory = self._directory(content_hash)
+            os.makedirs(directory, exist_ok=True)
+            try:
+                # Decoding and resizing is CPU-bound; keep it off the event loop
+                await asyncio.to_thread(render_thumbnails, body, directory, self.widths)
+            except Exception as e:
+                print(f"   ❌ Could not process image: {str(e)[:100]}")
+                return None
+            _write_atomic(os.path.join(directory, "original"), body)
+            stats["images_mirrored"] = stats.get("images_mirrored", 0) + 1
+
+        if self.cache:
+            self.cache.put_image(
+                source_url,
+                content_hash,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return self.variant_urls(content_hash)
@@ -9,17 +9,28 @@ Usage:
     Or with options:
     python -m app.scripts.seed_database --clear  # Clear existing data first
     python -m app.scripts.seed_database --verify # Just verify connection
+    python -m app.scripts.seed_database --file catalog.csv            # Load a catalog file
+    python -m app.scripts.seed_database --file catalog.jsonl.gz --offset 250000 --workers 8
+    python -m app.scripts.seed_database --diff       # Only upsert new or changed shoes
+    python -m app.scripts.seed_database --dry-run    # Print the diff without writing
+    python -m app.scripts.seed_database --file catalog.csv --prune  # Also delete shoes missing from the file
 """
 
 import sys
 import argparse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, '.')
 
-from app.core.supabase import supabase_admin
+from app.core.supabase import get_supabase_server
 from app.core.config import settings
+from app.scripts.catalog_loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    load_catalog_file,
+    load_records,
+)
 
 
 # ============================================
@@ -222,7 +233,7 @@ def verify_connection() -> bool:
         print(f"🔗 Connecting to Supabase: {settings.SUPABASE_URL[:50]}...")
         
         # Try a simple query to verify connection
-        response = supabase_admin.table("shoes").select("count", count="exact").limit(1).execute()
+        response = get_supabase_server().table("shoes").select("count", count="exact").limit(1).execute()
         
         print(f"✅ Connection successful!")
         print(f"   Current shoe count: {response.count or 0}")
@@ -239,7 +250,7 @@ def clear_shoes() -> bool:
         print("🗑️  Clearing existing shoe data...")
         
         # Delete all shoes (this will cascade to rotation and graveyard)
-        supabase_admin.table("shoes").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
+        get_supabase_server().table("shoes").delete().neq("id", "00000000-0000-0000-0000-000000000000").execute()
         
         print("✅ Shoes cleared successfully!")
         return True
@@ -261,7 +272,7 @@ def seed_shoes() -> bool:
         for i in range(0, len(SHOES_DATA), batch_size):
             batch = SHOES_DATA[i:i + batch_size]
             
-            response = supabase_admin.table("shoes").upsert(
+            response = get_supabase_server().table("shoes").upsert(
                 batch,
                 on_conflict="brand,name"  # Update if exists
             ).execute()
@@ -278,33 +289,65 @@ def seed_shoes() -> bool:
         return False
 
 
+def sync_shoes(path: Optional[str], offset: int = 0, **options: Any) -> bool:
+    """
+    Stream a CSV/JSONL catalog file (or SHOES_DATA when no path is given) into
+    the database. Options are passed to load_records (workers, batch_size, diff,
+    prune, dry_run).
+    """
+    source = path or "SHOES_DATA"
+    try:
+        print(f"🌱 Loading shoes from {source}" + (f" (from record {offset})" if offset else "") + "...")
+        
+        if path:
+            stats = load_catalog_file(path, offset=offset, **options)
+        else:
+            stats = load_records(enumerate(SHOES_DATA), **options)
+        
+        if options.get("dry_run"):
+            print("🔍 [DRY RUN] No changes written")
+            return True
+        
+        seconds = stats["elapsed_ms"] / 1000
+        rate = stats["upserted"] / seconds if seconds else 0.0
+        print(f"✅ Loaded {stats['upserted']:,} shoes in {stats['batches']:,} batches "
+              f"({rate:,.0f} rows/s, final batch size {stats['batch_size']})")
+        if stats["rejected"] or stats["unknown_tags"]:
+            print(f"   Rejected records: {stats['rejected']:,}, unknown tags dropped: {stats['unknown_tags']:,}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Failed to load {source}: {str(e)}")
+        return False
+
+
 def show_stats():
     """Show current database statistics"""
     try:
         print("\n📊 Database Statistics:")
         
-        # Total shoes
-        response = supabase_admin.table("shoes").select("*", count="exact").execute()
-        print(f"   Total shoes: {response.count or 0}")
+        # One grouped aggregate on the server (migration 005) instead of
+        # downloading every shoe to count brands here
+        stats = get_supabase_server().rpc("catalog_stats").execute().data or {}
+        print(f"   Total shoes: {stats.get('total', 0)}")
         
         # By category
+        categories = stats.get("categories") or {}
         for category in ["daily", "workout", "race"]:
-            cat_response = supabase_admin.table("shoes").select("*", count="exact").eq("category", category).execute()
-            print(f"   {category.capitalize()}: {cat_response.count or 0}")
+            print(f"   {category.capitalize()}: {categories.get(category, 0)}")
         
         # By brand
         print("\n   Shoes by brand:")
-        all_shoes = response.data or []
-        brand_counts = {}
-        for shoe in all_shoes:
-            brand = shoe.get("brand", "Unknown")
-            brand_counts[brand] = brand_counts.get(brand, 0) + 1
-        
-        for brand, count in sorted(brand_counts.items()):
+        for brand, count in sorted((stats.get("brands") or {}).items()):
             print(f"   - {brand}: {count}")
+        
+        # By tag
+        print("\n   Shoes by tag:")
+        for tag, count in sorted((stats.get("tags") or {}).items(), key=lambda item: (-item[1], item[0])):
+            print(f"   - {tag}: {count}")
             
     except Exception as e:
-        print(f"⚠️  Could not fetch stats: {str(e)}")
+        print(f"⚠️  Could not fetch stats (is migration 005 applied?): {str(e)}")
 
 
 def main():
@@ -312,6 +355,15 @@ def main():
     parser.add_argument("--clear", action="store_true", help="Clear existing data before seeding")
     parser.add_argument("--verify", action="store_true", help="Only verify connection, don't seed")
     parser.add_argument("--stats", action="store_true", help="Show database statistics")
+    parser.add_argument("--file", type=str, help="Load shoes from a CSV/JSONL file instead of SHOES_DATA")
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many records of --file (resume)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Upsert batches in flight")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Initial upsert batch size (adapts to latency)")
+    parser.add_argument("--diff", action="store_true", help="Only upsert shoes that are new or changed")
+    parser.add_argument("--prune", action="store_true",
+                        help="Delete shoes missing from the source (implies --diff; cascades to rotations)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff report without writing")
     
     args = parser.parse_args()
     
@@ -332,12 +384,23 @@ def main():
         show_stats()
         return
     
-    if args.clear:
+    if args.clear and not args.dry_run:
         if not clear_shoes():
             sys.exit(1)
     
     # Seed the database
-    if not seed_shoes():
+    if args.file or args.diff or args.prune or args.dry_run:
+        if not sync_shoes(
+            args.file,
+            offset=args.offset,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            diff=args.diff,
+            prune=args.prune,
+            dry_run=args.dry_run,
+        ):
+            sys.exit(1)
+    elif not seed_shoes():
         sys.exit(1)
     
     # Show final stats
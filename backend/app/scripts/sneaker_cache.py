@@ -0,0 +1,137 @@
+"""
+On-disk cache for Sneaker Database lookups, plus run checkpoints.
+
+Responses are keyed by normalized (brand, name). Misses are cached too, with a
+shorter TTL, so a shoe the API doesn't know isn't re-queried on every run.
+Checkpoints record which shoes a run has finished, so an interrupted run
+resumes where it stopped. Mirrored images keep their validators (ETag,
+Last-Modified) here so unchanged images are skipped with conditional requests.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+DEFAULT_CACHE_PATH = ".cache/sneaker_lookups.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # Found sneakers rarely change
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600  # Retry misses daily
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lookups (
+    key TEXT PRIMARY KEY,
+    response TEXT,            -- JSON sneaker data, NULL for a cached miss
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS images (
+    source_url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    shoe_id TEXT NOT NULL,
+    PRIMARY KEY (run_id, shoe_id)
+);
+"""
+
+
+def normalize_key(brand: str, name: str) -> str:
+    """Case- and whitespace-insensitive lookup key"""
+    return "|".join(re.sub(r"\s+", " ", part).strip().lower() for part in (brand, name))
+
+
+class SneakerCache:
+    """SQLite-backed lookup cache with TTLs and per-run checkpoints"""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+    ):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ============ Lookups ============
+
+    def get(self, brand: str, name: str, allow_expired: bool = False) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Return (hit, sneaker_data). A hit with None data is a cached miss.
+        Expired entries count as misses unless `allow_expired` is set.
+        """
+        row = self._db.execute(
+            "SELECT response, fetched_at FROM lookups WHERE key = ?",
+            (normalize_key(brand, name),),
+        ).fetchone()
+        if row is None:
+            return False, None
+
+        response, fetched_at = row
+        ttl = self.ttl_seconds if response is not None else self.negative_ttl_seconds
+        if not allow_expired and time.time() - fetched_at > ttl:
+            return False, None
+        return True, json.loads(response) if response is not None else None
+
+    def put(self, brand: str, name: str, sneaker_data: Optional[Dict[str, Any]]) -> None:
+        """Store a lookup result (None records a miss)"""
+        self._db.execute(
+            "INSERT OR REPLACE INTO lookups (key, response, fetched_at) VALUES (?, ?, ?)",
+            (
+                normalize_key(brand, name),
+                json.dumps(sneaker_data) if sneaker_data is not None else None,
+                time.time(),
+            ),
+        )
+
+    # ============ Mirrored images ============
+
+    def get_image(self, source_url: str) -> Optional[Tuple[Optional[str], Optional[str], str]]:
+        """Return (etag, last_modified, content_hash) of a mirrored image, if known"""
+        return self._db.execute(
+            "SELECT etag, last_modified, content_hash FROM images WHERE source_url = ?",
+            (source_url,),
+        ).fetchone()
+
+    def put_image(
+        self,
+        source_url: str,
+        content_hash: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO images (source_url, etag, last_modified, content_hash, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (source_url, etag, last_modified, content_hash, time.time()),
+        )
+
+    # ============ Checkpoints ============
+
+    def completed(self, run_id: str) -> Set[str]:
+        """IDs of shoes already finished by this run"""
+        rows = self._db.execute("SELECT shoe_id FROM checkpoints WHERE run_id = ?", (run_id,))
+        return {shoe_id for (shoe_id,) in rows}
+
+    def mark_completed(self, run_id: str, shoe_id: str) -> None:
+        self._db.execute(
+            "INSERT OR IGNORE INTO checkpoints (run_id, shoe_id) VALUES (?, ?)",
+            (run_id, shoe_id),
+        )
+
+    def clear_run(self, run_id: str) -> None:
+        """Forget a run's progress (after it finishes, or to start over)"""
+        self._db.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
@@ -0,0 +1,9 @@
+# Test helpers
+from app.testing.fake_supabase import FakeClient, FakeDatabase, LatencyModel, install_fake_supabase
+
+__all__ = [
+    "FakeClient",
+    "FakeDatabase",
+    "LatencyModel",
+    "install_fake_supabase",
+]
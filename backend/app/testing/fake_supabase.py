@@ -0,0 +1,870 @@
+"""
+In-process fake of the Supabase client for offline load testing.
+
+Implements the subset of the PostgREST query builder the app uses (select
+with many-to-one embeds, eq/neq/gt/gte/lt/lte/ilike/in_/contains/overlaps/or_,
+order, range, limit, single, insert, upsert, update, delete, exact counts and
+rpc) plus the auth calls the routers make. Row Level Security follows the
+policies in supabase/migrations: user-owned tables are filtered by `user_id`
+for authenticated clients, while the service client bypasses RLS. Every
+execute() can sleep for a configurable, seeded latency, so benchmarks run
+locally and deterministically.
+
+Usage:
+    db = FakeDatabase(latency=LatencyModel(0.002))
+    db.load_fixtures("fixtures/synthetic")
+    with install_fake_supabase(db):
+        ...  # app.main now talks to `db`
+"""
+
+import fnmatch
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from postgrest import APIError, APIResponse
+from postgrest.base_request_builder import SingleAPIResponse
+from supabase_auth.errors import AuthApiError
+from supabase_auth.types import AuthResponse, Session, User, UserResponse
+
+from app.core.timing import db_call
+
+Row = Dict[str, Any]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============ Schema ============
+
+@dataclass
+class TableSpec:
+    """Constraints and RLS policies of one table, mirroring the migrations"""
+    unique: List[Tuple[str, ...]] = field(default_factory=list)
+    defaults: Dict[str, Callable[[], Any]] = field(default_factory=dict)
+    references: Dict[str, Tuple[str, str]] = field(default_factory=dict)  # embed -> (fk column, table)
+    owner: Optional[str] = None  # Column compared with auth.uid()
+    select: str = "owner"  # "public" or "owner"
+    insert: Optional[str] = "owner"  # "authenticated", "owner" or None (service only)
+    update: Optional[str] = "owner"
+    delete: Optional[str] = "owner"
+
+
+def _timestamps() -> Dict[str, Callable[[], Any]]:
+    return {"created_at": _now, "updated_at": _now}
+
+
+SCHEMA: Dict[str, TableSpec] = {
+    "profiles": TableSpec(
+        unique=[("user_id",)],
+        defaults={"avg_miles_per_week": lambda: 0, "preferred_categories": list, **_timestamps()},
+        owner="user_id",
+        delete=None,
+    ),
+    "shoes": TableSpec(
+        unique=[("brand", "name")],
+        defaults={"tags": list, "image_url": lambda: None, "image_variants": lambda: None, **_timestamps()},
+        select="public",
+        insert="authenticated",
+        update=None,
+        delete=None,
+    ),
+    "rotation": TableSpec(
+        unique=[("user_id", "shoe_id")],
+        defaults={"start_date": _now, "created_at": _now},
+        references={"shoes": ("shoe_id", "shoes")},
+        owner="user_id",
+        update=None,
+    ),
+    "graveyard": TableSpec(
+        defaults={"retired_at": _now, "review": lambda: None, "miles_run": lambda: None, **_timestamps()},
+        references={"shoes": ("shoe_id", "shoes")},
+        owner="user_id",
+    ),
+}
+
+
+class LatencyModel:
+    """Per-call delay: `base` seconds plus seeded uniform jitter, overridable per (table, operation)"""
+
+    def __init__(
+        self,
+        base: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+        overrides: Optional[Dict[Tuple[str, str], float]] = None,
+    ):
+        self.base = base
+        self.jitter = jitter
+        self.overrides = overrides or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, table: str, operation: str) -> float:
+        base = self.overrides.get((table, operation), self.overrides.get((table, "*"), self.base))
+        if not self.jitter:
+            return base
+        with self._lock:
+            return base + self._rng.uniform(0, self.jitter)
+
+
+# ============ Filters ============
+
+def _coerce(actual: Any, expected: Any) -> Any:
+    """Filter values arrive as strings on the wire; compare them as the column's type"""
+    if isinstance(expected, str) and isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        try:
+            return float(expected)
+        except ValueError:
+            return expected
+    if isinstance(expected, str) and isinstance(actual, bool):
+        return expected.lower() == "true"
+    return expected
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    if op == "is":
+        return actual is None if expected in (None, "null") else actual == expected
+    if actual is None:
+        return False
+    if op in ("eq", "neq", "gt", "gte", "lt", "lte"):
+        expected = _coerce(actual, expected)
+        if op == "eq":
+            return actual == expected
+        if op == "neq":
+            return actual != expected
+        if op == "gt":
+            return actual > expected
+        if op == "gte":
+            return actual >= expected
+        if op == "lt":
+            return actual < expected
+        return actual <= expected
+    if op in ("like", "ilike"):
+        pattern = str(expected).replace("%", "*")
+        if op == "ilike":
+            return fnmatch.fnmatchcase(str(actual).lower(), pattern.lower())
+        return fnmatch.fnmatchcase(str(actual), pattern)
+    if op == "in":
+        return actual in [_coerce(actual, value) for value in expected]
+    if op == "cs":
+        return set(expected) <= set(actual)
+    if op == "ov":
+        return bool(set(expected) & set(actual))
+    raise APIError({"code": "PGRST100", "message": f"Unsupported operator in fake: {op}"})
+
+
+def _parse_or(expression: str) -> List[Tuple[str, str, Any]]:
+    """Parse `col.op.value,col.op.value` (no nested and/or)"""
+    conditions = []
+    for part in expression.split(","):
+        column, op, value = part.split(".", 2)
+        conditions.append((column, op, value))
+    return conditions
+
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+@dataclass
+class SelectItem:
+    name: str  # Column or embedded table ("*" for all columns)
+    alias: str
+    children: Optional[List["SelectItem"]] = None  # Set for embeds
+
+
+def parse_select(columns: str) -> List[SelectItem]:
+    items = []
+    for part in _split_top_level(columns or "*"):
+        alias = None
+        if ":" in part.split("(")[0]:
+            alias, part = part.split(":", 1)
+        if "(" in part:
+            name, inner = part.split("(", 1)
+            items.append(SelectItem(name.strip(), (alias or name).strip(), parse_select(inner[:-1])))
+        else:
+            items.append(SelectItem(part.strip(), (alias or part).strip()))
+    return items
+
+
+# ============ Database ============
+
+class FakeDatabase:
+    """Tables, users and sessions shared by every FakeClient"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, schema: Optional[Dict[str, TableSpec]] = None):
+        self.schema = schema or SCHEMA
+        self.latency = latency or LatencyModel()
+        self.tables: Dict[str, Dict[str, Row]] = {name: {} for name in self.schema}
+        self.users: Dict[str, Dict[str, Any]] = {}  # user_id -> {"user": User, "password": str}
+        self.tokens: Dict[str, str] = {}  # access/refresh token -> user_id
+        self.functions: Dict[str, Callable[["FakeDatabase", Dict[str, Any]], Any]] = {
+            "catalog_stats": _catalog_stats,
+            "update_shoe_images": _update_shoe_images,
+        }
+        self.views: Dict[str, Callable[["FakeDatabase"], List[Row]]] = {
+            "shoe_content_hashes": _shoe_content_hashes,
+        }
+        self.calls: Counter = Counter()  # (table, operation) -> count
+        self.lock = threading.RLock()
+
+    # ---- clients ----
+
+    def client(self, access_token: Optional[str] = None, service: bool = False) -> "FakeClient":
+        client = FakeClient(self, service=service)
+        if access_token:
+            client.postgrest.auth(access_token)
+        return client
+
+    # ---- users ----
+
+    def create_user(
+        self,
+        email: str,
+        password: str = "password",
+        user_metadata: Optional[Dict[str, Any]] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[User, str]:
+        """Create an auth user (and, like the signup trigger, their profile); returns (user, token)"""
+        with self.lock:
+            if any(entry["user"].email == email for entry in self.users.values()):
+                raise AuthApiError("User already registered", 422, "user_already_exists")
+            user_id = user_id or str(uuid.uuid4())
+            metadata = user_metadata or {}
+            user = User(
+                id=user_id,
+                email=email,
+                app_metadata={"provider": "email"},
+                user_metadata=metadata,
+                aud="authenticated",
+                role="authenticated",
+                created_at=_now(),
+            )
+            self.users[user_id] = {"user": user, "password": password}
+            if not any(row["user_id"] == user_id for row in self.tables["profiles"].values()):
+                self._insert_row("profiles", {
+                    "user_id": user_id,
+                    "first_name": metadata.get("first_name", ""),
+                    "last_name": metadata.get("last_name", ""),
+                    "email": email,
+                })
+        return user, self.issue_token(user_id)
+
+    def issue_token(self, user_id: str) -> str:
+        token = f"fake-{uuid.uuid4().hex}"
+        with self.lock:
+            self.tokens[token] = user_id
+        return token
+
+    def user_for_token(self, token: Optional[str]) -> Optional[User]:
+        user_id = self.tokens.get(token or "")
+        return self.users[user_id]["user"] if user_id in self.users else None
+
+    # ---- data ----
+
+    def load(self, table: str, rows: Iterator[Row]) -> int:
+        """Bulk-load rows without RLS, constraint checks or latency"""
+        count = 0
+        with self.lock:
+            target = self.tables[table]
+            for row in rows:
+                row = dict(row)
+                row.setdefault("id", str(uuid.uuid4()))
+                target[row["id"]] = row
+                count += 1
+        return count
+
+    def load_fixtures(self, directory: str, password: str = "password") -> Dict[str, int]:
+        """Load JSONL fixtures written by app.scripts.generate_synthetic_data"""
+        from app.scripts.generate_synthetic_data import FixtureWriter, read_fixture
+
+        counts = {}
+        for table in FixtureWriter.TABLES:
+            path = next(
+                (os.path.join(directory, f"{table}{suffix}") for suffix in (".jsonl", ".jsonl.gz")
+                 if os.path.exists(os.path.join(directory, f"{table}{suffix}"))),
+                None,
+            )
+            if path:
+                counts[table] = self.load(table, read_fixture(path))
+        self.register_profile_users(password)
+        return counts
+
+    def register_profile_users(self, password: str = "password") -> None:
+        """Create an auth user for every profile row that doesn't have one (after bulk loads)"""
+        with self.lock:
+            for profile in self.tables["profiles"].values():
+                if profile["user_id"] in self.users:
+                    continue
+                self.users[profile["user_id"]] = {
+                    "user": User(
+                        id=profile["user_id"],
+                        email=profile["email"],
+                        app_metadata={"provider": "email"},
+                        user_metadata={"first_name": profile["first_name"], "last_name": profile["last_name"]},
+                        aud="authenticated",
+                        role="authenticated",
+                        created_at=profile.get("created_at") or _now(),
+                    ),
+                    "password": password,
+                }
+
+    def _insert_row(self, table: str, row: Row) -> Row:
+        spec = self.schema[table]
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        for column, default in spec.defaults.items():
+            if column not in row:
+                row[column] = default()
+        self._check_constraints(table, row)
+        self.tables[table][row["id"]] = row
+        return row
+
+    def _conflict(self, table: str, row: Row, columns: Tuple[str, ...]) -> Optional[Row]:
+        if columns == ("id",):
+            return self.tables[table].get(row.get("id"))
+        key = tuple(row.get(column) for column in columns)
+        for existing in self.tables[table].values():
+            if tuple(existing.get(column) for column in columns) == key and existing is not row:
+                return existing
+        return None
+
+    def _check_constraints(self, table: str, row: Row) -> None:
+        spec = self.schema[table]
+        for columns in [("id",), *spec.unique]:
+            if self._conflict(table, row, columns) is not None:
+                raise APIError({
+                    "code": "23505",
+                    "message": f'duplicate key value violates unique constraint on {table}({", ".join(columns)})',
+                })
+        for column, target in spec.references.values():
+            if row.get(column) is not None and row[column] not in self.tables[target]:
+                raise APIError({
+                    "code": "23503",
+                    "message": f'insert or update on table "{table}" violates foreign key constraint on {column}',
+                })
+
+    def _cascade_delete(self, table: str, ids: List[str]) -> None:
+        doomed = set(ids)
+        for child, spec in self.schema.items():
+            for column, target in spec.references.values():
+                if target == table:
+                    for row_id in [row_id for row_id, row in self.tables[child].items() if row.get(column) in doomed]:
+                        del self.tables[child][row_id]
+
+
+def _catalog_stats(db: FakeDatabase, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Python twin of the catalog_stats() RPC (migration 005)"""
+    shoes = list(db.tables["shoes"].values())
+    tags: Counter = Counter()
+    for shoe in shoes:
+        tags.update(shoe.get("tags") or [])
+    return {
+        "total": len(shoes),
+        "categories": dict(Counter(shoe["category"] for shoe in shoes)),
+        "brands": dict(Counter(shoe["brand"] for shoe in shoes)),
+        "tags": dict(tags),
+    }
+
+
+def _update_shoe_images(db: FakeDatabase, params: Dict[str, Any]) -> int:
+    """Python twin of the update_shoe_images() RPC (migration 006)"""
+    shoes = db.tables["shoes"]
+    updated = 0
+    for update in params["updates"]:
+        shoe = shoes.get(update["id"])
+        if shoe is None:
+            continue
+        changes = {"image_url": update.get("image_url")}
+        if "image_variants" in update:
+            changes["image_variants"] = update["image_variants"]
+        if all(shoe.get(column) == value for column, value in changes.items()):
+            continue
+        shoes[shoe["id"]] = {**shoe, **changes, "updated_at": _now()}
+        updated += 1
+    return updated
+
+
+def _shoe_content_hashes(db: FakeDatabase) -> List[Row]:
+    """Python twin of the shoe_content_hashes view (migration 004)"""
+    from app.scripts.catalog_loader import content_hash
+
+    return [
+        {"id": shoe["id"], "brand": shoe["brand"], "name": shoe["name"], "content_hash": content_hash(shoe)}
+        for shoe in db.tables["shoes"].values()
+    ]
+
+
+# ============ Query builder ============
+
+class FakeQuery:
+    """Chainable stand-in for postgrest's request builders"""
+
+    def __init__(self, client: "FakeClient", table: str):
+        self.client = client
+        self.db = client.db
+        self.table = table
+        self.operation = "select"
+        self.columns = "*"
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+        self.minimal = False
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.or_filters: List[List[Tuple[str, str, Any]]] = []
+        self.orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+        self.cardinality: Optional[str] = None  # "single" or "maybe_single"
+
+    # ---- operations ----
+
+    def select(self, *columns: str, count: Optional[str] = None, **_: Any) -> "FakeQuery":
+        self.columns = ",".join(columns) if columns else "*"
+        self.count = count
+        return self
+
+    def insert(self, json: Any, *, count: Optional[str] = None, returning: Any = "representation",
+               upsert: bool = False, default_to_null: bool = True) -> "FakeQuery":
+        self.operation = "insert"
+        self.payload = json
+        self.count = count
+        self.minimal = str(getattr(returning, "value", returning)) == "minimal"
+        return self
+
+    def upsert(self, json: Any, *, count: Optional[str] = None, returning: Any = "representation",
+               ignore_duplicates: bool = False, on_conflict: str = "", default_to_null: bool = True) -> "FakeQuery":
+        self.insert(json, count=count, returning=returning)
+        self.operation = "upsert"
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, json: Dict[str, Any], *, count: Optional[str] = None, returning: Any = "representation") -> "FakeQuery":
+        self.operation = "update"
+        self.payload = json
+        self.count = count
+        return self
+
+    def delete(self, *, count: Optional[str] = None, returning: Any = "representation") -> "FakeQuery":
+        self.operation = "delete"
+        self.count = count
+        return self
+
+    # ---- filters ----
+
+    def _filter(self, column: str, op: str, value: Any) -> "FakeQuery":
+        self.filters.append((column, op, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        return self._filter(column, "in", list(values))
+
+    def contains(self, column: str, value: List[Any]) -> "FakeQuery":
+        return self._filter(column, "cs", list(value))
+
+    def overlaps(self, column: str, value: List[Any]) -> "FakeQuery":
+        return self._filter(column, "ov", list(value))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "FakeQuery":
+        self.or_filters.append(_parse_or(filters))
+        return self
+
+    # ---- modifiers ----
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None,
+              foreign_table: Optional[str] = None) -> "FakeQuery":
+        self.orders.append((f"{foreign_table}.{column}" if foreign_table else column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, *, foreign_table: Optional[str] = None) -> "FakeQuery":
+        self.max_rows = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "FakeQuery":
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self.cardinality = "single"
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self.cardinality = "maybe_single"
+        return self
+
+    # ---- execution ----
+
+    def execute(self) -> Any:
+        with db_call(self.table, self.operation):
+            return self._execute()
+
+    def _execute(self) -> Any:
+        delay = self.db.latency.delay(self.table, self.operation)
+        if delay:
+            time.sleep(delay)
+        with self.db.lock:
+            self.db.calls[(self.table, self.operation)] += 1
+            if self.operation == "select":
+                data, count = self._run_select()
+            elif self.operation in ("insert", "upsert"):
+                data, count = self._run_insert()
+            elif self.operation == "update":
+                data, count = self._run_update()
+            else:
+                data, count = self._run_delete()
+
+        if self.cardinality:
+            if len(data) > 1 or (not data and self.cardinality == "single"):
+                raise APIError({
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(data)} rows",
+                })
+            return SingleAPIResponse(data=data[0] if data else None, count=count)
+        return APIResponse(data=[] if self.minimal else data, count=count)
+
+    def _source_rows(self) -> List[Row]:
+        if self.table in self.db.views:
+            return self.db.views[self.table](self.db)
+        if self.table not in self.db.tables:
+            raise APIError({"code": "42P01", "message": f'relation "public.{self.table}" does not exist'})
+        return list(self.db.tables[self.table].values())
+
+    def _visible(self, row: Row, policy: Optional[str]) -> bool:
+        """RLS check for reading or changing an existing row"""
+        if self.client.service or policy == "public":
+            return True
+        spec = self.db.schema.get(self.table)
+        if policy is None or spec is None or spec.owner is None:
+            return False
+        return self.client.user_id is not None and row.get(spec.owner) == self.client.user_id
+
+    def _matches(self, row: Row) -> bool:
+        for column, op, value in self.filters:
+            if "." not in column and not _compare(op, row.get(column), value):
+                return False
+        return all(
+            any(_compare(op, row.get(column), value) for column, op, value in group)
+            for group in self.or_filters
+        )
+
+    def _embed(self, row: Row, item: SelectItem) -> Optional[Row]:
+        spec = self.db.schema.get(self.table)
+        column, target = spec.references[item.name] if spec and item.name in spec.references else (None, None)
+        if column is None:
+            raise APIError({"code": "PGRST200", "message": f"Could not find a relationship for '{item.name}'"})
+        parent = self.db.tables[target].get(row.get(column))
+        if parent is None:
+            return None
+        # Filters on an embedded resource null the embed rather than drop the row
+        for path, op, value in self.filters:
+            if path.startswith(f"{item.name}.") and not _compare(op, parent.get(path.split(".", 1)[1]), value):
+                return None
+        return self._project(parent, item.children or [])
+
+    def _project(self, row: Row, items: List[SelectItem], source: Optional[Row] = None) -> Row:
+        out: Row = {}
+        for item in items:
+            if item.children is not None:
+                out[item.alias] = self._embed(source or row, item)
+            elif item.name == "*":
+                out.update(row)
+            else:
+                out[item.alias] = row.get(item.name)
+        return out
+
+    def _sort(self, rows: List[Tuple[Row, Row]]) -> None:
+        # Stable sorts applied last key first give a multi-column order
+        for column, desc, nullsfirst in reversed(self.orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+
+            def key(pair: Tuple[Row, Row], column: str = column) -> Any:
+                if "." in column:
+                    embed, name = column.split(".", 1)
+                    value = (pair[1].get(embed) or {}).get(name)
+                else:
+                    value = pair[0].get(column)
+                return value
+
+            present = [pair for pair in rows if key(pair) is not None]
+            missing = [pair for pair in rows if key(pair) is None]
+            present.sort(key=key, reverse=desc)
+            rows[:] = missing + present if nulls_first else present + missing
+
+    def _matching(self, policy: Optional[str]) -> List[Row]:
+        return [row for row in self._source_rows() if self._visible(row, policy) and self._matches(row)]
+
+    def _run_select(self) -> Tuple[List[Row], Optional[int]]:
+        items = parse_select(self.columns)
+        spec = self.db.schema.get(self.table)
+        pairs = [(row, self._project(row, items)) for row in self._matching(spec.select if spec else "public")]
+        count = len(pairs) if self.count else None
+        self._sort(pairs)
+        end = None if self.max_rows is None else self.offset + self.max_rows
+        return [projected for _, projected in pairs[self.offset:end]], count
+
+    def _check_insert_policy(self, row: Row) -> None:
+        spec = self.db.schema[self.table]
+        if self.client.service:
+            return
+        allowed = (
+            spec.insert == "authenticated" and self.client.user_id is not None
+            or spec.insert == "owner" and self.client.user_id is not None
+            and row.get(spec.owner) == self.client.user_id
+        )
+        if not allowed:
+            raise APIError({
+                "code": "42501",
+                "message": f'new row violates row-level security policy for table "{self.table}"',
+            })
+
+    def _run_insert(self) -> Tuple[List[Row], Optional[int]]:
+        if self.table not in self.db.tables:
+            raise APIError({"code": "42P01", "message": f'relation "public.{self.table}" does not exist'})
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        spec = self.db.schema[self.table]
+        conflict_columns = tuple(c.strip() for c in self.on_conflict.split(",") if c.strip()) or ("id",)
+        written = []
+        for row in rows:
+            self._check_insert_policy(row)
+            existing = self.db._conflict(self.table, row, conflict_columns) if self.operation == "upsert" else None
+            if existing is None:
+                written.append(self.db._insert_row(self.table, row))
+                continue
+            if self.ignore_duplicates:
+                continue
+            if not self._visible(existing, spec.update):
+                raise APIError({
+                    "code": "42501",
+                    "message": f'new row violates row-level security policy (USING expression) for table "{self.table}"',
+                })
+            updated = {**existing, **row, "id": existing["id"]}
+            if "updated_at" in spec.defaults:
+                updated["updated_at"] = _now()
+            self.db.tables[self.table][existing["id"]] = updated
+            written.append(updated)
+        return [dict(row) for row in written], len(written) if self.count else None
+
+    def _run_update(self) -> Tuple[List[Row], Optional[int]]:
+        spec = self.db.schema[self.table]
+        updated = []
+        for row in self._matching(spec.update):
+            new_row = {**row, **self.payload, "id": row["id"]}
+            if "updated_at" in spec.defaults and "updated_at" not in self.payload:
+                new_row["updated_at"] = _now()
+            self.db.tables[self.table][row["id"]] = new_row
+            updated.append(dict(new_row))
+        return updated, len(updated) if self.count else None
+
+    def _run_delete(self) -> Tuple[List[Row], Optional[int]]:
+        spec = self.db.schema[self.table]
+        doomed = self._matching(spec.delete)
+        for row in doomed:
+            del self.db.tables[self.table][row["id"]]
+        self.db._cascade_delete(self.table, [row["id"] for row in doomed])
+        return [dict(row) for row in doomed], len(doomed) if self.count else None
+
+
+class FakeRPC:
+    def __init__(self, client: "FakeClient", name: str, params: Dict[str, Any]):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self) -> SingleAPIResponse:
+        with db_call(self.name, "rpc"):
+            return self._execute()
+
+    def _execute(self) -> SingleAPIResponse:
+        db = self.client.db
+        delay = db.latency.delay(self.name, "rpc")
+        if delay:
+            time.sleep(delay)
+        function = db.functions.get(self.name)
+        if function is None:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{self.name}"})
+        with db.lock:
+            db.calls[(self.name, "rpc")] += 1
+            return SingleAPIResponse(data=function(db, self.params), count=None)
+
+
+# ============ Clients ============
+
+class FakePostgrest:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+
+    def auth(self, token: str) -> None:
+        user = self.client.db.user_for_token(token)
+        self.client.user_id = user.id if user else None
+
+
+class FakeAdmin:
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+
+    def create_user(self, attributes: Dict[str, Any]) -> UserResponse:
+        user, _ = self.db.create_user(
+            attributes["email"],
+            attributes.get("password", ""),
+            attributes.get("user_metadata") or attributes.get("data"),
+            user_id=attributes.get("id"),
+        )
+        return UserResponse(user=user)
+
+
+class FakeAuth:
+    """The supabase.auth calls the routers make"""
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self.admin = FakeAdmin(db)
+
+    def _session(self, user: User) -> AuthResponse:
+        session = Session(
+            access_token=self.db.issue_token(user.id),
+            refresh_token=self.db.issue_token(user.id),
+            expires_in=3600,
+            token_type="bearer",
+            user=user,
+        )
+        return AuthResponse(user=user, session=session)
+
+    def get_user(self, jwt: Optional[str] = None) -> UserResponse:
+        user = self.db.user_for_token(jwt)
+        if user is None:
+            raise AuthApiError("Invalid JWT", 401, "bad_jwt")
+        return UserResponse(user=user)
+
+    def sign_up(self, credentials: Dict[str, Any]) -> AuthResponse:
+        options = credentials.get("options") or {}
+        user, _ = self.db.create_user(credentials["email"], credentials["password"], options.get("data"))
+        return self._session(user)
+
+    def sign_in_with_password(self, credentials: Dict[str, Any]) -> AuthResponse:
+        for entry in self.db.users.values():
+            if entry["user"].email == credentials.get("email") and entry["password"] == credentials.get("password"):
+                return self._session(entry["user"])
+        raise AuthApiError("Invalid login credentials", 400, "invalid_credentials")
+
+    def refresh_session(self, refresh_token: Optional[str] = None) -> AuthResponse:
+        user = self.db.user_for_token(refresh_token)
+        if user is None:
+            raise AuthApiError("Invalid Refresh Token", 400, "refresh_token_not_found")
+        return self._session(user)
+
+    def sign_out(self, options: Any = None) -> None:
+        return None
+
+
+class FakeClient:
+    """Drop-in for supabase.Client backed by a FakeDatabase"""
+
+    def __init__(self, db: FakeDatabase, service: bool = False):
+        self.db = db
+        self.service = service
+        self.user_id: Optional[str] = None
+        self.postgrest = FakePostgrest(self)
+        self.auth = FakeAuth(db)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None, **_: Any) -> FakeRPC:
+        return FakeRPC(self, name, params or {})
+
+
+# ============ Installation ============
+
+@contextmanager
+def install_fake_supabase(db: FakeDatabase) -> Iterator[FakeDatabase]:
+    """
+    Point the app at `db` for the duration of the block by swapping the
+    client accessors that modules imported from app.core.supabase.
+    """
+    import app.core.auth
+    import app.core.supabase
+    from app.core.catalog import catalog
+    from app.core.catalog_sync import catalog_sync
+    from app.core.config import settings
+
+    anon = db.client()
+    admin = db.client(service=True)
+    replacements = {"get_supabase_client": lambda: anon, "get_supabase_server": lambda: admin}
+    patched: List[Tuple[Any, str, Any]] = []
+
+    def patch(module: Any, name: str, value: Any) -> None:
+        patched.append((module, name, getattr(module, name)))
+        setattr(module, name, value)
+
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == "app" or module_name.startswith("app.")):
+            continue
+        for name, value in replacements.items():
+            if hasattr(module, name):
+                patch(module, name, value)
+    patch(app.core.auth, "get_authenticated_client", db.client)
+    # Fake rows must not end up in the snapshot file a real server starts from
+    patch(settings, "CATALOG_SNAPSHOT_PATH", "")
+    patch(catalog_sync, "path", "")
+    # The in-process catalog must not serve rows from the other backend
+    catalog.invalidate()
+    try:
+        yield db
+    finally:
+        for module, name, original in reversed(patched):
+            setattr(module, name, original)
+        catalog.invalidate()
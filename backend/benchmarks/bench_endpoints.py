@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmarks for the TurnOver API
+
+Drives every router in app.main in-process over ASGI, against the in-memory
+fake Supabase (app/testing/fake_supabase.py) filled with synthetic data.
+For each endpoint it reports p50/p95/p99 latency, requests per second and
+the peak memory allocated per request. Results can be saved as a JSON
+baseline, and later runs compared against it: the run fails when an endpoint's
+p95 latency or allocations regress past the threshold.
+
+Usage:
+    python -m benchmarks.bench_endpoints
+
+    Or with options:
+    python -m benchmarks.bench_endpoints --shoes 100000 --users 5000 --db-latency-ms 2
+    python -m benchmarks.bench_endpoints --only 'shoes.*' --iterations 500
+    python -m benchmarks.bench_endpoints --save-baseline      # Record benchmarks/baselines/endpoints.json
+    python -m benchmarks.bench_endpoints --compare            # Exit 1 on regressions
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+from app.main import app
+from app.scripts.generate_synthetic_data import generate_shoes, generate_users
+from app.testing import FakeDatabase, LatencyModel, install_fake_supabase
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "endpoints.json")
+DEFAULT_THRESHOLD = 0.20  # Fail when p95 / allocations grow by more than 20%...
+MIN_LATENCY_DELTA_MS = 0.5  # ...and by more than this much (ignore noise on fast endpoints)
+MIN_ALLOC_DELTA_KB = 16.0
+
+
+@dataclass
+class Context:
+    """IDs and credentials the endpoint requests are built from"""
+    client: httpx.AsyncClient
+    headers: Dict[str, str]
+    user_id: str
+    email: str
+    shoe_id: str
+
+
+Request = Callable[[Context], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Endpoint:
+    name: str
+    request: Request
+    expected: int = 200
+
+
+def get(path: str, auth: bool = False) -> Request:
+    async def request(ctx: Context) -> httpx.Response:
+        url = path.format(shoe_id=ctx.shoe_id, user_id=ctx.user_id)
+        return await ctx.client.get(url, headers=ctx.headers if auth else None)
+    return request
+
+
+async def sign_in(ctx: Context) -> httpx.Response:
+    return await ctx.client.post("/api/auth/signin", json={"email": ctx.email, "password": "password"})
+
+
+async def rotation_add_remove(ctx: Context) -> httpx.Response:
+    """Add a shoe to the rotation and take it out again, so the data stays put"""
+    added = await ctx.client.post("/api/rotation", json={"shoe_id": ctx.shoe_id}, headers=ctx.headers)
+    removed = await ctx.client.delete(f"/api/rotation/{ctx.shoe_id}", headers=ctx.headers)
+    return added if added.status_code != 201 else removed
+
+
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("health", get("/health")),
+    Endpoint("auth.signin", sign_in),
+    Endpoint("shoes.list", get("/api/shoes")),
+    Endpoint("shoes.filtered", get(
+        "/api/shoes?category=daily&tags=cushioned&min_weight=220&max_weight=300&sort_by=weight"
+    )),
+    Endpoint("shoes.search", get("/api/shoes?search=ghost")),
+    Endpoint("shoes.sparse", get("/api/shoes?fields=id,brand,name&page_size=100")),
+    Endpoint("shoes.facets", get("/api/shoes/facets?category=race")),
+    Endpoint("shoes.get", get("/api/shoes/{shoe_id}")),
+    Endpoint("shoes.export", get("/api/shoes/export?category=race&brand=Puma")),
+    Endpoint("users.me", get("/api/users/me", auth=True)),
+    Endpoint("users.stats", get("/api/users/{user_id}/stats", auth=True)),
+    Endpoint("rotation.list", get("/api/rotation", auth=True)),
+    Endpoint("rotation.add_remove", rotation_add_remove, expected=204),
+    Endpoint("graveyard.list", get("/api/graveyard", auth=True)),
+    Endpoint("graveyard.sorted", get("/api/graveyard?sort_by=name&sort_order=asc", auth=True)),
+    Endpoint("recommendations", get("/api/recommendations", auth=True)),
+    Endpoint("recommendations.similar", get("/api/recommendations/similar/{shoe_id}", auth=True)),
+]
+
+
+# ============================================
+# MEASUREMENT
+# ============================================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def measure(
+    endpoint: Endpoint,
+    ctx: Context,
+    iterations: int,
+    concurrency: int,
+    warmup: int,
+    alloc_samples: int,
+) -> Dict[str, Any]:
+    errors = 0
+
+    async def timed() -> float:
+        nonlocal errors
+        started = time.perf_counter_ns()
+        response = await endpoint.request(ctx)
+        elapsed_ms = (time.perf_counter_ns() - started) / 1e6
+        if response.status_code != endpoint.expected:
+            errors += 1
+        return elapsed_ms
+
+    for _ in range(warmup):
+        await timed()
+    errors = 0
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    remaining = iterations
+    while remaining > 0:
+        batch = min(concurrency, remaining)
+        latencies.extend(await asyncio.gather(*(timed() for _ in range(batch))))
+        remaining -= batch
+    wall = time.perf_counter() - started
+
+    # Allocation pass runs separately: tracemalloc would distort the timings
+    peaks: List[float] = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_samples):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await endpoint.request(ctx)
+            peaks.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    peaks.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "rps": round(iterations / wall, 1) if wall else 0.0,
+        "peak_alloc_kb": round(percentile(peaks, 0.50), 1),
+        "errors": errors,
+    }
+
+
+def build_database(shoes: int, users: int, seed: int, latency_ms: float, jitter_ms: float) -> FakeDatabase:
+    db = FakeDatabase(latency=LatencyModel(latency_ms / 1000, jitter_ms / 1000, seed=seed))
+    db.load("shoes", generate_shoes(shoes, seed))
+    for user in generate_users(users, shoes, seed):
+        db.load("profiles", [user["profile"]])
+        db.load("rotation", user["rotation"])
+        db.load("graveyard", user["graveyard"])
+    db.register_profile_users()
+    return db
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    print(f"🧪 Building fake database: {args.shoes:,} shoes, {args.users:,} users...")
+    db = build_database(args.shoes, args.users, args.seed, args.db_latency_ms, args.db_jitter_ms)
+    profile = next(iter(db.tables["profiles"].values()))
+    # The most popular shoe: every user-facing endpoint has data to work with
+    shoe_id = next(iter(db.tables["shoes"]))
+
+    results: Dict[str, Any] = {}
+    with install_fake_supabase(db):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ctx = Context(
+                client=client,
+                headers={"Authorization": f"Bearer {db.issue_token(profile['user_id'])}"},
+                user_id=profile["user_id"],
+                email=profile["email"],
+                shoe_id=shoe_id,
+            )
+            for endpoint in ENDPOINTS:
+                if args.only and not any(fnmatch.fnmatch(endpoint.name, pattern) for pattern in args.only):
+                    continue
+                result = await measure(
+                    endpoint, ctx, args.iterations, args.concurrency, args.warmup, args.alloc_samples
+                )
+                results[endpoint.name] = result
+                print(f"   {endpoint.name:<26} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                      f"p99 {result['p99_ms']:>8.2f}ms  {result['rps']:>8.1f} req/s  "
+                      f"{result['peak_alloc_kb']:>9.1f} KiB"
+                      + (f"  ⚠️  {result['errors']} errors" if result["errors"] else ""))
+
+    return {
+        "meta": {
+            "shoes": args.shoes,
+            "users": args.users,
+            "seed": args.seed,
+            "db_latency_ms": args.db_latency_ms,
+            "db_jitter_ms": args.db_jitter_ms,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "endpoints": results,
+    }
+
+
+# ============================================
+# BASELINES
+# ============================================
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a description of every regression past the threshold"""
+    mismatched = [
+        key for key in ("shoes", "users", "db_latency_ms", "concurrency")
+        if baseline["meta"].get(key) != current["meta"].get(key)
+    ]
+    if mismatched:
+        print(f"⚠️  Baseline was recorded with different settings ({', '.join(mismatched)})")
+
+    regressions = []
+    print("\n📈 Compared with baseline:")
+    for name, result in current["endpoints"].items():
+        base = baseline["endpoints"].get(name)
+        if base is None:
+            print(f"   {name:<26} (new)")
+            continue
+        checks = [
+            ("p95", result["p95_ms"], base["p95_ms"], MIN_LATENCY_DELTA_MS, "ms"),
+            ("alloc", result["peak_alloc_kb"], base["peak_alloc_kb"], MIN_ALLOC_DELTA_KB, "KiB"),
+        ]
+        notes = []
+        for label, value, reference, min_delta, unit in checks:
+            change = (value - reference) / reference if reference else 0.0
+            notes.append(f"{label} {change:+.0%}")
+            if value > reference * (1 + threshold) and value - reference > min_delta:
+                regressions.append(f"{name}: {label} {reference:.2f}{unit} -> {value:.2f}{unit} ({change:+.0%})")
+        print(f"   {name:<26} {'  '.join(notes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TurnOver API endpoints in-process")
+    parser.add_argument("--shoes", type=int, default=20_000, help="Synthetic catalog size")
+    parser.add_argument("--users", type=int, default=1_000, help="Synthetic user count")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="Injected latency per database call")
+    parser.add_argument("--db-jitter-ms", type=float, default=0.0, help="Extra uniform latency per call")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint")
+    parser.add_argument("--alloc-samples", type=int, default=10, help="Requests traced for allocations")
+    parser.add_argument("--only", action="append", help="Only endpoints matching this glob (repeatable)")
+    parser.add_argument("--output", type=str, help="Also write this run's results to a JSON file")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if any endpoint regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression (0.2 = 20%%)")
+
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("⏱️  TurnOver Endpoint Benchmarks")
+    print("=" * 50)
+
+    results = asyncio.run(run_benchmarks(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Saved baseline to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\n❌ No baseline at {args.baseline}; run with --save-baseline first")
+            sys.exit(1)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Regressions:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+    if any(result["errors"] for result in results["endpoints"].values()):
+        print("\n⚠️  Some requests returned unexpected status codes")
+
+
+if __name__ == "__main__":
+    main()
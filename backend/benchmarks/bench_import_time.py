@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the API and the scripts.
+
+Imports each target in a fresh interpreter under `python -X importtime`,
+parses the report and prints how long the import took and which top-level
+packages the time went to. Interpreter start-up (site, encodings) is measured
+separately and left out. Each target is imported several times and the
+fastest run is kept.
+
+Two checks fail the run (exit status 1):
+    budget     the import took longer than its budget in milliseconds
+    forbidden  the import pulled in a package that must stay deferred: the
+               Supabase client stack, which app/core/supabase.py only imports
+               when a client is first requested, and fastapi for the scripts
+
+Targets:
+    api        app.main
+    scripts    every module in app.scripts
+
+Usage:
+    python -m benchmarks.bench_import_time
+
+    Or with options:
+    python -m benchmarks.bench_import_time --target scripts --runs 10
+    python -m benchmarks.bench_import_time --api-budget-ms 600 --output imports.json
+"""
+
+import argparse
+import json
+import os
+import pkgutil
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+import app.scripts
+
+API_MODULES = ["app.main"]
+SCRIPT_MODULES = sorted(
+    f"app.scripts.{module.name}" for module in pkgutil.iter_modules(app.scripts.__path__)
+)
+
+API_BUDGET_MS = 1000.0
+SCRIPTS_BUDGET_MS = 400.0
+
+# Packages that no target may import at module import time
+FORBIDDEN = ["supabase", "supabase_auth", "postgrest", "storage3", "realtime", "jwt"]
+# The API additionally defers the image proxy's HTTP client
+API_FORBIDDEN = FORBIDDEN + ["httpx"]
+# Scripts share the schemas and core modules but never need the web framework
+SCRIPTS_FORBIDDEN = FORBIDDEN + ["fastapi"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+# ============ Measuring ============
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """`-X importtime` lines as {name, depth, self_us, cumulative_us}, in import order"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "name": name,
+                "depth": (len(indent) - 1) // 2,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+            })
+    return entries
+
+
+def run_importtime(statement: str) -> List[Dict[str, Any]]:
+    """Run `statement` in a fresh interpreter and parse its import timings"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    return parse_importtime(result.stderr)
+
+
+def startup_modules() -> Set[str]:
+    """Modules the bare interpreter imports before running any code"""
+    return {entry["name"] for entry in run_importtime("pass")}
+
+
+def measure(module: str, baseline: Set[str], runs: int) -> Dict[str, Any]:
+    """Fastest of `runs` imports of `module`, excluding interpreter start-up"""
+    best: Optional[List[Dict[str, Any]]] = None
+    best_us = 0
+    for _ in range(runs):
+        entries = [entry for entry in run_importtime(f"import {module}") if entry["name"] not in baseline]
+        total_us = sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0)
+        if best is None or total_us < best_us:
+            best, best_us = entries, total_us
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for entry in best:
+        by_package[entry["name"].split(".")[0]] += entry["self_us"]
+    return {
+        "module": module,
+        "total_ms": round(best_us / 1000, 2),
+        "modules": len(best),
+        "packages_ms": {
+            package: round(us / 1000, 2)
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])
+        },
+        "imported": sorted({entry["name"] for entry in best}),
+    }
+
+
+# ============ Checks ============
+
+def check(result: Dict[str, Any], budget_ms: float, forbidden: List[str]) -> List[str]:
+    """Problems with one measured import, empty if it is within budget"""
+    problems = []
+    if result["total_ms"] > budget_ms:
+        problems.append(f"{result['module']}: {result['total_ms']:.2f}ms exceeds the {budget_ms:.0f}ms budget")
+    imported = set(result["imported"])
+    for package in forbidden:
+        if package in imported:
+            problems.append(f"{result['module']}: imports {package} at module import time")
+    return problems
+
+
+def print_result(result: Dict[str, Any], budget_ms: float, top: int) -> None:
+    print(f"\n📦 {result['module']}: {result['total_ms']:.2f}ms "
+          f"({result['modules']} modules, budget {budget_ms:.0f}ms)")
+    for package, ms in list(result["packages_ms"].items())[:top]:
+        print(f"   {package:<28} {ms:>8.2f}ms")
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    targets = []
+    if "api" in args.target:
+        targets += [(module, args.api_budget_ms, API_FORBIDDEN) for module in API_MODULES]
+    if "scripts" in args.target:
+        targets += [(module, args.scripts_budget_ms, SCRIPTS_FORBIDDEN) for module in SCRIPT_MODULES]
+
+    baseline = startup_modules()
+    print(f"🐍 Interpreter start-up imports {len(baseline)} modules (excluded)")
+
+    results = []
+    problems: List[str] = []
+    for module, budget_ms, forbidden in targets:
+        result = measure(module, baseline, args.runs)
+        print_result(result, budget_ms, args.top)
+        result["budget_ms"] = budget_ms
+        result["problems"] = check(result, budget_ms, forbidden)
+        problems += result["problems"]
+        results.append(result)
+    return {"results": results, "problems": problems}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the API and scripts against a budget")
+    parser.add_argument("--target", action="append", choices=["api", "scripts"],
+                        help="Target to measure (repeatable, default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Imports per module (fastest is kept)")
+    parser.add_argument("--api-budget-ms", type=float, default=API_BUDGET_MS, help="Budget for importing app.main")
+    parser.add_argument("--scripts-budget-ms", type=float, default=SCRIPTS_BUDGET_MS,
+                        help="Budget for importing each app.scripts module")
+    parser.add_argument("--top", type=int, default=8, help="Packages to list per module")
+    parser.add_argument("--output", type=str, help="Write the results to a JSON file")
+
+    args = parser.parse_args()
+    args.target = args.target or ["api", "scripts"]
+
+    print("=" * 50)
+    print("🚀 TurnOver Import-Time Budget")
+    print("=" * 50)
+
+    report = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Wrote {len(report['results'])} results to {args.output}")
+
+    print()
+    if report["problems"]:
+        for problem in report["problems"]:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ All imports within budget")
+
+
+if __name__ == "__main__":
+    main()
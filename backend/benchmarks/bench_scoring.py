@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the scoring kernels in app/core/scoring.py
+
+Times each scoring engine over synthetic candidate lists and reports the
+nanoseconds spent per candidate and the peak memory allocated by one ranking.
+Three sweeps run by default, each varying one parameter around a fixed
+baseline:
+    size       catalog size (100 to 1M candidates)
+    tags       tags per shoe (tag cardinality)
+    top_rated  number of top-rated shoes behind a recommendation
+
+Engines are registered in ENGINES; add one there to compare it head to head
+with the existing ones.
+
+Usage:
+    python -m benchmarks.bench_scoring
+
+    Or with options:
+    python -m benchmarks.bench_scoring --sweep size --sizes 1000,100000
+    python -m benchmarks.bench_scoring --kernel similar --output scoring.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+from app.core.scoring import (
+    MIN_RECOMMENDATION_SCORE,
+    MIN_SIMILARITY_SCORE,
+    Scored,
+    calculate_recommendation_score,
+    rank_recommendations,
+    rank_similar,
+    similarity_explanation,
+    similarity_score,
+)
+from app.models.shoe import ShoeCategory, ShoeTag
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_TAG_COUNTS = [1, 2, 4, 8, 16]
+DEFAULT_TOP_RATED = [0, 1, 5, 20, 50]
+BASE_SIZE = 10_000
+BASE_TAGS = 4
+BASE_TOP_RATED = 5
+LIMIT = 5
+TAG_POOL_SIZE = 4096  # Distinct tag lists shared between candidates, keeps 1M rows in memory
+
+BRANDS = ["Nike", "Adidas", "ASICS", "Brooks", "Hoka", "Saucony", "New Balance", "On", "Puma", "Mizuno"]
+CATEGORIES = [category.value for category in ShoeCategory]
+TAGS = [tag.value for tag in ShoeTag]
+
+
+# ============================================
+# ENGINES
+# ============================================
+
+def recommend_reference(candidates: List[dict], preferences: dict, top_rated: List[dict], limit: int) -> List[Scored]:
+    """Score every candidate from scratch and sort them all, as the route used to"""
+    scored = []
+    for shoe in candidates:
+        score, explanation = calculate_recommendation_score(shoe, preferences, top_rated)
+        if score > MIN_RECOMMENDATION_SCORE:
+            scored.append((score, explanation, shoe))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:limit]
+
+
+def similar_reference(reference: dict, candidates: List[dict], limit: int) -> List[Scored]:
+    """Explain every match and sort them all, as the route used to"""
+    reference_tags = set(reference.get("tags", []))
+    reference_category = reference.get("category")
+    scored = []
+    for shoe in candidates:
+        score = similarity_score(reference_tags, reference_category, shoe)
+        if score > MIN_SIMILARITY_SCORE:
+            explanation = similarity_explanation(reference_tags, reference_category, shoe)
+            scored.append((round(score, 2), explanation, shoe))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:limit]
+
+
+# kernel -> engine name -> callable(workload) -> results
+ENGINES: Dict[str, Dict[str, Callable[[Dict[str, Any]], List[Scored]]]] = {
+    "recommend": {
+        "reference": lambda w: recommend_reference(w["candidates"], w["preferences"], w["top_rated"], LIMIT),
+        "rank_recommendations": lambda w: rank_recommendations(
+            w["candidates"], w["preferences"], w["top_rated"], LIMIT
+        ),
+    },
+    "similar": {
+        "reference": lambda w: similar_reference(w["reference"], w["candidates"], LIMIT),
+        "rank_similar": lambda w: rank_similar(w["reference"], w["candidates"], LIMIT),
+    },
+}
+
+
+# ============================================
+# WORKLOADS
+# ============================================
+
+def make_shoe(rng: random.Random, index: int, tags: List[str]) -> dict:
+    """A candidate with just the columns the kernels read"""
+    return {
+        "id": f"shoe-{index}",
+        "brand": rng.choice(BRANDS),
+        "category": rng.choice(CATEGORIES),
+        "tags": tags,
+        "weight": round(rng.uniform(150, 340), 1),
+    }
+
+
+def make_workload(size: int, tags_per_shoe: int, top_rated_count: int, seed: int) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    tags_per_shoe = min(tags_per_shoe, len(TAGS))
+    tag_pool = [rng.sample(TAGS, tags_per_shoe) for _ in range(min(size, TAG_POOL_SIZE))]
+    candidates = [make_shoe(rng, i, tag_pool[i % len(tag_pool)]) for i in range(size)]
+    return {
+        "candidates": candidates,
+        "preferences": {"preferred_categories": rng.sample(CATEGORIES, 2)},
+        "top_rated": [make_shoe(rng, -i, rng.sample(TAGS, tags_per_shoe)) for i in range(top_rated_count)],
+        "reference": make_shoe(rng, -1, rng.sample(TAGS, tags_per_shoe)),
+    }
+
+
+def time_engine(engine: Callable[[Dict[str, Any]], List[Scored]], workload: Dict[str, Any], repeats: int) -> Dict[str, float]:
+    size = len(workload["candidates"])
+    # Fewer repeats on big catalogs: one pass over 1M candidates already takes seconds
+    repeats = max(1, repeats if size <= 100_000 else 1)
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter_ns()
+        engine(workload)
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        engine(workload)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ns_per_candidate": round(best / size, 1),
+        "total_ms": round(best / 1e6, 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def sweep_points(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    points = []
+    if "size" in args.sweep:
+        points += [{"sweep": "size", "size": n, "tags": BASE_TAGS, "top_rated": BASE_TOP_RATED} for n in args.sizes]
+    if "tags" in args.sweep:
+        points += [{"sweep": "tags", "size": BASE_SIZE, "tags": n, "top_rated": BASE_TOP_RATED} for n in args.tag_counts]
+    if "top_rated" in args.sweep:
+        points += [{"sweep": "top_rated", "size": BASE_SIZE, "tags": BASE_TAGS, "top_rated": n} for n in args.top_rated]
+    return points
+
+
+def run_benchmarks(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    for point in sweep_points(args):
+        workload = make_workload(point["size"], point["tags"], point["top_rated"], args.seed)
+        print(f"\n📐 {point['sweep']}: {point['size']:,} candidates, "
+              f"{point['tags']} tags/shoe, {point['top_rated']} top-rated")
+        for kernel in args.kernel:
+            if kernel == "similar" and point["sweep"] == "top_rated":
+                continue  # Similarity doesn't look at top-rated shoes
+            for name, engine in ENGINES[kernel].items():
+                result = {**point, "kernel": kernel, "engine": name, **time_engine(engine, workload, args.repeats)}
+                results.append(result)
+                print(f"   {kernel:<10} {name:<22} {result['ns_per_candidate']:>9.1f} ns/candidate  "
+                      f"{result['total_ms']:>10.2f} ms  {result['peak_kb']:>10.1f} KiB peak")
+        del workload
+    return results
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation and similarity scoring kernels")
+    parser.add_argument("--sweep", action="append", choices=["size", "tags", "top_rated"],
+                        help="Sweep to run (repeatable, default: all)")
+    parser.add_argument("--kernel", action="append", choices=list(ENGINES),
+                        help="Kernel to benchmark (repeatable, default: all)")
+    parser.add_argument("--sizes", type=int_list, default=DEFAULT_SIZES, help="Catalog sizes, comma-separated")
+    parser.add_argument("--tag-counts", type=int_list, default=DEFAULT_TAG_COUNTS, help="Tags per shoe, comma-separated")
+    parser.add_argument("--top-rated", type=int_list, default=DEFAULT_TOP_RATED, help="Top-rated counts, comma-separated")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per point (best is kept)")
+    parser.add_argument("--seed", type=int, default=42, help="Workload seed")
+    parser.add_argument("--output", type=str, help="Write the results to a JSON file")
+
+    args = parser.parse_args()
+    args.sweep = args.sweep or ["size", "tags", "top_rated"]
+    args.kernel = args.kernel or list(ENGINES)
+
+    print("=" * 50)
+    print("🧮 TurnOver Scoring Kernel Benchmarks")
+    print("=" * 50)
+
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
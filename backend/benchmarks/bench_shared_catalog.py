@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory of the shared catalog snapshot vs. a private copy.
+
+For each catalog size a snapshot file is written once, then several worker
+processes are started side by side (spawned, so they share nothing with this
+one) and each loads the catalog in one of two ways:
+    mapped    serve from the read-only mapping, as uvicorn workers do with
+              app/core/catalog_sync.py
+    private   decode every row and build the indexes in the process, as
+              every worker did before the snapshot was shared
+
+Each worker then runs the same mix of list, filter, sort, search, facet and
+single-shoe reads and reports, relative to before it loaded the catalog:
+    anon      RssAnon: memory only this worker can use
+    rss       VmRSS: including the snapshot pages it touched
+    pss       Pss: resident memory with shared pages split between the workers
+
+Linux only (reads /proc/self/status and /proc/self/smaps_rollup).
+
+Usage:
+    python -m benchmarks.bench_shared_catalog
+
+    Or with options:
+    python -m benchmarks.bench_shared_catalog --sizes 10000,100000 --workers 8
+    python -m benchmarks.bench_shared_catalog --output shared.json
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+from app.core.catalog import SPEC_FIELDS, ShoeCatalog
+from app.core.snapshot import CatalogSnapshot
+from app.testing import install_fake_supabase
+from benchmarks.bench_endpoints import build_database
+from benchmarks.bench_scoring import int_list
+
+DEFAULT_SIZES = [5_000, 20_000, 50_000]
+MODES = ["mapped", "private"]
+
+
+def memory_kib() -> Dict[str, int]:
+    """This process's resident memory in KiB"""
+    fields = {"VmRSS": "rss", "RssAnon": "anon"}
+    memory = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in fields:
+                memory[fields[key]] = int(value.split()[0])
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    memory["pss"] = int(line.split()[1])
+    except OSError:
+        memory["pss"] = memory["rss"]
+    return memory
+
+
+def run_queries(catalog: ShoeCatalog, snapshot: CatalogSnapshot, queries: int, seed: int) -> None:
+    """A mix of the reads the shoe endpoints make"""
+    rng = random.Random(seed)
+    live = catalog.stats()["shoes"]
+    categories = list(catalog.facets()["categories"])
+    for _ in range(queries):
+        catalog.query(offset=rng.randrange(max(live - 20, 1)), limit=20)
+        catalog.query(category=rng.choice(categories), ranges={"weight": (200, 280)}, limit=20)
+        catalog.query(sort_by=rng.choice(SPEC_FIELDS), descending=rng.random() < 0.5, limit=20)
+        catalog.query(search=rng.choice("aeiou") + rng.choice("nrst"), limit=20)
+        catalog.facets(category=rng.choice(categories))
+        shoe_id = snapshot.id_at(rng.randrange(snapshot.size))
+        if shoe_id is not None:
+            catalog.get(shoe_id)
+
+
+def worker(mode: str, path: str, queries: int, seed: int, results, done) -> None:
+    """Load the catalog one way, run the queries, report memory, then wait so all workers coexist"""
+    catalog = ShoeCatalog()
+    gc.collect()
+    before = memory_kib()
+    snapshot = CatalogSnapshot(path)
+    if mode == "mapped":
+        catalog.load_snapshot(snapshot)
+    else:
+        rows = (snapshot.row(slot) for slot in range(snapshot.size))
+        catalog.load((row for row in rows if row is not None), snapshot.version)
+        catalog.prepare_search()
+    run_queries(catalog, snapshot, queries, seed)
+    gc.collect()
+    after = memory_kib()
+    results.put({key: after[key] - before[key] for key in after})
+    done.wait()
+
+
+def measure(mode: str, path: str, args) -> Dict[str, Any]:
+    """Run `args.workers` workers at once; returns their mean memory growth in KiB"""
+    context = multiprocessing.get_context("spawn")
+    results, done = context.Queue(), context.Event()
+    processes = [
+        context.Process(target=worker, args=(mode, path, args.queries, args.seed + n, results, done))
+        for n in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    done.set()
+    for process in processes:
+        process.join()
+    return {
+        key: round(sum(report[key] for report in reports) / len(reports))
+        for key in reports[0]
+    }
+
+
+def build_snapshot(size: int, path: str, seed: int) -> int:
+    db = build_database(size, 1, seed, 0, 0)
+    with install_fake_supabase(db):
+        catalog = ShoeCatalog()
+        catalog.validate()
+        return catalog.save_snapshot(path, generation=1)
+
+
+def run_benchmarks(args) -> List[Dict[str, Any]]:
+    results = []
+    directory = tempfile.mkdtemp(prefix="shared-catalog-")
+    for size in args.sizes:
+        path = os.path.join(directory, f"catalog-{size}.snapshot")
+        file_bytes = build_snapshot(size, path, args.seed)
+        print(f"\n🧪 {size:,} shoes, {args.workers} workers, snapshot {file_bytes / 1024:,.0f} KiB")
+
+        result: Dict[str, Any] = {"shoes": size, "workers": args.workers, "file_kb": round(file_bytes / 1024, 1)}
+        for mode in MODES:
+            memory = measure(mode, path, args)
+            result[mode] = memory
+            print(f"   {mode:<8} anon {memory['anon']:>9,} KiB   rss {memory['rss']:>9,} KiB"
+                  f"   pss {memory['pss']:>9,} KiB   per worker")
+        result["anon_ratio"] = round(result["private"]["anon"] / max(result["mapped"]["anon"], 1), 1)
+        print(f"   📉 {result['anon_ratio']:g}x less private memory per worker when mapped")
+        results.append(result)
+        os.unlink(path)
+    os.rmdir(directory)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-worker memory of the shared catalog snapshot")
+    parser.add_argument("--sizes", type=int_list, default=DEFAULT_SIZES, help="Catalog sizes, comma-separated")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode")
+    parser.add_argument("--queries", type=int, default=200, help="Query rounds per worker")
+    parser.add_argument("--seed", type=int, default=42, help="Workload seed")
+    parser.add_argument("--output", type=str, help="Write the results to a JSON file")
+
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("🧠 TurnOver Shared Catalog Memory Benchmarks")
+    print("=" * 50)
+
+    if not os.path.exists("/proc/self/status"):
+        print("⚠️  Warning: /proc is not available; this benchmark needs Linux")
+        sys.exit(1)
+
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Cold start vs. snapshot start for the in-process catalog.
+
+For each catalog size, against the in-memory Supabase fake with simulated
+round-trip latency:
+    cold      a new worker downloads the catalog and builds the search and
+              similarity structures, as the start-up warm-up does without
+              a snapshot file
+    save      writing the snapshot file (rows, bitmaps, spec arrays and the
+              similar-shoe lists)
+    open      mapping the snapshot in a new worker until it can serve
+    first     the first list page and facet counts served from the mapping
+    validate  the background version check against the database
+
+Usage:
+    python -m benchmarks.bench_snapshot
+
+    Or with options:
+    python -m benchmarks.bench_snapshot --sizes 1000,20000 --db-latency-ms 20
+    python -m benchmarks.bench_snapshot --output snapshot.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, '.')
+
+from app.core.catalog import ShoeCatalog
+from app.core.similarity import SimilarityIndex
+from app.testing import install_fake_supabase
+from benchmarks.bench_endpoints import build_database
+from benchmarks.bench_scoring import int_list
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+
+
+def timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def cold_start() -> Tuple[ShoeCatalog, SimilarityIndex]:
+    catalog = ShoeCatalog()
+    catalog.validate()
+    catalog.prepare_search()
+    index = SimilarityIndex(catalog)
+    index.build()
+    return catalog, index
+
+
+def snapshot_start(path: str) -> ShoeCatalog:
+    catalog = ShoeCatalog()
+    if not catalog.open_snapshot(path):
+        raise RuntimeError(f"Could not open {path}")
+    return catalog
+
+
+def first_requests(catalog: ShoeCatalog) -> None:
+    catalog.query(limit=20)
+    catalog.facets()
+
+
+def run_benchmarks(args) -> List[Dict[str, Any]]:
+    results = []
+    directory = tempfile.mkdtemp(prefix="catalog-snapshot-")
+    for size in args.sizes:
+        print(f"\n🧪 {size:,} shoes, {args.db_latency_ms:g}ms per database round trip")
+        db = build_database(size, 1, args.seed, args.db_latency_ms, 0)
+        path = os.path.join(directory, f"catalog-{size}.snapshot")
+
+        with install_fake_supabase(db):
+            cold_ms, (catalog, index) = timed(cold_start)
+            # Defaults bind this iteration's values (the lambdas close over loop variables)
+            save_ms, file_bytes = timed(lambda c=catalog, p=path, i=index: c.save_snapshot(p, i.export()))
+            open_ms, warm = timed(lambda p=path: snapshot_start(p))
+            first_ms, _ = timed(lambda w=warm: first_requests(w))
+            validate_ms, _ = timed(warm.validate)
+            if warm.reloads:
+                raise RuntimeError("Validation reloaded an unchanged catalog")
+
+        result = {
+            "shoes": size,
+            "cold_ms": round(cold_ms, 2),
+            "save_ms": round(save_ms, 2),
+            "open_ms": round(open_ms, 2),
+            "first_requests_ms": round(first_ms, 2),
+            "validate_ms": round(validate_ms, 2),
+            "file_kb": round(file_bytes / 1024, 1),
+            "speedup": round(cold_ms / (open_ms + first_ms), 1),
+        }
+        results.append(result)
+        print(f"   cold {cold_ms:>10.2f}ms   save {save_ms:>8.2f}ms   file {result['file_kb']:>10,.1f} KiB")
+        print(f"   open {open_ms:>10.2f}ms   first {first_ms:>7.2f}ms   validate {validate_ms:>8.2f}ms"
+              f"   ({result['speedup']:g}x faster to serve)")
+        os.unlink(path)
+    os.rmdir(directory)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark catalog start-up from the database vs. the snapshot file")
+    parser.add_argument("--sizes", type=int_list, default=DEFAULT_SIZES, help="Catalog sizes, comma-separated")
+    parser.add_argument("--db-latency-ms", type=float, default=5.0, help="Simulated database round-trip latency")
+    parser.add_argument("--seed", type=int, default=42, help="Workload seed")
+    parser.add_argument("--output", type=str, help="Write the results to a JSON file")
+
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("💾 TurnOver Catalog Snapshot Benchmarks")
+    print("=" * 50)
+
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
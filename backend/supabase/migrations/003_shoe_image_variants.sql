@@ -0,0 +1,5 @@
+-- Locally mirrored shoe images
+-- Maps thumbnail width to the URL of the mirrored WebP variant, e.g.
+-- {"160": "/media/ab/ab12.../160.webp", "320": "...", "640": "..."}
+
+ALTER TABLE shoes ADD COLUMN IF NOT EXISTS image_variants JSONB;
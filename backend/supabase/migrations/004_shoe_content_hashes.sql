@@ -0,0 +1,23 @@
+-- Content hashes for diff-based catalog seeding
+-- seed_database --diff compares these against hashes of the source rows and
+-- only upserts shoes whose catalog fields changed. The hash covers the fields
+-- a catalog file owns (image_url is managed by fetch_shoe_images) and must stay
+-- in sync with content_hash() in app/scripts/catalog_loader.py:
+--   md5(category | tags sorted and comma-joined | weight | drop | heel | forefoot)
+-- with the DECIMAL(_, 1) columns rendered with one decimal place.
+
+CREATE OR REPLACE VIEW shoe_content_hashes
+WITH (security_invoker = true) AS
+SELECT
+    id,
+    brand,
+    name,
+    md5(concat_ws('|',
+        category,
+        array_to_string(ARRAY(SELECT tag FROM unnest(tags) AS tag ORDER BY tag COLLATE "C"), ','),
+        weight::text,
+        "drop"::text,
+        stack_height_heel::text,
+        stack_height_forefoot::text
+    )) AS content_hash
+FROM shoes;
@@ -0,0 +1,29 @@
+-- Catalog statistics in one round trip
+-- Used by seed_database --stats via supabase.rpc("catalog_stats"). Category,
+-- brand and total counts come from a single GROUPING SETS scan; tag counts
+-- need their own pass over unnest(tags). Returns e.g.
+-- {"total": 47, "categories": {"daily": 20, ...}, "brands": {...}, "tags": {...}}
+
+CREATE OR REPLACE FUNCTION catalog_stats()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+AS $$
+    WITH grouped AS (
+        SELECT category, brand, GROUPING(category, brand) AS level, COUNT(*) AS n
+        FROM shoes
+        GROUP BY GROUPING SETS ((category), (brand), ())
+    ),
+    tag_counts AS (
+        SELECT tag, COUNT(*) AS n
+        FROM shoes, unnest(tags) AS tag
+        GROUP BY tag
+    )
+    SELECT jsonb_build_object(
+        'total', COALESCE((SELECT n FROM grouped WHERE level = 3), 0),
+        'categories', COALESCE((SELECT jsonb_object_agg(category, n) FROM grouped WHERE level = 1), '{}'::jsonb),
+        'brands', COALESCE((SELECT jsonb_object_agg(brand, n) FROM grouped WHERE level = 2), '{}'::jsonb),
+        'tags', COALESCE((SELECT jsonb_object_agg(tag, n) FROM tag_counts), '{}'::jsonb)
+    );
+$$;
@@ -0,0 +1,36 @@
+-- Batched image writes for fetch_shoe_images
+-- Used via supabase.rpc("update_shoe_images", {"updates": [...]}). Each update is
+-- {"id": ..., "image_url": ...} and, when the run knows them, "image_variants"
+-- (null clears stale thumbnails). Only these two columns are written, so catalog
+-- edits made while a long run is in progress are left alone, and rows whose
+-- image didn't change aren't touched at all (their updated_at stays put).
+-- Returns the number of shoes updated.
+
+CREATE OR REPLACE FUNCTION update_shoe_images(updates JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+VOLATILE
+SECURITY INVOKER
+AS $$
+    WITH requested AS (
+        SELECT
+            (u->>'id')::uuid AS id,
+            u->>'image_url' AS image_url,
+            u ? 'image_variants' AS sets_variants,
+            NULLIF(u->'image_variants', 'null'::jsonb) AS image_variants
+        FROM jsonb_array_elements(updates) AS u
+    ),
+    changed AS (
+        UPDATE shoes AS s
+        SET image_url = r.image_url,
+            image_variants = CASE WHEN r.sets_variants THEN r.image_variants ELSE s.image_variants END
+        FROM requested AS r
+        WHERE s.id = r.id
+          AND (
+              s.image_url IS DISTINCT FROM r.image_url
+              OR (r.sets_variants AND s.image_variants IS DISTINCT FROM r.image_variants)
+          )
+        RETURNING 1
+    )
+    SELECT COUNT(*)::integer FROM changed;
+$$;
@@ -1,7 +1,12 @@
+import ipaddress
+import random
+
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core import image_cache
 from app.main import app
+from app.testing import FakeDatabase, install_fake_supabase
 
 
 @pytest.fixture
@@ -18,3 +23,73 @@ def auth_headers():
     """
     # TODO: Implement proper test authentication
     return {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture
+def fake_db():
+    """
+    In-memory Supabase stand-in wired into the app for the test's duration.
+    Create users with fake_db.create_user(...) to get bearer tokens.
+    """
+    db = FakeDatabase()
+    with install_fake_supabase(db):
+        yield db
+
+
+BRANDS = ["Asics", "Brooks", "Hoka", "New Balance", "Nike", "Saucony"]
+TAGS = ["cushioned", "firm", "responsive", "lightweight", "stable", "bouncy"]
+
+
+@pytest.fixture
+def shoes(fake_db):
+    """A small, varied catalog loaded into fake_db; returns the rows"""
+    rng = random.Random(7)
+    rows = [
+        {
+            "id": f"shoe-{i:03d}",
+            "brand": rng.choice(BRANDS),
+            "name": f"Model {i}",
+            "category": rng.choice(["daily", "workout", "race"]),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+            "weight": round(rng.uniform(180, 320), 1),
+            "drop": float(rng.choice([0, 4, 6, 8, 10, 12])),
+            "stack_height_heel": round(rng.uniform(25, 45), 1),
+            "stack_height_forefoot": round(rng.uniform(18, 38), 1),
+            "image_url": None,
+            "updated_at": "2024-01-01T00:00:00+00:00",
+        }
+        for i in range(80)
+    ]
+    fake_db.load("shoes", rows)
+    return rows
+
+
+HOSTS = {
+    "img.example.com": ["93.184.215.14"],
+    "cdn.example.net": ["2606:2800:21f:cb07:6820:80da:af6b:8b2c"],
+    "internal.example.com": ["10.0.0.5"],
+    "metadata.example.com": ["169.254.169.254"],
+    "mixed.example.com": ["93.184.215.14", "127.0.0.1"],
+}
+
+
+@pytest.fixture
+def resolved(monkeypatch):
+    """
+    DNS for the image fetchers: names resolve from HOSTS, IP literals to
+    themselves. Returns the names looked up.
+    """
+    lookups = []
+
+    async def resolve(host, port):
+        lookups.append(host)
+        try:
+            return [str(ipaddress.ip_address(host))]
+        except ValueError:
+            pass
+        if host not in HOSTS:
+            raise OSError("Name or service not known")
+        return HOSTS[host]
+
+    monkeypatch.setattr(image_cache, "_resolve", resolve)
+    return lookups
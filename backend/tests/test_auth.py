@@ -0,0 +1,25 @@
+"""Auth endpoints map Supabase auth errors to HTTP errors"""
+
+SIGNUP = {"email": "runner@example.com", "password": "tempo-run", "first_name": "Sam", "last_name": "Lee"}
+
+
+def test_signup_signin_and_refresh(client, fake_db):
+    response = client.post("/api/auth/signup", json=SIGNUP)
+    assert response.status_code == 201 and response.json()["access_token"]
+
+    tokens = client.post("/api/auth/signin", json={"email": SIGNUP["email"], "password": SIGNUP["password"]}).json()
+    refreshed = client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200 and refreshed.json()["access_token"]
+    assert client.post("/api/auth/signout").status_code == 204
+
+
+def test_auth_errors(client, fake_db):
+    client.post("/api/auth/signup", json=SIGNUP)
+    duplicate = client.post("/api/auth/signup", json=SIGNUP)
+    assert duplicate.status_code == 400 and duplicate.json()["detail"] == "An account with this email already exists"
+
+    wrong = client.post("/api/auth/signin", json={"email": SIGNUP["email"], "password": "wrong"})
+    assert wrong.status_code == 401 and wrong.json()["detail"] == "Invalid email or password"
+
+    expired = client.post("/api/auth/refresh", json={"refresh_token": "not-a-token"})
+    assert expired.status_code == 401 and expired.json()["detail"] == "Invalid or expired refresh token"
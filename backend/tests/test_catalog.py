@@ -0,0 +1,176 @@
+"""The in-process catalog answers like the PostgREST queries it replaced"""
+
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.api.shoes import iter_shoe_pages
+from app.core.catalog import SPEC_FIELDS, ShoeCatalog
+from app.core.config import settings
+
+FILTERS = [
+    {},
+    {"category": "race"},
+    {"brand": "bal"},
+    {"brand": "HOKA"},
+    {"search": "model 1"},
+    {"search": "oka"},
+    {"category": "daily", "brand": "o", "search": "model"},
+]
+RANGE_FILTERS = [
+    {"ranges": {"weight": (220, 260)}},
+    {"ranges": {"drop": (None, 6), "stack_height_heel": (30, None)}},
+    {"category": "daily", "ranges": {"weight": (None, 280), "stack_height_forefoot": (20, 30)}},
+]
+TAG_FILTERS = [
+    {"tags": ["cushioned"]},
+    {"tags": ["cushioned", "responsive"]},
+    {"tags": ["plush"]},
+    {"any_tags": ["firm", "stable"]},
+    {"tags": ["lightweight"], "any_tags": ["firm", "bouncy"]},
+    {"category": "daily", "tags": ["lightweight"], "ranges": {"weight": (None, 280)}},
+]
+
+
+@pytest.fixture
+def catalog(shoes):
+    catalog = ShoeCatalog()
+    catalog.validate()
+    return catalog
+
+
+def postgrest_rows(**filters):
+    """The rows the PostgREST path returns (via the export's keyset pagination)"""
+    return [row for page in iter_shoe_pages(chunk_size=7, **filters) for row in page]
+
+
+def facet_counts(column, **filters):
+    """Facet counts computed from the PostgREST rows"""
+    rows = postgrest_rows(**filters)
+    values = Counter(value for row in rows for value in (row[column] if column == "tags" else [row[column]]))
+    return {value: count for value, count in values.items() if count}
+
+
+def assert_matches_postgrest(catalog, filters):
+    expected = sorted(postgrest_rows(**filters), key=lambda row: (row["brand"], row["name"]))
+    assert [row["id"] for row in catalog.query(**filters)] == [row["id"] for row in expected]
+    page = catalog.query(offset=2, limit=5, **filters)
+    assert [row["id"] for row in page] == [row["id"] for row in expected[2:7]]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_query_matches_postgrest(catalog, filters):
+    assert_matches_postgrest(catalog, filters)
+
+
+@pytest.mark.parametrize("filters", RANGE_FILTERS)
+def test_range_filters_match_postgrest(catalog, filters):
+    assert_matches_postgrest(catalog, filters)
+
+
+@pytest.mark.parametrize("filters", TAG_FILTERS)
+def test_tag_filters_match_postgrest(catalog, filters):
+    assert_matches_postgrest(catalog, filters)
+
+
+def test_tag_facets_apply_every_filter(catalog):
+    filters = {"category": "race", "brand": "o", "tags": ["cushioned"]}
+    facets = catalog.facets(**filters)
+    assert facets["total"] == len(postgrest_rows(**filters))
+    assert facets["categories"] == facet_counts("category", brand="o", tags=["cushioned"])
+    assert facets["brands"] == facet_counts("brand", category="race", tags=["cushioned"])
+    assert facets["tags"] == facet_counts("tags", **filters)
+
+
+def test_list_endpoint_tag_filters(client, shoes):
+    params = {"tags": ["cushioned", "stable"], "page_size": 100}
+    data = client.get("/api/shoes", params=params).json()["data"]
+    expected = {shoe["id"] for shoe in shoes if {"cushioned", "stable"} <= set(shoe["tags"])}
+    assert {shoe["id"] for shoe in data} == expected
+    params = {"any_tags": ["cushioned", "stable"], "page_size": 100}
+    data = client.get("/api/shoes", params=params).json()["data"]
+    expected = {shoe["id"] for shoe in shoes if {"cushioned", "stable"} & set(shoe["tags"])}
+    assert {shoe["id"] for shoe in data} == expected
+
+
+def test_ranges_are_inclusive(catalog, shoes):
+    weight = shoes[5]["weight"]
+    assert shoes[5] in catalog.query(ranges={"weight": (weight, weight)})
+    assert shoes[5] not in catalog.query(ranges={"weight": (weight + 0.1, None)})
+
+
+@pytest.mark.parametrize("field", SPEC_FIELDS)
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_by_spec_matches_postgrest(fake_db, catalog, field, descending):
+    response = fake_db.client(service=True).table("shoes").select("*").eq("category", "daily").order(
+        field, desc=descending
+    ).execute()
+    # Equal values may tie in a different order, so compare the values
+    expected = [row[field] for row in response.data]
+    rows = catalog.query(category="daily", sort_by=field, descending=descending)
+    assert [row[field] for row in rows] == expected
+    page = catalog.query(category="daily", sort_by=field, descending=descending, offset=3, limit=4)
+    assert [row[field] for row in page] == expected[3:7]
+
+
+def test_writes_keep_brand_name_order(catalog, shoes):
+    catalog.upsert({**shoes[0], "id": "shoe-new", "brand": "Adidas", "name": "Boston"})
+    catalog.upsert({**shoes[1], "name": "Zzz renamed"})
+    catalog.upsert({**shoes[2], "brand": "Zoot"})
+    catalog.remove(shoes[3]["id"])
+    rows = catalog.query()
+    assert [(row["brand"], row["name"]) for row in rows] == sorted((row["brand"], row["name"]) for row in rows)
+    assert rows[0]["id"] == "shoe-new" and rows[-1]["id"] == shoes[2]["id"]
+    assert shoes[3]["id"] not in {row["id"] for row in rows}
+    assert catalog.query(category=rows[0]["category"])[0]["id"] == "shoe-new"
+
+
+def test_list_endpoint_range_and_sort(client, shoes):
+    params = {"min_weight": 200, "max_weight": 260, "sort_by": "drop", "sort_order": "desc", "page_size": 100}
+    data = client.get("/api/shoes", params=params).json()["data"]
+    expected = [shoe for shoe in shoes if 200 <= shoe["weight"] <= 260]
+    assert {shoe["id"] for shoe in data} == {shoe["id"] for shoe in expected}
+    assert [shoe["drop"] for shoe in data] == sorted((shoe["drop"] for shoe in expected), reverse=True)
+
+
+def test_facets_without_filters_match_catalog_stats(fake_db, catalog):
+    stats = fake_db.client(service=True).rpc("catalog_stats", {}).execute().data
+    facets = catalog.facets()
+    assert facets["total"] == stats["total"]
+    for key in ("categories", "brands", "tags"):
+        assert facets[key] == {value: count for value, count in stats[key].items() if count}
+
+
+def test_facets_ignore_their_own_filter(catalog):
+    filters = {"category": "race", "brand": "o", "search": "model"}
+    facets = catalog.facets(**filters)
+    assert facets["total"] == len(postgrest_rows(**filters))
+    assert facets["categories"] == facet_counts("category", brand="o", search="model")
+    assert facets["brands"] == facet_counts("brand", category="race", search="model")
+    assert facets["tags"] == facet_counts("tags", **filters)
+    # Ordered by count, then value
+    assert list(facets["brands"].values()) == sorted(facets["brands"].values(), reverse=True)
+
+
+def test_facets_endpoint(client, shoes):
+    response = client.get("/api/shoes/facets", params={"category": "workout"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["total"] == sum(shoe["category"] == "workout" for shoe in shoes)
+    assert sum(data["categories"].values()) == len(shoes)
+
+
+def test_stale_catalog_is_served_while_it_refreshes(fake_db, shoes):
+    catalog = ShoeCatalog()
+
+    async def scenario():
+        await catalog.fresh()
+        generation = catalog.generation
+        fake_db.tables["shoes"][shoes[0]["id"]]["updated_at"] = "2030-01-01T00:00:00+00:00"
+        catalog.loaded_at -= settings.CATALOG_REFRESH_SECONDS + 1
+        assert (await catalog.fresh()).generation == generation
+        await catalog._background
+        assert catalog.generation > generation and not catalog.is_stale()
+
+    asyncio.run(scenario())
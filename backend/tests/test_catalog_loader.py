@@ -0,0 +1,204 @@
+"""The streaming catalog loader behind seed_database"""
+
+import gzip
+import json
+import threading
+from collections import defaultdict
+
+import pytest
+
+from app.scripts.catalog_loader import (
+    AdaptiveBatchSize,
+    batch_records,
+    content_hash,
+    diff_records,
+    fetch_content_hashes,
+    load_catalog_file,
+    load_records,
+    read_records,
+    validate_records,
+)
+
+SOURCE_FIELDS = ("brand", "name", "category", "tags", "weight", "drop", "stack_height_heel", "stack_height_forefoot")
+CSV_HEADER = ",".join(SOURCE_FIELDS)
+
+
+def source(rows):
+    """Rows as (position, fields) records, like read_records yields"""
+    return [(position, {field: row[field] for field in SOURCE_FIELDS}) for position, row in enumerate(rows)]
+
+
+def recorder():
+    written = []
+    lock = threading.Lock()
+
+    def upsert(rows):
+        with lock:
+            written.extend(rows)
+
+    return written, upsert
+
+
+def test_reads_csv_and_gzipped_jsonl_from_an_offset(tmp_path):
+    csv_path = tmp_path / "shoes.csv"
+    csv_path.write_text(f"{CSV_HEADER}\nA,One,daily,firm|light,250,8,35,27\nB,Two,race,,200,6,38,32\n")
+    jsonl_path = tmp_path / "shoes.jsonl.gz"
+    with gzip.open(jsonl_path, "wt") as f:
+        f.write(json.dumps({"brand": "A", "name": "One"}) + "\n\n" + json.dumps({"brand": "B", "name": "Two"}) + "\n")
+
+    assert [(position, record["name"]) for position, record in read_records(str(csv_path))] == [(0, "One"), (1, "Two")]
+    assert [(position, record["name"]) for position, record in read_records(str(jsonl_path), offset=1)] == [(1, "Two")]
+    xml_path = tmp_path / "shoes.xml"
+    xml_path.write_text("<shoes/>")
+    with pytest.raises(ValueError):
+        list(read_records(str(xml_path)))
+
+
+def test_validation_normalizes_tags_and_counts_rejects():
+    records = [
+        (0, {"brand": "A", "name": "One", "category": "daily", "tags": "Firm; light; mystery",
+             "weight": "250", "drop": "8", "stack_height_heel": "35", "stack_height_forefoot": "27", "image_url": ""}),
+        (1, {"brand": "B", "name": "Two", "category": "road", "tags": "",
+             "weight": "200", "drop": "6", "stack_height_heel": "38", "stack_height_forefoot": "32"}),
+    ]
+    stats = {"read": 0, "rejected": 0, "unknown_tags": 0}
+    valid = list(validate_records(records, stats))
+    assert stats == {"read": 2, "rejected": 1, "unknown_tags": 1}
+    assert len(valid) == 1
+    position, row = valid[0]
+    assert position == 0 and row["tags"] == ["firm", "lightweight"] and row["weight"] == 250
+    # Unset image URLs are left out so an upsert doesn't erase fetched ones
+    assert "image_url" not in row
+
+
+def test_batches_split_on_size_and_column_changes_and_dedupe():
+    rows = [
+        (0, {"brand": "A", "name": "1"}),
+        (1, {"brand": "A", "name": "1", "v": 2}),
+        (2, {"brand": "A", "name": "2", "v": 1}),
+        (3, {"brand": "A", "name": "2", "v": 3}),
+        (4, {"brand": "A", "name": "3", "v": 1}),
+        (5, {"brand": "A", "name": "4", "v": 1}),
+    ]
+    batches = list(batch_records(rows, size=lambda: 3))
+    assert [(end, [row["name"] for row in batch]) for end, batch in batches] == [
+        (1, ["1"]), (5, ["1", "2", "3"]), (6, ["4"]),
+    ]
+    # Duplicate (brand, name) pairs within a batch keep the last row
+    assert batches[1][1][1]["v"] == 3
+
+
+def test_batch_size_grows_while_fast_and_halves_when_slow():
+    sizer = AdaptiveBatchSize(initial=100, minimum=20, maximum=160, target_seconds=1.0)
+    sizer.observe(0.1)
+    assert sizer.value == 150
+    sizer.observe(0.1)
+    assert sizer.value == 160
+    sizer.observe(2.0)
+    assert sizer.value == 80
+    sizer.observe(0.1, ok=False)
+    sizer.observe(0.1, ok=False)
+    sizer.observe(0.1, ok=False)
+    assert sizer.value == 20
+
+
+def test_loads_every_valid_record(fake_db, shoes, tmp_path):
+    path = tmp_path / "shoes.jsonl"
+    rows = [{**row, "name": f"{row['name']} v2"} for row in shoes[:30]]
+    path.write_text("".join(json.dumps({field: row[field] for field in SOURCE_FIELDS}) + "\n" for row in rows))
+    stats = load_catalog_file(str(path), workers=3, batch_size=20)
+    assert (stats["read"], stats["upserted"], stats["rejected"], stats["offset"]) == (30, 30, 0, 30)
+    names = {row["name"] for row in fake_db.tables["shoes"].values()}
+    assert {row["name"] for row in rows} <= names
+
+
+def test_failed_batch_reports_the_committed_offset(shoes, capsys):
+    def upsert(rows):
+        if any(row["name"] == shoes[25]["name"] for row in rows):
+            raise RuntimeError("database unavailable")
+
+    with pytest.raises(RuntimeError):
+        load_records(source(shoes[:60]), workers=1, batch_size=20, upsert=upsert)
+    # The first batch (records 0-19) was committed; the run resumes at the failed one
+    assert "resume with --offset 20" in capsys.readouterr().out
+
+
+def test_upserts_run_in_parallel_batches(shoes):
+    written, upsert = recorder()
+    stats = load_records(source(shoes), workers=4, batch_size=20, upsert=upsert)
+    assert stats["upserted"] == len(shoes) == len(written)
+    assert stats["batches"] >= len(shoes) // stats["batch_size"]
+
+
+def test_diff_records_passes_on_only_new_and_changed_rows():
+    rows = [
+        {"brand": "A", "name": "Same", "category": "daily", "tags": ["firm"], "weight": 250,
+         "drop": 8, "stack_height_heel": 35, "stack_height_forefoot": 27},
+        {"brand": "A", "name": "Heavier", "category": "daily", "tags": [], "weight": 260,
+         "drop": 8, "stack_height_heel": 35, "stack_height_forefoot": 27},
+        {"brand": "B", "name": "New", "category": "race", "tags": [], "weight": 200,
+         "drop": 6, "stack_height_heel": 38, "stack_height_forefoot": 32},
+    ]
+    existing = {
+        ("A", "Same"): ("id-1", content_hash(rows[0])),
+        ("A", "Heavier"): ("id-2", content_hash({**rows[1], "weight": 250})),
+        ("C", "Gone"): ("id-3", "0" * 32),
+    }
+    stats, samples = defaultdict(int), defaultdict(list)
+    passed = [row["name"] for _, row in diff_records(enumerate(rows), existing, stats, samples)]
+    assert passed == ["Heavier", "New"]
+    assert (stats["unchanged"], stats["changed"], stats["new"]) == (1, 1, 1)
+    assert samples["changed"] == ["A Heavier"] and samples["new"] == ["B New"]
+    # What is left over is missing from the source
+    assert list(existing) == [("C", "Gone")]
+
+
+def test_content_hashes_match_the_view(fake_db, shoes):
+    hashes = fetch_content_hashes()
+    assert len(hashes) == len(shoes)
+    assert all(hashes[(row["brand"], row["name"])] == (row["id"], content_hash(row)) for row in shoes)
+
+
+def test_diff_mode_only_writes_what_changed(fake_db, shoes):
+    rows = [dict(row) for row in shoes]
+    rows[3]["weight"] += 10
+    rows.append({**rows[0], "name": "Brand New"})
+    written, upsert = recorder()
+    stats = load_records(source(rows), upsert=upsert, diff=True)
+    assert sorted(row["name"] for row in written) == sorted([rows[3]["name"], "Brand New"])
+    assert (stats["changed"], stats["new"], stats["unchanged"], stats["missing"]) == (1, 1, len(shoes) - 1, 0)
+
+
+def test_prune_deletes_missing_shoes_and_cascades(fake_db, shoes):
+    user, token = fake_db.create_user("runner@example.com")
+    fake_db.client(token).table("rotation").insert({"user_id": user.id, "shoe_id": shoes[0]["id"]}).execute()
+    stats = load_records(source(shoes[2:]), prune=True)
+    assert stats["missing"] == stats["deleted"] == 2
+    assert set(fake_db.tables["shoes"]) == {row["id"] for row in shoes[2:]}
+    assert fake_db.tables["rotation"] == {}
+
+
+def test_rejected_rows_are_kept_and_block_pruning(fake_db, shoes, capsys):
+    rows = [dict(row) for row in shoes[1:]]
+    rows[0]["weight"] = -1  # fails validation, but the shoe is still in the source
+    stats = load_records(source(rows), prune=True)
+    assert (stats["rejected"], stats["kept"], stats["missing"], stats["deleted"]) == (1, 1, 1, 0)
+    assert set(fake_db.tables["shoes"]) == {row["id"] for row in shoes}
+    output = capsys.readouterr().out
+    assert "Not pruning" in output
+    assert "Rejected in source (kept as is): 1" in output
+
+
+def test_dry_run_reports_without_writing(fake_db, shoes, capsys):
+    before = {shoe_id: dict(row) for shoe_id, row in fake_db.tables["shoes"].items()}
+    rows = [dict(row) for row in shoes[1:]]
+    rows[0]["drop"] = 2.0
+    stats = load_records(source(rows), prune=True, dry_run=True)
+    assert (stats["changed"], stats["missing"], stats["deleted"]) == (1, 1, 0)
+    assert fake_db.tables["shoes"] == before
+    assert "Missing from source: 1\n" in capsys.readouterr().out
+
+
+def test_prune_needs_the_whole_source(fake_db):
+    with pytest.raises(ValueError):
+        load_records([], offset=10, prune=True)
@@ -0,0 +1,72 @@
+"""Catalog export: NDJSON and Arrow streams, filters and conditional requests"""
+
+import json
+
+import pytest
+
+
+def export_lines(client, **params):
+    response = client.get("/api/shoes/export", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return response.text
+
+
+def test_ndjson_is_one_row_per_line_in_id_order(client, shoes):
+    text = export_lines(client)
+    assert text.endswith("\n") and "\n\n" not in text
+    rows = [json.loads(line) for line in text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(shoe["id"] for shoe in shoes)
+    assert rows[0] == next(shoe for shoe in shoes if shoe["id"] == rows[0]["id"])
+
+
+def test_ndjson_spans_pages(client, fake_db, shoes):
+    more = [{**shoe, "id": f"shoe-x{i:03d}", "name": f"{shoe['name']} II"} for i, shoe in enumerate(shoes * 2)]
+    fake_db.load("shoes", more)
+    # Three pages of 100 at the smallest chunk size
+    lines = export_lines(client, chunk_size=100).splitlines()
+    assert len(lines) == len(shoes) + len(more) == 240
+    assert len({json.loads(line)["id"] for line in lines}) == 240
+
+
+def test_list_endpoint_matches_export(client, shoes):
+    params = {"category": "workout", "min_weight": 200, "max_drop": 8, "tags": ["cushioned"]}
+    listed = client.get("/api/shoes", params={**params, "page_size": 100}).json()["data"]
+    exported = export_lines(client, **params).splitlines()
+    assert len(listed) == len(exported) > 0
+    assert {shoe["id"] for shoe in listed} == {json.loads(line)["id"] for line in exported}
+
+
+def test_arrow_stream(client, shoes):
+    pa = pytest.importorskip("pyarrow")
+    response = client.get("/api/shoes/export", params={"format": "arrow", "category": "race"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    expected = sorted(shoe["id"] for shoe in shoes if shoe["category"] == "race")
+    assert table.column("id").to_pylist() == expected
+    assert table.schema.field("updated_at").type == pa.timestamp("us", tz="UTC")
+    first = next(shoe for shoe in shoes if shoe["id"] == expected[0])
+    assert table.column("tags").to_pylist()[0] == first["tags"]
+
+
+def test_etag_round_trip(client, fake_db, shoes):
+    params = [("tags", "firm"), ("tags", "cushioned"), ("category", "daily")]
+    response = client.get("/api/shoes/export", params=params)
+    etag = response.headers["ETag"]
+    assert response.headers["X-Catalog-Version"] in etag
+
+    # Parameter order and repeats don't change the tag; the format and filters do
+    same = client.get("/api/shoes/export", params=[("category", "daily"), *reversed(params[:2]), ("tags", "firm")])
+    assert same.headers["ETag"] == etag
+    assert client.get("/api/shoes/export", params=[*params, ("format", "arrow")]).headers["ETag"] != etag
+    assert client.get("/api/shoes/export", params=params[:1]).headers["ETag"] != etag
+
+    cached = client.get("/api/shoes/export", params=params, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    # Any write to the catalog changes the version
+    fake_db.tables["shoes"][shoes[0]["id"]]["updated_at"] = "2030-01-01T00:00:00+00:00"
+    changed = client.get("/api/shoes/export", params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
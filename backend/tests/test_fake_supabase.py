@@ -0,0 +1,80 @@
+"""The in-memory Supabase fake follows the RLS policies and constraints of the migrations"""
+
+import pytest
+from postgrest import APIError
+
+
+@pytest.fixture
+def two_users(fake_db, shoes):
+    """Two users with one shoe each in their rotation and graveyard"""
+    users = []
+    for email, shoe in [("ana@example.com", shoes[0]), ("ben@example.com", shoes[1])]:
+        user, token = fake_db.create_user(email)
+        client = fake_db.client(token)
+        client.table("rotation").insert({"user_id": user.id, "shoe_id": shoe["id"]}).execute()
+        client.table("graveyard").insert({"user_id": user.id, "shoe_id": shoe["id"], "rating": 4}).execute()
+        users.append((user, client))
+    return users
+
+
+def test_users_only_see_their_own_rows(fake_db, two_users):
+    (ana, ana_client), (ben, _) = two_users
+    rows = ana_client.table("rotation").select("*").execute().data
+    assert [row["user_id"] for row in rows] == [ana.id]
+    # Filtering on another user's id doesn't get around the policy
+    assert ana_client.table("graveyard").select("*").eq("user_id", ben.id).execute().data == []
+    # The service client bypasses RLS
+    assert len(fake_db.client(service=True).table("rotation").select("*").execute().data) == 2
+
+
+def test_anonymous_clients_read_shoes_but_no_user_data(fake_db, shoes, two_users):
+    anon = fake_db.client()
+    assert len(anon.table("shoes").select("id").execute().data) == len(shoes)
+    assert anon.table("rotation").select("*").execute().data == []
+    assert anon.table("profiles").select("*").execute().data == []
+
+
+def test_inserting_rows_for_another_user_is_refused(two_users, shoes):
+    (_, ana_client), (ben, _) = two_users
+    with pytest.raises(APIError) as error:
+        ana_client.table("rotation").insert({"user_id": ben.id, "shoe_id": shoes[2]["id"]}).execute()
+    assert error.value.code == "42501"
+
+
+def test_users_cannot_change_or_delete_other_users_rows(fake_db, two_users):
+    (_, ana_client), (ben, _) = two_users
+    updated = ana_client.table("graveyard").update({"rating": 1}).eq("user_id", ben.id).execute().data
+    deleted = ana_client.table("rotation").delete().eq("user_id", ben.id).execute().data
+    assert updated == [] and deleted == []
+    ben_rows = [row for row in fake_db.tables["graveyard"].values() if row["user_id"] == ben.id]
+    assert [row["rating"] for row in ben_rows] == [4]
+
+
+def test_shoes_are_insert_only_for_users(fake_db, shoes, two_users):
+    (_, ana_client), _ = two_users
+    created = ana_client.table("shoes").insert({
+        "brand": "Test", "name": "New", "category": "daily",
+        "weight": 250, "drop": 8, "stack_height_heel": 35, "stack_height_forefoot": 27,
+    }).execute().data[0]
+    assert created["tags"] == [] and created["created_at"]
+    assert ana_client.table("shoes").update({"weight": 1}).eq("id", shoes[0]["id"]).execute().data == []
+    assert ana_client.table("shoes").delete().eq("id", shoes[0]["id"]).execute().data == []
+    assert fake_db.tables["shoes"][shoes[0]["id"]]["weight"] == shoes[0]["weight"]
+
+
+def test_unique_and_foreign_key_constraints(fake_db, shoes, two_users):
+    (ana, ana_client), _ = two_users
+    with pytest.raises(APIError) as error:
+        ana_client.table("rotation").insert({"user_id": ana.id, "shoe_id": shoes[0]["id"]}).execute()
+    assert error.value.code == "23505"
+    with pytest.raises(APIError) as error:
+        ana_client.table("rotation").insert({"user_id": ana.id, "shoe_id": "no-such-shoe"}).execute()
+    assert error.value.code == "23503"
+
+
+def test_deleting_a_shoe_cascades_to_rotations_and_graveyards(fake_db, shoes, two_users):
+    service = fake_db.client(service=True)
+    service.table("shoes").delete().eq("id", shoes[0]["id"]).execute()
+    for table in ("rotation", "graveyard"):
+        remaining = [row["shoe_id"] for row in fake_db.tables[table].values()]
+        assert remaining == [shoes[1]["id"]]
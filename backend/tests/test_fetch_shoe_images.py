@@ -0,0 +1,266 @@
+"""The image fetcher against a mock Sneaker Database API"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.scripts import fetch_shoe_images as fetcher
+from app.scripts.fetch_shoe_images import (
+    ImageUpdateWriter,
+    TokenBucket,
+    backoff_delay,
+    fetch_and_update_images,
+    get_with_retry,
+)
+from app.scripts.sneaker_cache import SneakerCache
+
+
+def sneaker_api(requests, statuses=None):
+    """
+    Transport answering /sneakers searches with an image per name. `statuses`
+    maps a name to the status codes its first requests get.
+    """
+    statuses = statuses or {}
+
+    def handle(request):
+        requests.append(request)
+        name = request.url.params["name"]
+        if statuses.get(name):
+            return httpx.Response(statuses[name].pop(0), headers={"Retry-After": "0"})
+        slug = name.lower().replace(" ", "-")
+        return httpx.Response(200, json={"count": 1, "results": [{"image": {"original": f"https://img.example.com/{slug}.jpg"}}]})
+
+    return httpx.MockTransport(handle)
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """Record backoff delays instead of sleeping them; returns [(attempt, Retry-After)]"""
+    delays = []
+
+    def record(attempt, retry_after=None):
+        delays.append((attempt, retry_after))
+        return 0
+
+    monkeypatch.setattr(fetcher, "backoff_delay", record)
+    return delays
+
+
+def test_token_bucket_enforces_the_rate():
+    async def scenario():
+        bucket = TokenBucket(rate=50, capacity=5)
+        started = time.monotonic()
+        times = []
+        for _ in range(15):
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+        return times
+
+    times = asyncio.run(scenario())
+    # The burst is served at once, the other 10 at 50/s
+    assert times[4] < 0.05
+    assert times[-1] >= 10 / 50 * 0.95
+    assert times[-1] < 10 / 50 + 0.5
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(3) for _ in range(200)]
+    assert all(0 <= delay <= fetcher.BACKOFF_BASE_SECONDS * 2 ** 3 for delay in delays)
+    assert len(set(delays)) > 100
+    assert all(backoff_delay(20) <= fetcher.BACKOFF_MAX_SECONDS for _ in range(50))
+    assert backoff_delay(0, retry_after="7") == 7.0
+    assert backoff_delay(0, retry_after="3600") == fetcher.BACKOFF_MAX_SECONDS
+    assert 0 <= backoff_delay(0, retry_after="Wed, 21 Oct 2026 07:28:00 GMT") <= fetcher.BACKOFF_BASE_SECONDS
+
+
+def retry(transport, name, stats):
+    async def scenario():
+        async with fetcher.create_client("https://api.example.com", transport=transport) as client:
+            return await get_with_retry(client, TokenBucket(1000), "/sneakers", {"name": name}, stats)
+
+    return asyncio.run(scenario())
+
+
+def test_throttled_and_failed_requests_are_retried(no_backoff):
+    requests, stats = [], {"retries": 0}
+    response = retry(sneaker_api(requests, {"Pegasus": [429, 503, 502]}), "Pegasus", stats)
+    assert response.status_code == 200 and len(requests) == 4
+    assert stats["retries"] == 3
+    assert no_backoff == [(0, "0"), (1, "0"), (2, "0")]
+    assert requests[0].headers["X-RapidAPI-Host"] == fetcher.RAPIDAPI_HOST
+
+
+def test_retries_give_up(no_backoff):
+    requests, stats = [], {"retries": 0}
+    response = retry(sneaker_api(requests, {"Pegasus": [503] * 10}), "Pegasus", stats)
+    assert response.status_code == 503 and len(requests) == fetcher.MAX_RETRIES + 1
+    assert stats["retries"] == fetcher.MAX_RETRIES
+
+    # Client errors are not retried
+    requests = []
+    assert retry(sneaker_api(requests, {"Pegasus": [400]}), "Pegasus", stats).status_code == 400
+    assert len(requests) == 1
+
+
+def test_run_against_a_mock_api(fake_db, shoes, no_backoff):
+    requests = []
+    # Shoes are processed in brand, name order
+    first = min(shoes, key=lambda shoe: (shoe["brand"], shoe["name"]))["name"]
+    stats = asyncio.run(fetch_and_update_images(
+        limit=10, requests_per_second=1000, batch_size=4, transport=sneaker_api(requests, {first: [429]}),
+    ))
+    assert (stats["total"], stats["found"], stats["updated"], stats["retries"]) == (10, 10, 10, 1)
+    assert len(requests) == 11
+    updated = [row for row in fake_db.tables["shoes"].values() if row["image_url"]]
+    assert len(updated) == 10
+    assert all(row["image_url"].endswith(row["name"].lower().replace(" ", "-") + ".jpg") for row in updated)
+
+
+def brand_name_order(shoes):
+    return sorted(shoes, key=lambda shoe: (shoe["brand"], shoe["name"]))
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(fake_db, shoes, no_backoff, monkeypatch, tmp_path):
+    cache = SneakerCache(str(tmp_path / "cache.sqlite3"))
+    failing = brand_name_order(shoes)[5]["id"]
+    write = fetcher.update_shoe_images
+
+    def flaky_write(updates):
+        if any(update["id"] == failing for update in updates):
+            raise RuntimeError("database unavailable")
+        return write(updates)
+
+    monkeypatch.setattr(fetcher, "update_shoe_images", flaky_write)
+    requests = []
+    # One worker, so batches are filled in brand, name order
+    run = {
+        "limit": 10, "concurrency": 1, "requests_per_second": 1000, "batch_size": 4, "cache": cache,
+        "transport": sneaker_api(requests),
+    }
+    stats = asyncio.run(fetch_and_update_images(**run))
+    assert (stats["updated"], stats["errors"]) == (6, 4)
+    # The failed batch (the 5th to 8th shoe) is left for the next run
+    done = {shoe["id"] for shoe in brand_name_order(shoes)[:10]} - {shoe["id"] for shoe in brand_name_order(shoes)[4:8]}
+    assert cache.completed("default") == done
+
+    monkeypatch.setattr(fetcher, "update_shoe_images", write)
+    requests.clear()
+    stats = asyncio.run(fetch_and_update_images(**run))
+    assert (stats["resumed"], stats["updated"], stats["errors"]) == (6, 4, 0)
+    # Their lookups were cached by the first run
+    assert (stats["lookups"], stats["cache_hits"], len(requests)) == (0, 4, 0)
+    assert cache.completed("default") == set()
+    assert sum(bool(row["image_url"]) for row in fake_db.tables["shoes"].values()) == 10
+
+    # --restart processes everything again
+    stats = asyncio.run(fetch_and_update_images(**run, force=True, resume=False))
+    assert (stats["resumed"], stats["cache_hits"]) == (0, 10)
+    cache.close()
+
+
+def test_offline_runs_make_no_requests(fake_db, shoes, monkeypatch, tmp_path):
+    ordered = brand_name_order(shoes)[:6]
+    cache = SneakerCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=0, negative_ttl_seconds=0)
+    cache.put(ordered[0]["brand"], ordered[0]["name"], {"image": "https://img.example.com/a.jpg"})
+    cache.put(ordered[1]["brand"], ordered[1]["name"], None)
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("offline runs must not open an HTTP client")
+
+    monkeypatch.setattr(fetcher.httpx, "AsyncClient", no_network)
+    stats = asyncio.run(fetch_and_update_images(limit=6, offline=True, cache=cache, mirror_images=True))
+    # Expired entries are still used offline; shoes never looked up are left alone
+    assert (stats["cache_hits"], stats["uncached"], stats["lookups"]) == (2, 4, 0)
+    assert (stats["found"], stats["not_found"], stats["updated"]) == (1, 5, 1)
+    assert fake_db.tables["shoes"][ordered[0]["id"]]["image_url"] == "https://img.example.com/a.jpg"
+    cache.close()
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """Record update_shoe_images batches instead of writing them"""
+    batches = []
+
+    def update(updates):
+        batches.append([update["id"] for update in updates])
+        return len(updates)
+
+    monkeypatch.setattr(fetcher, "update_shoe_images", update)
+    return batches
+
+
+def writer_stats():
+    return {"updated": 0, "writes": 0, "errors": 0}
+
+
+async def queue(writer, count, start=0):
+    for i in range(start, start + count):
+        await writer.add({"id": f"shoe-{i}"}, f"https://img.example.com/{i}.jpg")
+
+
+def test_writer_flushes_full_batches(writes):
+    written = []
+
+    async def scenario():
+        async with ImageUpdateWriter(writer_stats(), batch_size=3, flush_interval=60, on_written=written.extend) as writer:
+            await queue(writer, 7)
+            assert writes == [["shoe-0", "shoe-1", "shoe-2"], ["shoe-3", "shoe-4", "shoe-5"]]
+        return writer.stats
+
+    stats = asyncio.run(scenario())
+    # Closing writes the partial batch
+    assert writes[-1] == ["shoe-6"]
+    assert written == [f"shoe-{i}" for i in range(7)]
+    assert (stats["updated"], stats["writes"], stats["errors"]) == (7, 3, 0)
+
+
+def test_writer_flushes_partial_batches_on_a_timer(writes):
+    async def scenario():
+        async with ImageUpdateWriter(writer_stats(), batch_size=100, flush_interval=0.05) as writer:
+            await queue(writer, 2)
+            await asyncio.sleep(0.15)
+            assert writes == [["shoe-0", "shoe-1"]]
+            await queue(writer, 1, start=2)
+            await asyncio.sleep(0.15)
+            assert writes == [["shoe-0", "shoe-1"], ["shoe-2"]]
+
+    asyncio.run(scenario())
+
+
+def test_writer_flushes_when_the_run_is_interrupted(writes):
+    async def scenario():
+        async with ImageUpdateWriter(writer_stats(), batch_size=100, flush_interval=60) as writer:
+            await queue(writer, 3)
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        asyncio.run(scenario())
+    assert writes == [["shoe-0", "shoe-1", "shoe-2"]]
+
+
+def test_writer_retries_failed_writes(monkeypatch, no_backoff):
+    attempts = []
+
+    def flaky(updates):
+        attempts.append(len(updates))
+        if len(attempts) <= 2 or len(updates) == 1:
+            raise RuntimeError("connection reset")
+        return len(updates)
+
+    monkeypatch.setattr(fetcher, "update_shoe_images", flaky)
+    written = []
+
+    async def scenario():
+        async with ImageUpdateWriter(writer_stats(), batch_size=2, flush_interval=60, on_written=written.extend) as writer:
+            await queue(writer, 3)
+        return writer.stats
+
+    stats = asyncio.run(scenario())
+    # The first batch succeeds on its third attempt; the last one gives up after WRITE_RETRIES
+    assert attempts == [2, 2, 2] + [1] * (fetcher.WRITE_RETRIES + 1)
+    assert [attempt for attempt, _ in no_backoff] == [0, 1, *range(fetcher.WRITE_RETRIES)]
+    assert (stats["updated"], stats["writes"], stats["errors"]) == (2, 1, 1)
+    # Only written shoes are checkpointed
+    assert written == ["shoe-0", "shoe-1"]
@@ -0,0 +1,111 @@
+"""Health endpoints served from the background database probe"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import main
+from app.core import health
+from app.core.health import HealthMonitor
+from app.core.warmup import WarmUp
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    """A fresh probe state for the health endpoints"""
+    monitor = HealthMonitor(interval=60, timeout=1, stale_after=30)
+    monkeypatch.setattr(main, "health_monitor", monitor)
+    return monitor
+
+
+@pytest.fixture
+def warm(monitor, monkeypatch):
+    """A warm-up that only opens connections, like the first real phase"""
+    warm = WarmUp([("connections", monitor.check)])
+    monkeypatch.setattr(main, "warmup", warm)
+    return warm
+
+
+def test_ready_only_once_warm(client, fake_db, shoes, monitor, warm):
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready" and response.json()["stale"]
+
+    # A probe alone is not enough
+    asyncio.run(monitor.check())
+    assert client.get("/health/ready").status_code == 503
+
+    asyncio.run(warm.run_once())
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready" and body["database"] == "connected" and body["shoe_count"] == 80
+    assert body["warmup"]["ready"] and body["warmup"]["phases"]["connections"]["status"] == "done"
+
+    # ... and stays ready only while the probe is fresh
+    monitor.last_checked = time.monotonic() - 31
+    assert client.get("/health/ready").status_code == 503
+
+
+def test_health_reports_staleness_and_the_last_error(client, fake_db, shoes, monitor, warm, monkeypatch):
+    def unreachable():
+        raise RuntimeError("connection refused")
+
+    probe = health.probe_database
+    monkeypatch.setattr(health, "probe_database", unreachable)
+    asyncio.run(monitor.check())
+    asyncio.run(monitor.check())
+    body = client.get("/health").json()
+    assert body["status"] == "degraded" and body["database"] == "error: connection refused"
+    assert body["probe"]["last_error"] == "connection refused" and body["probe"]["consecutive_failures"] == 2
+    assert body["probe"]["last_success"] is None and not body["probe"]["stale"]
+
+    # Recovery keeps the last error for the record
+    monkeypatch.setattr(health, "probe_database", probe)
+    asyncio.run(monitor.check())
+    body = client.get("/health").json()
+    assert body["database"] == "connected" and body["shoe_count"] == 80
+    assert body["probe"]["last_error"] == "connection refused" and body["probe"]["consecutive_failures"] == 0
+    assert body["probe"]["last_success"] is not None
+
+    monitor.last_checked = time.monotonic() - 45
+    body = client.get("/health").json()
+    assert body["status"] == "degraded" and body["database"] == "connected"
+    assert body["probe"]["stale"] and body["probe"]["checked_seconds_ago"] >= 45
+
+
+def test_hung_probes_do_not_pile_up(monkeypatch):
+    release, calls = threading.Event(), []
+
+    def hanging():
+        calls.append(1)
+        release.wait()
+        return 80
+
+    monkeypatch.setattr(health, "probe_database", hanging)
+    monitor = HealthMonitor(interval=60, timeout=0.05, stale_after=30)
+
+    async def scenario():
+        await monitor.check()
+        assert monitor.last_error == "probe timed out after 0.05s"
+        await monitor.check()
+        assert monitor.last_error == "previous probe still running after 0.05s"
+        release.set()
+        await asyncio.sleep(0.05)
+        # The next probe starts afresh once the stuck one returned
+        await monitor.check()
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert len(calls) == 2 and monitor.consecutive_failures == 0 and monitor.database == "connected"
+
+
+def test_liveness_never_touches_the_database(client, monitor, monkeypatch):
+    def fail():
+        raise AssertionError("liveness must not probe")
+
+    monkeypatch.setattr(health, "probe_database", fail)
+    response = client.get("/health/live")
+    assert response.status_code == 200 and response.json()["status"] == "alive"
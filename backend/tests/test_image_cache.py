@@ -0,0 +1,163 @@
+"""The image proxy against a mock upstream"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import image_cache
+from app.core.image_cache import MAX_IMAGE_BYTES, DiskLRUCache, ImageFetchError, ImageProxy
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def fetch(handler, url, tmp_path):
+    """Fetch `url` through a proxy whose upstream is `handler`; returns (file contents, requests seen)"""
+    requests = []
+
+    async def record(request):
+        requests.append(request)
+        response = handler(request)
+        return await response if asyncio.iscoroutine(response) else response
+
+    proxy = ImageProxy(DiskLRUCache(str(tmp_path), 1 << 20), transport=httpx.MockTransport(record))
+
+    async def scenario():
+        try:
+            path = await proxy.fetch(url)
+            proxy.release(url)
+            with open(path, "rb") as f:
+                return f.read()
+        finally:
+            await proxy.close()
+
+    try:
+        return asyncio.run(scenario()), requests
+    except ImageFetchError as e:
+        e.requests = requests
+        raise
+
+
+def image(request):
+    return httpx.Response(200, headers={"Content-Type": "image/png"}, content=PNG)
+
+
+def test_connects_to_the_checked_address(resolved, tmp_path):
+    data, requests = fetch(image, "https://img.example.com/shoe.png?w=200", tmp_path)
+    assert data == PNG
+    (request,) = requests
+    assert str(request.url) == "https://93.184.215.14/shoe.png?w=200"
+    assert request.headers["Host"] == "img.example.com"
+    assert request.extensions["sni_hostname"] == "img.example.com"
+    assert resolved == ["img.example.com"]
+
+    _, (request,) = fetch(image, "http://cdn.example.net:8080/a.png", tmp_path)
+    assert request.url.host == "2606:2800:21f:cb07:6820:80da:af6b:8b2c" and request.url.port == 8080
+    assert request.headers["Host"] == "cdn.example.net:8080"
+    assert "sni_hostname" not in request.extensions
+
+
+@pytest.mark.parametrize("url", [
+    "http://internal.example.com/a.png",
+    "http://metadata.example.com/latest/meta-data",
+    "http://mixed.example.com/a.png",
+    "http://127.0.0.1/a.png",
+    "http://[::1]/a.png",
+    "http://[::ffff:10.0.0.1]/a.png",
+])
+def test_refuses_non_public_hosts(resolved, tmp_path, url):
+    with pytest.raises(ImageFetchError, match="not a public address") as e:
+        fetch(image, url, tmp_path)
+    assert e.value.requests == []
+
+
+@pytest.mark.parametrize("url", ["file:///etc/passwd", "gopher://img.example.com/", "http://unknown.example.com/a.png"])
+def test_refuses_other_schemes_and_unknown_hosts(resolved, tmp_path, url):
+    with pytest.raises(ImageFetchError) as e:
+        fetch(image, url, tmp_path)
+    assert e.value.requests == []
+
+
+def test_follows_redirects_checking_every_hop(resolved, tmp_path):
+    def upstream(request):
+        if request.url.path == "/old.png":
+            return httpx.Response(301, headers={"Location": "/new.png"})
+        if request.url.path == "/internal.png":
+            return httpx.Response(302, headers={"Location": "http://metadata.example.com/latest"})
+        if request.url.path.startswith("/loop"):
+            return httpx.Response(302, headers={"Location": f"/loop{len(request.url.path)}"})
+        return image(request)
+
+    data, requests = fetch(upstream, "http://img.example.com/old.png", tmp_path)
+    assert data == PNG
+    assert [request.url.path for request in requests] == ["/old.png", "/new.png"]
+    assert all(request.headers["Host"] == "img.example.com" for request in requests)
+
+    with pytest.raises(ImageFetchError, match="not a public address") as e:
+        fetch(upstream, "http://img.example.com/internal.png", tmp_path)
+    assert len(e.value.requests) == 1
+
+    with pytest.raises(ImageFetchError, match="too many times") as e:
+        fetch(upstream, "http://img.example.com/loop", tmp_path)
+    assert len(e.value.requests) == image_cache.MAX_REDIRECTS + 1
+
+
+def test_refuses_large_bodies_without_reading_them(resolved, tmp_path):
+    chunks_read = []
+
+    async def body():
+        for _ in range(MAX_IMAGE_BYTES // 65536 + 10):
+            chunks_read.append(1)
+            yield b"\x00" * 65536
+
+    def declared(request):
+        return httpx.Response(
+            200, headers={"Content-Type": "image/png", "Content-Length": str(MAX_IMAGE_BYTES + 1)}, content=body()
+        )
+
+    with pytest.raises(ImageFetchError, match="too large"):
+        fetch(declared, "http://img.example.com/declared.png", tmp_path)
+    assert chunks_read == []
+
+    def undeclared(request):
+        return httpx.Response(200, headers={"Content-Type": "image/png"}, content=body())
+
+    with pytest.raises(ImageFetchError, match="too large"):
+        fetch(undeclared, "http://img.example.com/undeclared.png", tmp_path)
+    # Reading stopped at the first chunk past the cap
+    assert len(chunks_read) == MAX_IMAGE_BYTES // 65536 + 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_refuses_errors_and_non_images(resolved, tmp_path):
+    with pytest.raises(ImageFetchError, match="returned 404"):
+        fetch(lambda request: httpx.Response(404), "http://img.example.com/a.png", tmp_path)
+    html = httpx.Response(200, headers={"Content-Type": "text/html"}, content=b"<html>")
+    with pytest.raises(ImageFetchError, match="not an image"):
+        fetch(lambda request: html, "http://img.example.com/b.png", tmp_path)
+
+
+def test_concurrent_misses_share_one_download(resolved, tmp_path):
+    requests = []
+
+    async def slow(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return image(request)
+
+    proxy = ImageProxy(DiskLRUCache(str(tmp_path), 1 << 20), transport=httpx.MockTransport(slow))
+    url = "http://img.example.com/popular.png"
+
+    async def scenario():
+        paths = await asyncio.gather(*(proxy.fetch(url) for _ in range(5)))
+        for _ in paths:
+            proxy.release(url)
+        # Served from disk from now on
+        await proxy.fetch(url)
+        proxy.release(url)
+        await proxy.close()
+        return paths
+
+    paths = asyncio.run(scenario())
+    assert len(set(paths)) == 1 and len(requests) == 1
+    assert proxy.cache.stats()["hits"] == 1 and not proxy.cache._pins
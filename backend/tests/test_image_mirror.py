@@ -0,0 +1,93 @@
+"""The local image mirror against a mock upstream"""
+
+import asyncio
+import io
+import os
+
+import httpx
+import pytest
+
+from app.scripts.image_mirror import MAX_IMAGE_BYTES, ImageMirror
+from app.scripts.sneaker_cache import SneakerCache
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def png(color="red"):
+    buf = io.BytesIO()
+    PIL.new("RGB", (800, 600), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def run(handler, urls, tmp_path, cache=None):
+    """Mirror each URL in turn; returns (results, stats, requests seen)"""
+    requests, stats = [], {}
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(record)) as client:
+            mirror = ImageMirror(client, cache, root=str(tmp_path / "mirror"), base_url="/mirror", widths=(160,))
+            return [await mirror.mirror(url, stats) for url in urls]
+
+    return asyncio.run(scenario()), stats, requests
+
+
+def test_mirrors_once_and_revalidates(resolved, tmp_path):
+    image = png()
+
+    def upstream(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=image)
+
+    cache = SneakerCache(str(tmp_path / "cache.db"))
+    urls = ["https://img.example.com/a.png", "https://img.example.com/copy-of-a.png", "https://img.example.com/a.png"]
+    results, stats, requests = run(upstream, urls, tmp_path, cache)
+    cache.close()
+
+    assert results[0] == results[1] == results[2] == {"160": results[0]["160"]}
+    assert stats == {"images_mirrored": 1, "images_deduplicated": 1, "images_unchanged": 1}
+    assert [request.url.host for request in requests] == ["93.184.215.14"] * 3
+    assert all(request.headers["Host"] == "img.example.com" for request in requests)
+    directory = os.path.dirname(str(tmp_path / "mirror" / results[0]["160"].removeprefix("/mirror/")))
+    assert sorted(os.listdir(directory)) == ["160.webp", "original"]
+
+
+def test_redirects_are_checked_on_every_hop(resolved, tmp_path):
+    image = png("blue")
+
+    def upstream(request):
+        if request.url.path == "/moved.png":
+            return httpx.Response(301, headers={"Location": "https://cdn.example.net/a.png"})
+        if request.url.path == "/internal.png":
+            return httpx.Response(302, headers={"Location": "http://metadata.example.com/latest/meta-data"})
+        return httpx.Response(200, content=image)
+
+    results, _, requests = run(upstream, ["https://img.example.com/moved.png"], tmp_path)
+    assert results[0] is not None
+    assert [(request.url.host, request.headers["Host"]) for request in requests] == [
+        ("93.184.215.14", "img.example.com"),
+        ("2606:2800:21f:cb07:6820:80da:af6b:8b2c", "cdn.example.net"),
+    ]
+
+    results, _, requests = run(upstream, ["https://img.example.com/internal.png"], tmp_path)
+    assert results == [None] and len(requests) == 1
+    results, _, requests = run(upstream, ["http://10.0.0.7/a.png"], tmp_path)
+    assert results == [None] and requests == []
+
+
+def test_large_images_are_cut_off(resolved, tmp_path):
+    chunks_read = []
+
+    async def body():
+        for _ in range(MAX_IMAGE_BYTES // 65536 + 10):
+            chunks_read.append(1)
+            yield b"\x00" * 65536
+
+    results, stats, _ = run(lambda request: httpx.Response(200, content=body()), ["https://img.example.com/big.png"], tmp_path)
+    assert results == [None] and stats == {}
+    assert len(chunks_read) == MAX_IMAGE_BYTES // 65536 + 1
+    assert not (tmp_path / "mirror").exists()
@@ -0,0 +1,70 @@
+"""Per-thread metric shards"""
+
+import threading
+
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, Registry
+
+
+def run_threads(count, target):
+    """Start `count` short-lived threads one batch at a time, like a pool replacing idle workers"""
+    for start in range(0, count, 20):
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(start, min(start + 20, count))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def test_short_lived_threads_keep_shards_bounded():
+    counter = Counter("requests_total", "Requests", ["method"], registry=None)
+    gauge = Gauge("in_flight", "In flight", registry=None)
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0), registry=None)
+
+    def record(i):
+        counter.inc("GET")
+        counter.inc("POST", amount=2)
+        gauge.inc()
+        gauge.dec(amount=0.5)
+        histogram.observe(0.05 if i % 2 else 5.0, "/api/shoes")
+
+    run_threads(1000, record)
+    # Each batch's shards are retired when the next batch's threads register
+    for metric in (counter, gauge, histogram):
+        assert len(metric._shards) <= 20
+
+    assert counter.collect() == {("GET",): 1000.0, ("POST",): 2000.0}
+    assert gauge.collect() == {(): 500.0}
+    cumulative, total, count = histogram.collect()[("/api/shoes",)]
+    assert cumulative == [500, 500, 1000] and count == 1000 and total == pytest.approx(500 * 0.05 + 500 * 5.0)
+    # Collecting retires whatever is left, and the totals don't change
+    assert len(counter._shards) == 0
+    assert counter.collect() == {("GET",): 1000.0, ("POST",): 2000.0}
+
+
+def test_live_threads_keep_their_shards():
+    counter = Counter("events_total", "Events", registry=None)
+    recorded, finish = threading.Event(), threading.Event()
+
+    def worker():
+        counter.inc()
+        recorded.set()
+        finish.wait()
+        counter.inc()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    recorded.wait()
+    counter.inc()
+    assert counter.collect() == {(): 2.0} and len(counter._shards) == 2
+    finish.set()
+    thread.join()
+    assert counter.collect() == {(): 3.0} and len(counter._shards) == 1
+
+
+def test_registry_renders_merged_samples():
+    registry = Registry()
+    counter = Counter("jobs_total", "Jobs", ["state"], registry=registry)
+    run_threads(50, lambda i: counter.inc("done"))
+    assert 'jobs_total{state="done"} 50\n' in registry.render()
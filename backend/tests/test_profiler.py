@@ -0,0 +1,92 @@
+"""On-demand request profiler"""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import admin
+from app.core.config import settings
+from app.core.profiler import ProfileSession, ProfilingMiddleware, SamplingProfiler, token_matches
+from app.main import app as main_app
+
+TOKEN = "profile-me"
+
+
+@pytest.fixture
+def sampler(tmp_path):
+    return SamplingProfiler(str(tmp_path / "profiles"), interval=0.001, max_files=3)
+
+
+@pytest.fixture
+def profiled(sampler, monkeypatch):
+    """A small app behind ProfilingMiddleware, with the admin routes and a token configured"""
+    monkeypatch.setattr(settings, "PROFILER_TOKEN", TOKEN)
+    monkeypatch.setattr(admin, "profiler", sampler)
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+
+    # Async, so it runs on the profiled event loop thread
+    @app.get("/api/slow")
+    async def slow():
+        deadline = time.perf_counter() + 0.03
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    @app.get("/api/other")
+    async def other():
+        return await slow()
+
+    return TestClient(ProfilingMiddleware(app, sampler))
+
+
+def test_inactive_without_a_token():
+    assert settings.PROFILER_TOKEN == ""
+    assert not token_matches("") and not token_matches("anything") and not token_matches(None)
+    assert not any(middleware.cls is ProfilingMiddleware for middleware in main_app.user_middleware)
+    client = TestClient(main_app)
+    assert client.get("/api/admin/profiler", headers={"X-Profiler-Token": ""}).status_code == 404
+    response = client.get("/", headers={"X-Profile": ""})
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_profiles_requests_carrying_the_token(profiled, sampler):
+    assert "X-Profile-Id" not in profiled.get("/api/slow").headers
+    assert "X-Profile-Id" not in profiled.get("/api/slow", headers={"X-Profile": "wrong"}).headers
+    response = profiled.get("/api/slow", headers={"X-Profile": TOKEN})
+    name = response.headers["X-Profile-Id"]
+    assert "GET-api-slow-200-" in name and sampler.list_profiles() == [name]
+
+    download = profiled.get(f"/api/admin/profiler/profiles/{name}", headers={"X-Profiler-Token": TOKEN})
+    lines = download.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("slow (test_profiler.py:" in line for line in lines)
+
+
+def test_armed_profiling_follows_the_route_glob(profiled, sampler):
+    headers = {"X-Profiler-Token": TOKEN}
+    assert profiled.post("/api/admin/profiler", json={"requests": 2}).status_code == 403
+    status = profiled.post("/api/admin/profiler", json={"requests": 2, "route": "/api/slow*"}, headers=headers)
+    assert status.json()["data"]["remaining"] == 2
+
+    assert "X-Profile-Id" not in profiled.get("/api/other").headers
+    assert "X-Profile-Id" in profiled.get("/api/slow").headers
+    assert "X-Profile-Id" in profiled.get("/api/slow").headers
+    assert "X-Profile-Id" not in profiled.get("/api/slow").headers
+    data = profiled.get("/api/admin/profiler", headers=headers).json()["data"]
+    assert data["remaining"] == 0 and len(data["profiles"]) == 2 and data["active"] == 0
+
+
+def test_keeps_only_the_newest_files(sampler):
+    names = []
+    for i in range(5):
+        session = ProfileSession(0, f"GET /api/shoes/{i}")
+        session.stacks["main (app.py:1);handler (shoes.py:10)"] = 3
+        names.append(sampler.save(session, 200))
+    assert sampler.list_profiles() == names[:1:-1]
+    with open(f"{sampler.directory}/{names[-1]}") as f:
+        assert f.read() == "main (app.py:1);handler (shoes.py:10) 3\n"
+    # A request too short to sample writes nothing
+    assert sampler.save(ProfileSession(0, "GET /"), 200) is None
@@ -0,0 +1,119 @@
+"""A catalog saved to a snapshot file and mapped back serves the same answers"""
+
+import mmap
+
+import pytest
+
+from app.core.catalog import SPEC_FIELDS, ShoeCatalog
+from app.core.similarity import SimilarityIndex
+from app.core.snapshot import MappedBitmaps
+
+QUERIES = [
+    {},
+    {"category": "race", "limit": 10},
+    {"brand": "o", "search": "model", "offset": 3},
+    {"any_tags": ["firm", "bouncy"], "ranges": {"weight": (None, 250)}},
+    *({"sort_by": field, "descending": True, "limit": 15} for field in SPEC_FIELDS),
+]
+
+
+@pytest.fixture
+def catalog(shoes):
+    catalog = ShoeCatalog()
+    catalog.validate()
+    return catalog
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "catalog.snapshot")
+
+
+def mapped(path):
+    catalog = ShoeCatalog()
+    assert catalog.open_snapshot(path)
+    return catalog
+
+
+def test_round_trip_serves_the_same_rows_and_facets(catalog, path, shoes):
+    catalog.save_snapshot(path, generation=3)
+    copy = mapped(path)
+    assert copy.serves_snapshot and copy.snapshot_generation == 3
+    assert copy.version == catalog.version
+    assert copy.stats()["shoes"] == len(shoes)
+    for query in QUERIES:
+        assert copy.query(**query) == catalog.query(**query)
+    assert copy.facets() == catalog.facets()
+    assert copy.facets(category="daily", tags=["cushioned"]) == catalog.facets(category="daily", tags=["cushioned"])
+    assert all(copy.get(row["id"]) == catalog.get(row["id"]) for row in shoes)
+    assert copy.get("no-such-shoe") is None
+
+
+def test_neighbour_lists_round_trip(catalog, path, shoes):
+    similarity = SimilarityIndex(catalog)
+    assert similarity.build() == len(shoes)
+    catalog.save_snapshot(path, similarity.export())
+    copy = mapped(path)
+    assert copy.has_snapshot_neighbours()
+    for row in shoes[:10]:
+        assert SimilarityIndex(copy).similar(row["id"], 3) == similarity.similar(row["id"], 3)
+
+
+def test_writes_detach_from_the_file(catalog, path, shoes):
+    catalog.save_snapshot(path)
+    copy = mapped(path)
+    copy.upsert({**shoes[0], "id": "shoe-new", "name": "Extra"})
+    copy.remove(shoes[1]["id"])
+    assert not copy.serves_snapshot
+    assert copy.get("shoe-new") is not None and copy.get(shoes[1]["id"]) is None
+    reopened = mapped(path)
+    assert reopened.get("shoe-new") is None and reopened.get(shoes[1]["id"]) is not None
+
+
+def test_facet_bitmaps_are_read_in_place(catalog, path, shoes):
+    catalog.save_snapshot(path)
+    copy = mapped(path)
+    # Views of the mapping, decoded per query, rather than private ints
+    assert isinstance(copy._brand_bits, MappedBitmaps)
+    assert all(isinstance(view.obj, mmap.mmap) for view in copy._tag_bits._views.values())
+    assert dict(copy._tag_bits) == catalog._tag_bits
+    assert copy._brand_counts == catalog._brand_counts and copy._tag_counts == catalog._tag_counts
+
+    # A write copies them out, and changes them only in this worker
+    tagged = next(row for row in shoes if "firm" not in row["tags"])
+    copy.upsert({**tagged, "tags": ["firm"]})
+    assert isinstance(copy._tag_bits, dict)
+    assert copy.facets()["tags"]["firm"] == catalog.facets()["tags"]["firm"] + 1
+    assert mapped(path).facets() == catalog.facets()
+
+
+def test_snapshot_of_a_written_catalog_is_in_catalog_order(catalog, path, shoes):
+    catalog.upsert({**shoes[0], "id": "shoe-new", "brand": "Adidas", "name": "Boston"})
+    catalog.remove(shoes[1]["id"])
+    catalog.save_snapshot(path)
+    copy = mapped(path)
+    assert copy.query() == catalog.query()
+    assert copy.query()[0]["id"] == "shoe-new"
+    # Equal weights may tie in a different order
+    by_weight = catalog.query(sort_by="weight")
+    assert [row["weight"] for row in copy.query(sort_by="weight")] == [row["weight"] for row in by_weight]
+    assert sorted(row["id"] for row in copy.query(sort_by="weight")) == sorted(row["id"] for row in by_weight)
+
+
+def test_unusable_files_are_ignored(catalog, path, tmp_path):
+    catalog.save_snapshot(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    truncated = tmp_path / "truncated.snapshot"
+    truncated.write_bytes(data[: len(data) // 2])
+    garbage = tmp_path / "garbage.snapshot"
+    garbage.write_bytes(b"not a snapshot" * 100)
+    for broken in (truncated, garbage, tmp_path / "missing.snapshot"):
+        assert not ShoeCatalog().open_snapshot(str(broken))
+
+
+def test_only_versioned_catalogs_can_be_saved(shoes, path):
+    catalog = ShoeCatalog()
+    catalog.load(shoes)
+    with pytest.raises(ValueError):
+        catalog.save_snapshot(path)
@@ -0,0 +1,56 @@
+"""Lookup cache and run checkpoints"""
+
+import time
+
+import pytest
+
+from app.scripts.sneaker_cache import SneakerCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time() that only moves when told to: clock[0] += seconds"""
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SneakerCache(str(tmp_path / "cache" / "lookups.sqlite3"), ttl_seconds=100, negative_ttl_seconds=10)
+    yield cache
+    cache.close()
+
+
+def test_hits_are_normalized_and_expire(cache, clock):
+    cache.put("Nike", "Pegasus  41", {"image": "https://img.example.com/p41.jpg"})
+    assert cache.get(" nike", "pegasus 41") == (True, {"image": "https://img.example.com/p41.jpg"})
+    clock[0] += 99
+    assert cache.get("Nike", "Pegasus 41")[0]
+    clock[0] += 2
+    assert cache.get("Nike", "Pegasus 41") == (False, None)
+    # Offline runs still use what they have
+    assert cache.get("Nike", "Pegasus 41", allow_expired=True)[0]
+
+
+def test_misses_are_cached_with_the_shorter_ttl(cache, clock):
+    cache.put("Hoka", "Unknown", None)
+    assert cache.get("Hoka", "Unknown") == (True, None)
+    clock[0] += 11
+    assert cache.get("Hoka", "Unknown") == (False, None)
+    assert cache.get("Hoka", "Unknown", allow_expired=True) == (True, None)
+    assert cache.get("Hoka", "Never looked up", allow_expired=True) == (False, None)
+
+
+def test_checkpoints_are_per_run_and_persist(cache, tmp_path):
+    cache.mark_completed("nightly", "shoe-1")
+    cache.mark_completed("nightly", "shoe-1")
+    cache.mark_completed("nightly", "shoe-2")
+    cache.mark_completed("manual", "shoe-3")
+    cache.close()
+
+    reopened = SneakerCache(str(tmp_path / "cache" / "lookups.sqlite3"))
+    assert reopened.completed("nightly") == {"shoe-1", "shoe-2"}
+    reopened.clear_run("nightly")
+    assert reopened.completed("nightly") == set() and reopened.completed("manual") == {"shoe-3"}
+    reopened.close()
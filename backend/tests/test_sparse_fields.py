@@ -0,0 +1,53 @@
+"""`fields=` returns only the requested fields (plus the ids), validated like full responses"""
+
+import pytest
+
+
+@pytest.fixture
+def user_headers(fake_db, shoes):
+    """A user with two shoes in rotation and one in the graveyard"""
+    user, token = fake_db.create_user("runner@example.com")
+    client = fake_db.client(token)
+    for shoe in shoes[:2]:
+        client.table("rotation").insert({"user_id": user.id, "shoe_id": shoe["id"]}).execute()
+    client.table("graveyard").insert({"user_id": user.id, "shoe_id": shoes[2]["id"], "rating": 5}).execute()
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_shoe_list_returns_only_requested_fields(client, shoes):
+    data = client.get("/api/shoes", params={"fields": "brand, weight", "page_size": 5}).json()["data"]
+    full = client.get("/api/shoes", params={"page_size": 5}).json()["data"]
+    assert [set(shoe) for shoe in data] == [{"id", "brand", "weight"}] * 5
+    assert data == [{key: shoe[key] for key in ("id", "brand", "weight")} for shoe in full]
+
+
+def test_unknown_fields_are_rejected(client, shoes):
+    response = client.get("/api/shoes", params={"fields": "brand,price"})
+    assert response.status_code == 400
+    assert "price" in response.json()["detail"]
+
+
+def test_rotation_mixes_shoe_and_rotation_fields(client, user_headers, shoes):
+    response = client.get("/api/rotation", params={"fields": "name,start_date"}, headers=user_headers)
+    data = response.json()["data"]
+    assert {shoe["id"] for shoe in data} == {shoe["id"] for shoe in shoes[:2]}
+    assert all(set(shoe) == {"id", "name", "start_date"} for shoe in data)
+
+
+def test_graveyard_always_includes_its_entry_id(client, user_headers, shoes):
+    data = client.get("/api/graveyard", params={"fields": "rating"}, headers=user_headers).json()["data"]
+    assert len(data) == 1
+    assert set(data[0]) == {"id", "graveyard_id", "rating"}
+    assert data[0]["id"] == shoes[2]["id"] and data[0]["rating"] == 5
+
+
+def test_similar_shoes_project_the_nested_shoe(client, user_headers, shoes):
+    response = client.get(
+        f"/api/recommendations/similar/{shoes[0]['id']}",
+        params={"fields": "category", "limit": 3},
+        headers=user_headers,
+    )
+    data = response.json()["data"]
+    assert len(data) == 3
+    assert all(set(item) == {"shoe", "score", "explanation"} for item in data)
+    assert all(set(item["shoe"]) == {"id", "category"} for item in data)
@@ -0,0 +1,99 @@
+"""Per-request timing: the Server-Timing header and the latency histograms"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.timing import (
+    DB_ERRORS,
+    DB_LATENCY,
+    REQUEST_LATENCY,
+    Timeline,
+    _query_labels,
+    db_call,
+    instrument_postgrest,
+)
+
+
+def server_timing(response):
+    """Server-Timing entries as [(name, desc, milliseconds)]"""
+    entries = []
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        entries.append((name, values.get("desc", "").strip('"'), float(values["dur"])))
+    return entries
+
+
+def test_header_splits_the_request_into_phases(client, fake_db, shoes):
+    user, token = fake_db.create_user("runner@example.com")
+    fake_db.client(token).table("rotation").insert({"user_id": user.id, "shoe_id": shoes[0]["id"]}).execute()
+    response = client.get("/api/rotation", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    entries = server_timing(response)
+    names = [name for name, _, _ in entries]
+    assert names[0] == "auth" and names[-3:] == ["compute", "encode", "total"]
+    assert ("db", "rotation select") in [(name, desc) for name, desc, _ in entries]
+    total = entries[-1][2]
+    assert all(0 <= duration <= total for _, _, duration in entries)
+
+
+def test_repeated_queries_are_summed_per_table_and_operation():
+    timeline = Timeline()
+    timeline.spans.append(("auth", 0.0015))
+    timeline.db[("shoes", "select")] = [3, 0.012]
+    timeline.db[("catalog_stats", "rpc")] = [1, 0.004]
+    assert timeline.header([("compute", 0.002), ("total", 0.02)]) == (
+        'auth;dur=1.50, db;desc="shoes select x3";dur=12.00, db;desc="catalog_stats rpc";dur=4.00, '
+        "compute;dur=2.00, total;dur=20.00"
+    )
+
+
+def test_streamed_queries_are_recorded_after_the_header(client, fake_db, shoes):
+    fake_db.load("shoes", [{**shoe, "id": f"{shoe['id']}-{copy}"} for shoe in shoes for copy in "ab"])
+    before = DB_LATENCY.collect().get(("shoes", "select"), ([], 0.0, 0))[2]
+    response = client.get("/api/shoes/export", params={"chunk_size": 100})
+    # Only the version lookup ran before the headers went out
+    assert [desc for name, desc, _ in server_timing(response) if name == "db"] == ["shoes select"]
+    # ... but the histogram also sees the three pages read while streaming
+    assert DB_LATENCY.collect()[("shoes", "select")][2] == before + 4
+
+
+def test_requests_are_labelled_by_route_template(client, shoes):
+    key = ("/api/shoes/{shoe_id}", "200")
+    before = REQUEST_LATENCY.collect().get(key, ([], 0.0, 0))[2]
+    assert client.get(f"/api/shoes/{shoes[1]['id']}").status_code == 200
+    assert client.get(f"/api/shoes/{shoes[2]['id']}").status_code == 200
+    assert REQUEST_LATENCY.collect()[key][2] == before + 2
+    assert not any(route.startswith("/api/shoes/shoe-") for route, _ in REQUEST_LATENCY.collect())
+
+
+def test_failed_queries_are_counted():
+    before = DB_ERRORS.collect().get(("profiles", "update"), 0)
+    with pytest.raises(RuntimeError), db_call("profiles", "update"):
+        raise RuntimeError("connection reset")
+    assert DB_ERRORS.collect()[("profiles", "update")] == before + 1
+
+
+@pytest.mark.parametrize(("path", "method", "prefer", "labels"), [
+    ("/rest/v1/shoes", "GET", "", ("shoes", "select")),
+    ("/rest/v1/shoes", "HEAD", "count=exact", ("shoes", "count")),
+    ("/rest/v1/rotation", "POST", "return=representation", ("rotation", "insert")),
+    ("/rest/v1/shoes", "POST", "resolution=merge-duplicates", ("shoes", "upsert")),
+    ("/rest/v1/profiles", "PATCH", "", ("profiles", "update")),
+    ("/rest/v1/graveyard", "DELETE", "", ("graveyard", "delete")),
+    ("/rest/v1/rpc/catalog_stats", "POST", "", ("catalog_stats", "rpc")),
+])
+def test_query_labels(path, method, prefer, labels):
+    request = SimpleNamespace(path=path, http_method=method, headers={"Prefer": prefer})
+    assert _query_labels(request) == labels
+
+
+def test_postgrest_is_instrumented_once():
+    from postgrest._sync import request_builder
+
+    instrument_postgrest()
+    execute = request_builder.SyncQueryRequestBuilder.execute
+    instrument_postgrest()
+    assert request_builder.SyncQueryRequestBuilder.execute is execute
+    assert execute.__timed__
@@ -0,0 +1,69 @@
+"""Start-up warm-up and its per-phase timings"""
+
+import asyncio
+
+from app.core import warmup as warmup_module
+from app.core.health import HealthMonitor
+from app.core.metrics import REGISTRY
+from app.core.warmup import PHASES, WarmUp
+
+
+def sleeper(seconds):
+    async def phase():
+        await asyncio.sleep(seconds)
+
+    return phase
+
+
+def test_every_phase_is_timed(fake_db, shoes, monkeypatch):
+    monkeypatch.setattr(warmup_module, "health_monitor", HealthMonitor(interval=60, timeout=5, stale_after=30))
+    warm = WarmUp()
+    assert asyncio.run(warm.run_once())
+    report = warm.report()
+    assert report["ready"] and report["attempts"] == 1
+    assert list(report["phases"]) == [name for name, _ in PHASES]
+    assert all(phase["status"] == "done" and phase["ms"] >= 0 for phase in report["phases"].values())
+    assert report["total_ms"] >= sum(phase["ms"] for phase in report["phases"].values()) - 0.05
+
+
+def test_timings_match_the_phases(monkeypatch):
+    warm = WarmUp([("quick", sleeper(0)), ("slow", sleeper(0.05))])
+    assert asyncio.run(warm.run_once())
+    phases = warm.report()["phases"]
+    assert phases["quick"]["ms"] < 40 <= 50 <= phases["slow"]["ms"]
+    assert warm.total_ms >= phases["quick"]["ms"] + phases["slow"]["ms"] - 0.02
+
+    # ... and are exported as a gauge per phase
+    monkeypatch.setattr(warmup_module, "warmup", warm)
+    rendered = REGISTRY.render()
+    assert f'warmup_phase_duration_seconds{{phase="slow"}} {phases["slow"]["ms"] / 1000:g}' in rendered
+    assert 'warmup_phase_duration_seconds{phase="quick"}' in rendered
+
+
+def test_failed_phase_is_reported_and_retried(monkeypatch):
+    failures = ["database unavailable", "still unavailable"]
+
+    async def flaky():
+        if failures:
+            raise RuntimeError(failures.pop(0))
+
+    warm = WarmUp([("connections", sleeper(0)), ("catalog", flaky), ("search", sleeper(0))])
+    assert not asyncio.run(warm.run_once())
+    report = warm.report()
+    assert not report["ready"] and report["total_ms"] is None
+    assert report["phases"]["connections"]["status"] == "done"
+    assert report["phases"]["catalog"]["status"] == "failed" and "ms" in report["phases"]["catalog"]
+    assert report["phases"]["catalog"]["error"] == "database unavailable"
+    assert report["phases"]["search"] == {"status": "pending"}
+
+    monkeypatch.setattr(warmup_module, "RETRY_SECONDS", 0)
+
+    async def scenario():
+        warm.start()
+        await asyncio.wait_for(warm._task, 1)
+
+    asyncio.run(scenario())
+    report = warm.report()
+    assert report["ready"] and report["attempts"] == 3
+    assert all(phase["status"] == "done" for phase in report["phases"].values())
+